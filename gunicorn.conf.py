@@ -0,0 +1,42 @@
+# Üretim sunucusu ayarları
+# Kullanım: gunicorn -c gunicorn.conf.py "qa_app.main:create_app()"
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5001")
+
+# Tek worker: avatar tarayıcısı, YouTube dinleyicisi, soru kuyruğu ve single-flight durumu
+# süreç içinde tutuluyor; birden fazla worker avatarı ikiye böler ve kuyruğu paylaşamaz.
+# Eş zamanlılık thread'lerle sağlanır (istekler çoğunlukla LLM/TTS ağ çağrısı bekler).
+workers = 1
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "16"))
+
+# Modeller (sentence encoder, embedding'ler) master süreçte bir kez yüklenir
+preload_app = True
+
+# /predict cevabı deadline (QUESTION_DEADLINE_SECONDS) ile sınırlı; bunun üstüne pay bırakılır
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = 30
+keepalive = 5
+
+accesslog = "-"
+errorlog = "-"
+loglevel = os.getenv("LOG_LEVEL", "info").lower()
+
+
+def post_fork(server, worker):
+    # Thread'ler ve Chrome fork'tan sağ çıkmaz; worker içinde başlatılır
+    from qa_app.main import start_background
+    start_background()
+
+
+def post_worker_init(worker):
+    # Worker sinyalleri init_process'te sıfırlandığı için profil sinyali burada kurulur
+    from qa_app.config import settings
+    from qa_app.core.profiler import profiler
+    profiler.install_signal_handler(settings.PROFILE_SIGNAL, settings.PROFILE_SIGNAL_SECONDS)
+
+
+def worker_exit(server, worker):
+    from qa_app.main import shutdown
+    shutdown()
@@ -15,6 +15,25 @@ class Settings:
     OPENAI_MODEL_NAME = os.getenv("OPENAI_MODEL_NAME", "gpt-4o")
     OPENAI_SEARCH_MODEL = os.getenv("OPENAI_SEARCH_MODEL", "gpt-5-search-api")
 
+    # Model Cascade Ayarları (önce hızlı model, yetersizse büyük modele yükselt)
+    LLM_CASCADE_ENABLED = os.getenv("LLM_CASCADE_ENABLED", "false").lower() == "true"
+    LLM_CASCADE_FAST_PROVIDER = os.getenv("LLM_CASCADE_FAST_PROVIDER", "openai") # openai or ollama
+    LLM_CASCADE_FAST_MODEL = os.getenv("LLM_CASCADE_FAST_MODEL", "gpt-4o-mini")
+    LLM_CASCADE_MIN_RETRIEVAL_SCORE = float(os.getenv("LLM_CASCADE_MIN_RETRIEVAL_SCORE", "0.5"))
+    LLM_CASCADE_MIN_ANSWER_CHARS = int(os.getenv("LLM_CASCADE_MIN_ANSWER_CHARS", "40"))
+
+    # Hedging & Failover Ayarları
+    LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "false").lower() == "true"
+    LLM_HEDGE_FIRST_TOKEN_SECONDS = float(os.getenv("LLM_HEDGE_FIRST_TOKEN_SECONDS", "3"))
+    LLM_BREAKER_FAILURE_THRESHOLD = int(os.getenv("LLM_BREAKER_FAILURE_THRESHOLD", "3"))
+    LLM_BREAKER_RESET_SECONDS = float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))
+    OLLAMA_TIMEOUT_SECONDS = float(os.getenv("OLLAMA_TIMEOUT_SECONDS", "300"))
+
+    # Ollama Oturum Ayarları
+    OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m") # Modelin bellekte kalma süresi
+    OLLAMA_MAX_CONCURRENCY = int(os.getenv("OLLAMA_MAX_CONCURRENCY", "2"))
+    OLLAMA_KEEPALIVE_PING_SECONDS = float(os.getenv("OLLAMA_KEEPALIVE_PING_SECONDS", "240"))
+
     # AI Chitchat Check Ayarları
     CHITCHAT_CHECK_PROVIDER = os.getenv("CHITCHAT_CHECK_PROVIDER", "openai") # openai or ollama
     CHITCHAT_CHECK_MODEL = os.getenv("CHITCHAT_CHECK_MODEL", "gpt-4o-mini")
@@ -24,9 +43,65 @@ class Settings:
     TTS_MODEL = os.getenv("TTS_MODEL", "tts-1") # tts-1 or tts-1-hd
     TTS_VOICE = os.getenv("TTS_VOICE", "nova") # alloy, echo, fable, onyx, nova, shimmer
 
+    # LLM/TTS Scheduler (Rate Limit) Ayarları
+    OPENAI_RPM = int(os.getenv("OPENAI_RPM", "500")) # 0 = limitsiz
+    OPENAI_TPM = int(os.getenv("OPENAI_TPM", "30000"))
+    OLLAMA_RPM = int(os.getenv("OLLAMA_RPM", "0"))
+    LLM_MODEL_RATE_LIMITS = os.getenv("LLM_MODEL_RATE_LIMITS", "") # "openai/gpt-4o=500:30000,openai/tts-1=50:0"
+    SCHEDULER_WEIGHT_LIVE = float(os.getenv("SCHEDULER_WEIGHT_LIVE", "6"))
+    SCHEDULER_WEIGHT_WEB = float(os.getenv("SCHEDULER_WEIGHT_WEB", "3"))
+    SCHEDULER_WEIGHT_BACKGROUND = float(os.getenv("SCHEDULER_WEIGHT_BACKGROUND", "1"))
+    SCHEDULER_MAX_QUEUE_SECONDS = float(os.getenv("SCHEDULER_MAX_QUEUE_SECONDS", "60"))
+
+    # Sohbet Rate Limit Ayarları
+    CHAT_USER_INTERVAL_SECONDS = float(os.getenv("CHAT_USER_INTERVAL_SECONDS", "30")) # İzleyici başına soru aralığı
+    CHAT_USER_BURST = float(os.getenv("CHAT_USER_BURST", "1"))
+    CHAT_GLOBAL_PER_MINUTE = float(os.getenv("CHAT_GLOBAL_PER_MINUTE", "30")) # 0 = global limit yok
+    CHAT_GLOBAL_BURST = float(os.getenv("CHAT_GLOBAL_BURST", "10"))
+    CHAT_AUTHOR_TTL_SECONDS = float(os.getenv("CHAT_AUTHOR_TTL_SECONDS", "600")) # Sessiz izleyicinin bucket'ı silinir
+
+    # Question Pipeline Ayarları
+    PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "4")) # Aşamalar arası kuyruk boyutu
+    PIPELINE_CLASSIFICATION_WORKERS = int(os.getenv("PIPELINE_CLASSIFICATION_WORKERS", "2"))
+    PIPELINE_GENERATION_WORKERS = int(os.getenv("PIPELINE_GENERATION_WORKERS", "2"))
+    PIPELINE_SYNTHESIS_WORKERS = int(os.getenv("PIPELINE_SYNTHESIS_WORKERS", "2"))
+
+    QUESTION_QUEUE_MAX_DEPTH = int(os.getenv("QUESTION_QUEUE_MAX_DEPTH", "20")) # Dolunca önce chitchat, sonra en eski soru atılır
+    QUESTION_MAX_AGE_SECONDS = float(os.getenv("QUESTION_MAX_AGE_SECONDS", "180")) # Bu süreden eski sorular düşürülür
+    QUESTION_FRESHNESS_WEIGHT = float(os.getenv("QUESTION_FRESHNESS_WEIGHT", "1.0"))
+    QUESTION_FIRST_TIME_BONUS = float(os.getenv("QUESTION_FIRST_TIME_BONUS", "0.5"))
+    QUESTION_DEMAND_BONUS = float(os.getenv("QUESTION_DEMAND_BONUS", "0.3"))
+    DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "true").lower() == "true" # Anlamca aynı soruları birleştir
+    DEDUP_SIMILARITY_THRESHOLD = float(os.getenv("DEDUP_SIMILARITY_THRESHOLD", "0.88"))
+    DEDUP_WINDOW_SECONDS = float(os.getenv("DEDUP_WINDOW_SECONDS", "60"))
+    SPECULATIVE_WORKERS = int(os.getenv("SPECULATIVE_WORKERS", "4")) # Paralel sınıflandırma/retrieval havuzu
+    # Kuyruğa göre cevap uzunluğu: boşta dolu, birikmişken kısa cevaplar
+    ANSWER_BUDGET_ENABLED = os.getenv("ANSWER_BUDGET_ENABLED", "true").lower() == "true"
+    ANSWER_IDLE_SECONDS = float(os.getenv("ANSWER_IDLE_SECONDS", "30")) # Kuyruk boşken hedef konuşma süresi
+    ANSWER_MIN_SECONDS = float(os.getenv("ANSWER_MIN_SECONDS", "8")) # Kuyruk doluyken hedef konuşma süresi
+    ANSWER_BACKLOG_DEPTH = int(os.getenv("ANSWER_BACKLOG_DEPTH", "6")) # Bu derinlikte en kısa cevaba inilir
+    ANSWER_BACKLOG_AGE_SECONDS = float(os.getenv("ANSWER_BACKLOG_AGE_SECONDS", "90")) # ...ya da en eski soru bu yaştaysa
+    TTS_WORDS_PER_SECOND = float(os.getenv("TTS_WORDS_PER_SECOND", "2.3"))
+    TTS_MAX_SPEED = float(os.getenv("TTS_MAX_SPEED", "1.15")) # Kuyruk doluyken TTS hızı en fazla bu kadar artırılır
+    # Soru başına uçtan uca zaman bütçesi (SLO) ve aşamaların ihtiyaç duyduğu minimum süre
+    QUESTION_DEADLINE_SECONDS = float(os.getenv("QUESTION_DEADLINE_SECONDS", "45")) # 0 = sınırsız
+    DEADLINE_MIN_GENERATION_SECONDS = float(os.getenv("DEADLINE_MIN_GENERATION_SECONDS", "8"))
+    DEADLINE_MIN_WEB_SECONDS = float(os.getenv("DEADLINE_MIN_WEB_SECONDS", "20")) # Daha az kaldıysa web fallback atlanır
+    DEADLINE_MIN_TTS_SECONDS = float(os.getenv("DEADLINE_MIN_TTS_SECONDS", "4")) # Daha az kaldıysa sadece metin gösterilir
+    ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "200"))
+    ANSWER_CACHE_TTL_SECONDS = float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "3600"))
+    CLASSIFIER_CACHE_SIZE = int(os.getenv("CLASSIFIER_CACHE_SIZE", "500"))
+    AUDIO_CACHE_SIZE = int(os.getenv("AUDIO_CACHE_SIZE", "100")) # Aynı metin+hız için üretilmiş ses dosyası tekrar kullanılır
+    WEB_MAX_CONCURRENCY = int(os.getenv("WEB_MAX_CONCURRENCY", "4")) # /predict eş zamanlı istek tavanı
+    WEB_RETRY_AFTER_SECONDS = int(os.getenv("WEB_RETRY_AFTER_SECONDS", "5"))
+    WEB_GLOBAL_PER_MINUTE = float(os.getenv("WEB_GLOBAL_PER_MINUTE", "30")) # /predict'in kendi global bütçesi (0 = limit yok)
+    WEB_GLOBAL_BURST = float(os.getenv("WEB_GLOBAL_BURST", "10"))
+
     # Talking Head Entegrasyonu
     TALKING_HEAD_PATH = os.getenv("TALKING_HEAD_PATH", os.path.abspath("talkingmodel"))
     TALKING_HEAD_URL = os.getenv("TALKING_HEAD_URL", "http://localhost:8000")
+    CHROMEDRIVER_PATH = os.getenv("CHROMEDRIVER_PATH", "") # Boşsa webdriver-manager ile kurulur ve yolu saklanır
+    CHROMEDRIVER_CACHE_FILE = os.getenv("CHROMEDRIVER_CACHE_FILE", "qa_app/data/.chromedriver_path")
     
     # YouTube Integration
     YOUTUBE_VIDEO_ID = os.getenv("YOUTUBE_VIDEO_ID", "3iDf6s_QgPU") # Video ID for live stream listening
@@ -37,5 +112,19 @@ class Settings:
 
     # Loglama
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    TRACING_ENABLED = os.getenv("TRACING_ENABLED", "true").lower() == "true" # Sohbet mesajından oynatma sonuna uçtan uca izleme
+    TRACE_LOG_PATH = os.getenv("TRACE_LOG_PATH", "qa_app/data/logs/traces.jsonl")
+    SLOW_QUESTION_THRESHOLD_SECONDS = float(os.getenv("SLOW_QUESTION_THRESHOLD_SECONDS", "20")) # Cevaba (ilk sese) kadar; 0 = kapalı
+    SLOW_LOG_PATH = os.getenv("SLOW_LOG_PATH", "qa_app/data/logs/slow_questions.jsonl")
+
+    LEDGER_ENABLED = os.getenv("LEDGER_ENABLED", "true").lower() == "true" # Soru başına maliyet/gecikme kaydı (SQLite)
+    LEDGER_PATH = os.getenv("LEDGER_PATH", "qa_app/data/logs/ledger.sqlite3")
+
+    # Yönetim / Profil
+    ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "") # Boşsa /admin endpoint'leri kapalı
+    PROFILE_OUTPUT_DIR = os.getenv("PROFILE_OUTPUT_DIR", "qa_app/data/logs/profiles")
+    PROFILE_SIGNAL = os.getenv("PROFILE_SIGNAL", "SIGUSR2") # Yığın dökümü + sampling profili
+    PROFILE_SIGNAL_SECONDS = float(os.getenv("PROFILE_SIGNAL_SECONDS", "30"))
+    PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "600")) # Soru oturumu bu sürede dolmazsa kısmi sonuçla kapanır (0 = sınırsız)
 
 settings = Settings()
\ No newline at end of file
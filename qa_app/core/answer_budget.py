@@ -0,0 +1,130 @@
+import logging
+import re
+import threading
+from collections import deque
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s+")
+
+
+@dataclass
+class AnswerBudget:
+    """Tek bir cevap için konuşma süresi bütçesi."""
+    seconds: float
+    pressure: float
+    words_per_second: float
+    speed: float = 1.0
+
+    @property
+    def max_words(self) -> int:
+        return max(10, int(self.seconds * self.words_per_second))
+
+    @property
+    def max_tokens(self) -> int:
+        # Türkçe'de kelime başına ~2 token; cümle yarıda kesilmesin diye geniş pay bırakılır
+        return self.max_words * 3
+
+    def prompt_rule(self) -> str:
+        return f"Cevap en fazla {self.max_words} kelime olsun (yaklaşık {self.seconds:.0f} saniyelik konuşma)."
+
+    def fit_for_speech(self, text: str) -> str:
+        """
+        Model bütçeyi belirgin şekilde aştıysa seslendirilecek metni tam cümlelerle kısaltır.
+        İlk cümle her zaman korunur.
+        """
+        limit = int(self.max_words * 1.3)
+        if len(text.split()) <= limit:
+            return text
+
+        kept, words = [], 0
+        for sentence in _SENTENCE_END.split(text.strip()):
+            sentence_words = len(sentence.split())
+            if kept and words + sentence_words > limit:
+                break
+            kept.append(sentence)
+            words += sentence_words
+        return " ".join(kept)
+
+
+def complete_sentences(text: str) -> str:
+    """Metnin son tam cümlesine kadar olan kısmını döndürür (yarıda kesilmiş akışlar için)."""
+    match = None
+    for match in re.finditer(r"[.!?…](?=\s|$)", text):
+        pass
+    return text[:match.end()].strip() if match else ""
+
+
+class AnswerLengthPolicy:
+    """
+    Kuyruk durumuna göre cevap uzunluğunu ayarlar.
+
+    Kuyruk boşken idle_seconds'lık dolu cevaplar, kuyruk derinliği backlog_depth'e ya da
+    en eski bekleyen sorunun yaşı backlog_age'e ulaştığında min_seconds'lık kısa cevaplar
+    hedeflenir; arada doğrusal geçiş yapılır. Baskı altındayken TTS hızı da max_speed'e
+    kadar hafifçe artırılır.
+    """
+
+    def __init__(self, idle_seconds: float = 30.0, min_seconds: float = 8.0, backlog_depth: int = 6,
+                 backlog_age: float = 90.0, words_per_second: float = 2.3, max_speed: float = 1.15,
+                 history_size: int = 200):
+        self.idle_seconds = idle_seconds
+        self.min_seconds = min_seconds
+        self.backlog_depth = backlog_depth
+        self.backlog_age = backlog_age
+        self.words_per_second = words_per_second
+        self.max_speed = max_speed
+        self._lock = threading.Lock()
+        self._history = deque(maxlen=history_size)  # (target_seconds, spoken_seconds, pressure)
+        self.stats = {
+            "budgets": 0,
+            "trimmed_for_speech": 0
+        }
+
+    def budget(self, queue_depth: int, oldest_age: float) -> AnswerBudget:
+        """Mevcut kuyruk derinliği ve en eski sorunun yaşından cevap bütçesini hesaplar."""
+        depth_pressure = queue_depth / self.backlog_depth if self.backlog_depth > 0 else 0.0
+        age_pressure = oldest_age / self.backlog_age if self.backlog_age > 0 else 0.0
+        pressure = min(1.0, max(depth_pressure, age_pressure, 0.0))
+
+        seconds = self.idle_seconds - (self.idle_seconds - self.min_seconds) * pressure
+        speed = 1.0 + (self.max_speed - 1.0) * pressure
+        with self._lock:
+            self.stats["budgets"] += 1
+        logger.debug(f"Cevap bütçesi: {seconds:.0f}s (derinlik={queue_depth}, en eski={oldest_age:.0f}s, baskı={pressure:.2f})")
+        return AnswerBudget(seconds=seconds, pressure=pressure, words_per_second=self.words_per_second, speed=speed)
+
+    def record_trim(self):
+        with self._lock:
+            self.stats["trimmed_for_speech"] += 1
+
+    def record_spoken(self, budget: AnswerBudget | None, spoken_seconds: float):
+        """Avatarın bir cevabı gerçekte kaç saniye konuştuğunu kaydeder."""
+        with self._lock:
+            self._history.append((budget.seconds if budget else None, spoken_seconds, budget.pressure if budget else 0.0))
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            history = list(self._history)
+            stats = dict(self.stats)
+
+        spoken = [entry[1] for entry in history]
+        pressured = [entry[1] for entry in history if entry[2] >= 0.5]
+        relaxed = [entry[1] for entry in history if entry[2] < 0.5]
+        over_budget = sum(1 for target, actual, _ in history if target is not None and actual > target * 1.2)
+
+        def _avg(values):
+            return sum(values) / len(values) if values else 0.0
+
+        return {
+            **stats,
+            "answers_spoken": len(history),
+            "avg_spoken_seconds": _avg(spoken),
+            "max_spoken_seconds": max(spoken, default=0.0),
+            "avg_spoken_seconds_under_backlog": _avg(pressured),
+            "avg_spoken_seconds_idle": _avg(relaxed),
+            "over_budget": over_budget,
+            "idle_seconds": self.idle_seconds,
+            "min_seconds": self.min_seconds
+        }
@@ -0,0 +1,13 @@
+from qa_app.core.cache import InstrumentedCache
+
+
+class AnswerCache(InstrumentedCache):
+    """
+    Son üretilen cevapların TTL'li LRU önbelleği.
+
+    Deadline yaklaşırken yeni cevap üretmeye vakit kalmadığında aynı (ya da aynı kümedeki)
+    sorunun daha önce verilmiş cevabı buradan kullanılır.
+    """
+
+    def __init__(self, max_size: int = 200, ttl: float = 3600.0):
+        super().__init__("answer", max_size=max_size, ttl=ttl)
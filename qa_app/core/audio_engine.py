@@ -1,25 +1,36 @@
-import openai
+import logging
 from qa_app.config import settings
+from qa_app.core.llm_scheduler import llm_scheduler
+from qa_app.core.deadline import current_deadline
+from qa_app.core.metrics import STAGE_LATENCY, ERRORS
+from qa_app.core.tracing import span
+from qa_app.core.ledger import record_call
+import os
+import time
+
+logger = logging.getLogger(__name__)
 
 class TTSEngine:
     def __init__(self):
         self.openai_client = None
         if settings.TTS_PROVIDER == "openai" and settings.OPENAI_API_KEY:
             try:
+                import openai
                 self.openai_client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
-                print(f"TTS Motoru başlatılıyor (Model: {settings.TTS_MODEL}, Ses: {settings.TTS_VOICE})")
+                logger.info(f"TTS Motoru başlatılıyor (Model: {settings.TTS_MODEL}, Ses: {settings.TTS_VOICE})")
             except Exception as e:
-                print(f"TTS Client başlatma hatası: {e}")
+                logger.error(f"TTS Client başlatma hatası: {e}")
 
     def generate_audio_stream(self, text: str):
         """
         OpenAI API kullanarak metni ses akışına (stream) dönüştürür.
         """
         if not self.openai_client:
-            print("HATA: TTS Engine başlatılamadı veya API Key eksik.")
+            logger.error("TTS Engine başlatılamadı veya API Key eksik.")
             return None
 
         try:
+            llm_scheduler.acquire("openai", settings.TTS_MODEL)
             response = self.openai_client.audio.speech.create(
                 model=settings.TTS_MODEL,
                 voice=settings.TTS_VOICE,
@@ -28,24 +39,39 @@ class TTSEngine:
             # Stream the raw bytes directly
             return response.iter_bytes()
         except Exception as e:
-            print(f"Ses üretme hatası: {e}")
+            logger.error(f"Ses üretme hatası: {e}")
+            ERRORS.inc(component="tts")
             return None
 
-    def save_to_file(self, text: str, file_path: str):
+    def save_to_file(self, text: str, file_path: str, speed: float = 1.0):
         """
         Metinden ses üretir ve belirtilen dosyaya kaydeder.
+        speed: Konuşma hızı (OpenAI TTS 0.25-4.0 arası kabul eder; kuyruk doluyken hafifçe artırılır)
         """
         if not self.openai_client:
             return False
 
         try:
-            response = self.openai_client.audio.speech.create(
-                model=settings.TTS_MODEL,
-                voice=settings.TTS_VOICE,
-                input=text
-            )
-            response.stream_to_file(file_path)
+            llm_scheduler.acquire("openai", settings.TTS_MODEL)
+            # Sorunun deadline'ı varsa TTS isteği kalan süreyle sınırlanır
+            deadline = current_deadline()
+            extra = {"timeout": deadline.timeout()} if deadline and deadline.expires_at else {}
+            start = time.perf_counter()
+            with STAGE_LATENCY.time(stage="tts"), span("tts", chars=len(text), speed=speed) as tts_span:
+                response = self.openai_client.audio.speech.create(
+                    model=settings.TTS_MODEL,
+                    voice=settings.TTS_VOICE,
+                    input=text,
+                    speed=speed,
+                    **extra
+                )
+                response.stream_to_file(file_path)
+                if tts_span:
+                    tts_span.set(bytes=os.path.getsize(file_path))
+            # TTS karakter başına faturalanır
+            record_call("tts", "openai", settings.TTS_MODEL, characters=len(text), seconds=time.perf_counter() - start)
             return True
         except Exception as e:
-            print(f"Ses kaydetme hatası: {e}")
+            logger.error(f"Ses kaydetme hatası: {e}")
+            ERRORS.inc(component="tts")
             return False
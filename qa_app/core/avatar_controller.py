@@ -1,16 +1,51 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
+import os
 import time
 from qa_app.config import settings
 import logging
+from qa_app.core.tracing import span, trace_event
 
 logger = logging.getLogger(__name__)
 
+
+def chromedriver_path() -> str:
+    """
+    Chromedriver yolunu döndürür. ChromeDriverManager().install() ağa çıkabildiği için
+    sonuç bir dosyada saklanır; dosyadaki yol hâlâ geçerliyse tekrar kurulum yapılmaz.
+    CHROMEDRIVER_PATH verilmişse doğrudan o kullanılır.
+    """
+    if settings.CHROMEDRIVER_PATH:
+        return settings.CHROMEDRIVER_PATH
+
+    cache_file = settings.CHROMEDRIVER_CACHE_FILE
+    try:
+        with open(cache_file, "r", encoding="utf-8") as f:
+            cached = f.read().strip()
+        if cached and os.path.exists(cached):
+            return cached
+    except OSError:
+        pass
+
+    from webdriver_manager.chrome import ChromeDriverManager
+    path = ChromeDriverManager().install()
+    try:
+        directory = os.path.dirname(cache_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(cache_file, "w", encoding="utf-8") as f:
+            f.write(path)
+    except OSError as e:
+        logger.warning(f"Chromedriver yolu saklanamadı ({cache_file}): {e}")
+    return path
+
+
 class AvatarController:
     def __init__(self):
         self.driver = None
         try:
+            # Selenium sadece avatar oluşturulurken yüklenir (avatar lazy başlatılır)
+            from selenium import webdriver
+            from selenium.webdriver.chrome.service import Service
+
             options = webdriver.ChromeOptions()
             # OBS Yayını için "App Mode" ve temiz ekran ayarları
             options.add_argument(f"--app={settings.TALKING_HEAD_URL}")
@@ -18,7 +53,7 @@ class AvatarController:
             options.add_experimental_option("excludeSwitches", ["enable-automation"])
             options.add_experimental_option('useAutomationExtension', False)
             
-            self.service = Service(ChromeDriverManager().install())
+            self.service = Service(chromedriver_path())
             self.driver = webdriver.Chrome(service=self.service, options=options)
             self._connect()
         except Exception as e:
@@ -29,7 +64,7 @@ class AvatarController:
             try:
                 logger.info(f"Avatar sayfasına bağlanılıyor: {settings.TALKING_HEAD_URL}")
                 self.driver.get(settings.TALKING_HEAD_URL)
-                time.sleep(2) # Sayfanın yüklenmesi için bekle
+                self._wait_for_page()
             except Exception as e:
                 logger.error(f"Avatar sayfasına bağlanılamadı: {e}")
 
@@ -42,49 +77,103 @@ class AvatarController:
             except Exception as e:
                 logger.warning(f"Sayfa temizlenirken hata oluştu: {e}")
 
-    def speak(self, question: str, answer: str, audio_filename: str):
+    def _wait_for_page(self, timeout: float = 10.0):
+        """Sabit bekleme yerine sayfanın JS fonksiyonları tanımlanana kadar bekler."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                if self.driver.execute_script(
+                    "return document.readyState === 'complete' && typeof window.addQA === 'function'"
+                ):
+                    return
+            except Exception:
+                pass
+            time.sleep(0.1)
+        logger.warning(f"Avatar sayfası {timeout:.0f}s içinde hazır olmadı, devam ediliyor.")
+
+    def speak(self, question: str, answer: str, audio_filename: str, preempt=None) -> bool:
         """
         Tarayıcıya JS komutları göndererek avatarı konuşturur.
+
+        preempt: Opsiyonel callable; oynatma sırasında True dönerse ses kısılarak
+        (fade-out) kesilir. Filler gibi boşluk doldurucu içerikler için kullanılır.
+
+        Returns:
+            Ses sonuna kadar çaldıysa True, preempt ile kesildiyse False.
         """
         if not self.driver:
             logger.warning("Avatar driver aktif değil, komut gönderilemedi.")
-            return
+            return True
 
         try:
             # 1. Sesi çal
             logger.info(f"Avatar ses dosyası oynatılıyor: {audio_filename}")
-            self.driver.execute_script(f'window.playTalkingHeadAudio("{audio_filename}")')
+            with span("avatar.play"):
+                self.driver.execute_script(f'window.playTalkingHeadAudio("{audio_filename}")')
+            trace_event("first_audio")
             
             # 2. Chat balonunu ekle
             logger.info("Avatar chat güncelleniyor...")
             # JS tarafında tırnak işaretlerini kaçırmak için basit bir temizleme
             safe_q = question.replace('"', '\\"').replace('\n', ' ')
             safe_a = answer.replace('"', '\\"').replace('\n', ' ')
-            self.driver.execute_script(f'window.addQA("{safe_q}", "{safe_a}")')
+            with span("avatar.show_text"):
+                self.driver.execute_script(f'window.addQA("{safe_q}", "{safe_a}")')
             
             # 3. Ses bitene kadar bekle (Blocking)
-            self.wait_for_audio_finish()
+            return self.wait_for_audio_finish(preempt)
             
         except Exception as e:
             logger.error(f"Avatar kontrol hatası: {e}")
             # Bağlantı koptuysa tekrar denenebilir ama şimdilik logla yetinelim
+            return True
 
-    def wait_for_audio_finish(self):
+    def wait_for_audio_finish(self, preempt=None) -> bool:
         """
         Avatarın konuşması bitene kadar bloklar.
+        preempt() True dönerse sesi fade-out ile keser ve False döner.
         """
         if not self.driver:
-            return
+            return True
+
+        with span("avatar.wait_for_audio_finish") as wait_span:
+            completed = self._poll_audio(preempt)
+            if wait_span:
+                wait_span.set(completed=completed)
+        return completed
 
+    def _poll_audio(self, preempt=None) -> bool:
         try:
-            # Polling loop
+            # Polling loop (kesilebilir oynatmada daha sık kontrol edilir)
+            poll_interval = 0.2 if preempt else 0.5
             while True:
                 is_playing = self.driver.execute_script("return window.isAvatarPlaying ? window.isAvatarPlaying() : false")
                 if not is_playing:
                     break
-                time.sleep(0.5)
+                if preempt and preempt():
+                    logger.info("Oynatma kesiliyor (preempt): hazır bekleyen bir cevap var.")
+                    self.stop_audio()
+                    return False
+                time.sleep(poll_interval)
         except Exception as e:
             logger.warning(f"Audio wait polling error: {e}")
+        return True
+
+    def stop_audio(self, fade_ms: int = 400):
+        """
+        Çalan sesi fade-out ile durdurur ve fade bitene kadar bekler; böylece sıradaki
+        ses önceki sesi aniden kesmez.
+        """
+        if not self.driver:
+            return
+
+        try:
+            self.driver.execute_script(
+                "if (window.fadeOutTalkingHeadAudio) { window.fadeOutTalkingHeadAudio(arguments[0]); }", fade_ms
+            )
+            time.sleep(fade_ms / 1000.0)
+        except Exception as e:
+            logger.warning(f"Ses durdurulamadı: {e}")
             
     def add_qa_text(self, question: str, answer: str):
         """
@@ -99,6 +188,7 @@ class AvatarController:
             safe_q = question.replace('"', '\\"').replace('\n', ' ')
             safe_a = answer.replace('"', '\\"').replace('\n', ' ')
             self.driver.execute_script(f'window.addQA("{safe_q}", "{safe_a}")')
+            trace_event("first_text")
             
             # Give users time to read text-only responses (since no audio blocks)
             time.sleep(3)
@@ -0,0 +1,181 @@
+import threading
+import time
+from collections import OrderedDict
+from qa_app.core.metrics import CACHE_REQUESTS, CACHE_EVICTIONS
+
+
+class CacheRegistry:
+    """Süreçteki tüm önbellekleri isimleriyle tutar; /api/stats tek yerden raporlar."""
+
+    def __init__(self):
+        self._caches = {}
+        self._lock = threading.Lock()
+
+    def register(self, cache: "InstrumentedCache"):
+        with self._lock:
+            self._caches[cache.name] = cache
+
+    def get(self, name: str):
+        return self._caches.get(name)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            caches = list(self._caches.values())
+        return {cache.name: cache.get_stats() for cache in caches}
+
+
+cache_registry = CacheRegistry()
+
+
+class InstrumentedCache:
+    """
+    Ölçümlü, thread-safe TTL'li LRU önbellek.
+
+    hit/miss/eviction sayaçlarının yanında hit'lerin arama süresini ve kaçırılan değerlerin
+    üretim maliyetini (put(..., cost=saniye)) tutar. Tahmini kazanılan süre:
+    hit sayısı x ortalama üretim maliyeti - hit'lerde harcanan arama süresi.
+    Boyut ve TTL ayarları bu sayılara bakılarak yapılmalıdır.
+    """
+
+    def __init__(self, name: str, max_size: int = 100, ttl: float | None = None, register: bool = True):
+        self.name = name
+        self.max_size = max_size
+        self.ttl = ttl  # None = süresiz
+        self._entries = OrderedDict()  # key -> (value, stored_at)
+        self._lock = threading.Lock()
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+            "expirations": 0
+        }
+        self._hit_seconds = 0.0   # Hit'lerde harcanan toplam arama süresi
+        self._cost_seconds = 0.0  # Ölçülen üretim maliyetlerinin toplamı
+        self._cost_samples = 0
+        if register:
+            cache_registry.register(self)
+
+    def _record_lookup(self, hit: bool, started: float):
+        # Kilit altında çağrılır
+        if hit:
+            self.stats["hits"] += 1
+            self._hit_seconds += time.perf_counter() - started
+        else:
+            self.stats["misses"] += 1
+        CACHE_REQUESTS.inc(cache=self.name, result="hit" if hit else "miss")
+
+    def _record_store(self, cost: float | None):
+        # Kilit altında çağrılır
+        self.stats["stores"] += 1
+        if cost is not None:
+            self._cost_seconds += cost
+            self._cost_samples += 1
+
+    def _record_eviction(self):
+        self.stats["evictions"] += 1
+        CACHE_EVICTIONS.inc(cache=self.name)
+
+    def get(self, key, default=None):
+        started = time.perf_counter()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and time.time() - entry[1] > self.ttl:
+                del self._entries[key]
+                self.stats["expirations"] += 1
+                entry = None
+            if entry is None:
+                self._record_lookup(False, started)
+                return default
+            self._entries.move_to_end(key)
+            self._record_lookup(True, started)
+            return entry[0]
+
+    def put(self, key, value, cost: float | None = None):
+        """Değeri saklar. cost: değeri üretmenin (hit'te kazanılacak) süresi, saniye."""
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (value, time.time())
+            self._record_store(cost)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._record_eviction()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            hits, misses = self.stats["hits"], self.stats["misses"]
+            avg_cost = self._cost_seconds / self._cost_samples if self._cost_samples else None
+            return {
+                **self.stats,
+                "hit_rate": round(hits / (hits + misses), 4) if hits + misses else None,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+                "avg_hit_latency_ms": round(self._hit_seconds / hits * 1000, 3) if hits else None,
+                "avg_miss_cost_ms": round(avg_cost * 1000, 1) if avg_cost is not None else None,
+                "estimated_time_saved_seconds": round(hits * avg_cost - self._hit_seconds, 2) if avg_cost is not None else None
+            }
+
+
+class SemanticCache(InstrumentedCache):
+    """
+    Anahtar yerine vektör benzerliğiyle eşleşen önbellek (ör. aynı sorunun farklı yazımı).
+
+    score_fn(query, keys) -> benzerlik listesi; torch gibi ağır bağımlılıklar çağırandan gelir.
+    scope aynı olmayan kayıtlar eşleşmez (ör. farklı top_k).
+    """
+
+    def __init__(self, name: str, score_fn, threshold: float, max_size: int = 100, ttl: float | None = None):
+        super().__init__(name, max_size=max_size, ttl=ttl)
+        self.score_fn = score_fn
+        self.threshold = threshold
+        self._scored = 0  # En yakın kaydın benzerliği (eşik ayarı için ortalaması raporlanır)
+        self._score_sum = 0.0
+
+    def get(self, embedding, default=None, scope=None):
+        started = time.perf_counter()
+        with self._lock:
+            now = time.time()
+            if self.ttl is not None:
+                for key in [key for key, (_, stored_at) in self._entries.items() if now - stored_at > self.ttl]:
+                    del self._entries[key]
+                    self.stats["expirations"] += 1
+            candidates = [(key, value) for key, (value, _) in self._entries.items() if value[1] == scope]
+            if not candidates:
+                self._record_lookup(False, started)
+                return default
+            scores = self.score_fn(embedding, [value[0] for _, value in candidates])
+            best = max(range(len(candidates)), key=lambda i: float(scores[i]))
+            best_score = float(scores[best])
+            self._scored += 1
+            self._score_sum += best_score
+            if best_score < self.threshold:
+                self._record_lookup(False, started)
+                return default
+            key, value = candidates[best]
+            self._entries.move_to_end(key)
+            self._record_lookup(True, started)
+            return value[2]
+
+    def put(self, embedding, value, cost: float | None = None, scope=None):
+        # Vektörler hashlenemediği için kayıt sırası anahtar olarak kullanılır
+        with self._lock:
+            key = self.stats["stores"]
+            self._entries[key] = ((embedding, scope, value), time.time())
+            self._record_store(cost)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._record_eviction()
+
+    def get_stats(self) -> dict:
+        stats = super().get_stats()
+        stats["threshold"] = self.threshold
+        stats["avg_best_similarity"] = round(self._score_sum / self._scored, 4) if self._scored else None
+        return stats
@@ -1,8 +1,18 @@
 
 import logging
-import requests
 import json
+import time
 from qa_app.config import settings
+from qa_app.core.llm_scheduler import llm_scheduler, estimate_tokens
+from qa_app.core.ollama_manager import ollama_manager
+from qa_app.core.metrics import STAGE_LATENCY, ERRORS
+from qa_app.core.tracing import span
+from qa_app.core.ledger import record_call
+from qa_app.core.cache import InstrumentedCache
+from qa_app.core.deadline import current_deadline
+from qa_app.core.router import normalize_text
+
+SYSTEM_PROMPT = "You are a helpful assistant."
 
 logger = logging.getLogger(__name__)
 
@@ -17,14 +27,22 @@ class ChitchatClassifier:
         if self.provider == "openai":
             from openai import OpenAI
             self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        elif self.provider == "ollama":
+            ollama_manager.register_prefix(self.model, SYSTEM_PROMPT)
+
+        # Aynı mesaj (tekrarlanan sorular, filler, spam) için LLM'e tekrar gidilmez
+        self.cache = InstrumentedCache("classification", max_size=settings.CLASSIFIER_CACHE_SIZE)
         
         logger.info(f"ChitchatClassifier initialized with provider: {self.provider}, model: {self.model}")
 
-    def is_chitchat(self, text: str) -> bool:
+    def is_chitchat(self, text: str, normalized: str = None) -> bool:
         """
         Determines if the given text is chitchat (small talk, greetings, etc.) 
         or a specific knowledge query (requiring RAG).
         
+        Args:
+            normalized: normalize_text(text) (QuestionContext.normalized); cache anahtarı olarak kullanılır
+
         Returns:
             True if chitchat
             False if knowledge query
@@ -38,51 +56,89 @@ class ChitchatClassifier:
             Reply ONLY with "YES" if it is chitchat, or "NO" if it is a knowledge query. Do not add any punctuation.
             """
             
+            key = normalized if normalized is not None else normalize_text(text)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+            deadline = current_deadline()
+            if deadline is not None and deadline.expired():
+                # Sorunun bütçesi bitti; stage_classify sonucu zaten beklemiyor
+                return False
+
+            start = time.perf_counter()
             if self.provider == "openai":
-                return self._check_openai(prompt)
+                with STAGE_LATENCY.time(stage="chitchat_classify"), span("chitchat_classify", provider=self.provider):
+                    result = self._check_openai(prompt)
             elif self.provider == "ollama":
-                return self._check_ollama(prompt)
+                with STAGE_LATENCY.time(stage="chitchat_classify"), span("chitchat_classify", provider=self.provider):
+                    result = self._check_ollama(prompt)
             else:
                 logger.warning(f"Unknown provider '{self.provider}', defaulting to False (Knowledge Query)")
                 return False
+
+            if result is None:
+                # Hata: fail-safe cevap önbelleğe alınmaz
+                return False
+            self.cache.put(key, result, cost=time.perf_counter() - start)
+            return result
                 
         except Exception as e:
             logger.error(f"Error in chitchat classification: {e}")
             # Fail-safe: Assume it's a query not chitchat so we don't miss important questions
             return False
 
-    def _check_openai(self, prompt: str) -> bool:
+    def _check_openai(self, prompt: str) -> bool | None:
         try:
+            llm_scheduler.acquire("openai", self.model, tokens=estimate_tokens(prompt) + 5)
+            # Çağrı sorunun deadline'ını aşarsa spekülatif havuz thread'i de serbest kalır
+            deadline = current_deadline()
+            extra = {"timeout": deadline.timeout()} if deadline and deadline.expires_at else {}
+            start = time.perf_counter()
             response = self.client.chat.completions.create(
                 model=self.model,
                 messages=[
-                    {"role": "system", "content": "You are a helpful assistant."},
+                    {"role": "system", "content": SYSTEM_PROMPT},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.0,
-                max_tokens=5
+                max_tokens=5,
+                **extra
+            )
+            usage = getattr(response, "usage", None)
+            record_call(
+                "classifier", "openai", self.model,
+                prompt_tokens=getattr(usage, "prompt_tokens", 0),
+                completion_tokens=getattr(usage, "completion_tokens", 0),
+                seconds=time.perf_counter() - start
             )
             answer = response.choices[0].message.content.strip().upper()
             logger.debug(f"OpenAI Chitchat Check: {answer}")
             return "YES" in answer
         except Exception as e:
             logger.error(f"OpenAI check failed: {e}")
-            return False
+            ERRORS.inc(component="chitchat_classifier")
+            return None
 
-    def _check_ollama(self, prompt: str) -> bool:
+    def _check_ollama(self, prompt: str) -> bool | None:
         try:
-            url = f"{settings.OLLAMA_URL}/api/generate"
-            payload = {
-                "model": self.model,
-                "prompt": prompt,
-                "stream": False
-            }
-            response = requests.post(url, json=payload)
-            response.raise_for_status()
-            data = response.json()
-            answer = data.get("response", "").strip().upper()
+            llm_scheduler.acquire("ollama", self.model, tokens=estimate_tokens(prompt) + 5)
+            # Hem Ollama slot beklemesi hem HTTP isteği sorunun deadline'ı ile sınırlanır
+            deadline = current_deadline()
+            timeout = deadline.timeout(settings.OLLAMA_TIMEOUT_SECONDS) if deadline else settings.OLLAMA_TIMEOUT_SECONDS
+            answer = ollama_manager.chat_once(
+                self.model,
+                [
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt}
+                ],
+                options={"temperature": 0.0, "num_predict": 5},
+                timeout=timeout,
+                purpose="classifier"
+            ).strip().upper()
             logger.debug(f"Ollama Chitchat Check: {answer}")
             return "YES" in answer
         except Exception as e:
             logger.error(f"Ollama check failed: {e}")
-            return False
+            ERRORS.inc(component="chitchat_classifier")
+            return None
@@ -0,0 +1,74 @@
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+logger = logging.getLogger(__name__)
+
+# Aktif sorunun deadline'ı; provider çağrıları (LLM, TTS, scheduler) zaman aşımlarını buradan okur.
+# Spekülatif işler ve hedge thread'leri context'i kopyaladığı için deadline onlara da taşınır.
+_current_deadline = ContextVar("question_deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """Sorunun uçtan uca zaman bütçesi doldu."""
+
+
+class Deadline:
+    """
+    Bir soru için uçtan uca zaman bütçesi.
+
+    Intake'te oluşturulur ve tüm aşamalardan geçirilir. Aşamalar kalan süreye bakıp
+    kendilerini kısaltır (web fallback'i atla, önbellekteki/yarım cevabı kullan,
+    sesi atlayıp sadece metin göster). seconds None ise bütçe sınırsızdır.
+    """
+
+    def __init__(self, seconds: float = None):
+        self.seconds = seconds
+        self.started_at = time.monotonic()
+        self.expires_at = self.started_at + seconds if seconds else None
+        self.degradations = []
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    def remaining(self) -> float:
+        if self.expires_at is None:
+            return float("inf")
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def has(self, seconds: float) -> bool:
+        """En az `seconds` saniye bütçe kaldı mı?"""
+        return self.remaining() >= seconds
+
+    def timeout(self, cap: float = None) -> float | None:
+        """Ağ çağrılarına verilecek zaman aşımı: kalan süre (cap ile sınırlanmış)."""
+        if self.expires_at is None:
+            return cap
+        remaining = self.remaining()
+        return min(remaining, cap) if cap is not None else remaining
+
+    def check(self, stage: str):
+        if self.expired():
+            raise DeadlineExceeded(f"'{stage}' aşamasında {self.seconds:.0f}s bütçe doldu")
+
+    def degrade(self, action: str):
+        """Bütçe yüzünden yapılan bir kısaltmayı kaydeder."""
+        self.degradations.append(action)
+        logger.warning(f"Deadline: {action} ({self.elapsed():.1f}s geçti, {self.remaining():.1f}s kaldı)")
+
+    @contextmanager
+    def activate(self):
+        """Bu blok içindeki provider çağrıları bu deadline'a uyar."""
+        token = _current_deadline.set(self)
+        try:
+            yield self
+        finally:
+            _current_deadline.reset(token)
+
+
+def current_deadline() -> Deadline | None:
+    return _current_deadline.get()
@@ -0,0 +1,211 @@
+import contextvars
+import logging
+import queue
+import threading
+import time
+from qa_app.core.deadline import current_deadline
+from qa_app.core.metrics import FALLBACKS
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """
+    Provider başına basit devre kesici.
+
+    closed    -> istekler serbest
+    open      -> art arda `failure_threshold` hatadan sonra istekler `reset_timeout` boyunca atlanır
+    half_open -> süre dolunca tek bir deneme isteğine izin verilir; başarılıysa devre kapanır
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._trial_in_progress = False
+        self._trial_started_at = 0.0
+        self._lock = threading.Lock()
+        self.stats = {"successes": 0, "failures": 0, "rejected": 0, "opened": 0}
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = "half_open"
+                self._trial_in_progress = False
+            # Deneme isteği sonuçlanmadan iptal edilirse (ör. hedge'i kaybederse) süre dolunca yenisine izin verilir
+            trial_expired = time.monotonic() - self._trial_started_at >= self.reset_timeout
+            if self.state == "half_open" and (not self._trial_in_progress or trial_expired):
+                self._trial_in_progress = True
+                self._trial_started_at = time.monotonic()
+                return True
+            self.stats["rejected"] += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.stats["successes"] += 1
+            self.consecutive_failures = 0
+            self._trial_in_progress = False
+            if self.state != "closed":
+                logger.info(f"Circuit breaker '{self.name}' tekrar kapandı.")
+            self.state = "closed"
+
+    def record_failure(self):
+        with self._lock:
+            self.stats["failures"] += 1
+            self.consecutive_failures += 1
+            self._trial_in_progress = False
+            if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+                if self.state != "open":
+                    self.stats["opened"] += 1
+                    logger.warning(f"Circuit breaker '{self.name}' açıldı ({self.consecutive_failures} ardışık hata).")
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {**self.stats, "state": self.state, "consecutive_failures": self.consecutive_failures}
+
+
+class _Attempt:
+    def __init__(self, name: str, factory, breaker: CircuitBreaker | None):
+        self.name = name
+        self.factory = factory
+        self.breaker = breaker
+        self.cancelled = threading.Event()
+        self.started_at = None
+
+    def run(self, events: queue.Queue):
+        stream = None
+        try:
+            stream = self.factory()
+            for chunk in stream:
+                if self.cancelled.is_set():
+                    break
+                events.put(("chunk", self, chunk))
+            else:
+                events.put(("done", self, None))
+        except Exception as e:
+            events.put(("error", self, e))
+        finally:
+            if stream is not None and hasattr(stream, "close"):
+                stream.close()
+
+
+def hedged_stream(attempts: list, hedge_after: float, stats: dict = None, report: dict = None):
+    """
+    İlk deneme `hedge_after` saniye içinde ilk parçayı üretmezse sıradaki denemeyi paralel başlatır;
+    ilk parçayı hangisi önce üretirse onun akışı kullanılır, diğerleri iptal edilir.
+
+    Args:
+        attempts: [(name, factory, breaker), ...] - factory() bir metin parçası generator'ı döndürür
+        hedge_after: Hedge isteğinin başlatılacağı ilk-token süresi (saniye)
+        stats: Opsiyonel sayaç sözlüğü ("hedged", "won:<name>")
+        report: Opsiyonel, bu çağrıya özel sonuç sözlüğü ("provider", "hedged", "failed")
+
+    Aktif bir soru deadline'ı varsa bekleme onunla sınırlanır; dolarsa tüm denemeler iptal
+    edilip DeadlineExceeded fırlatılır.
+    """
+    deadline = current_deadline()
+    pending = [_Attempt(*attempt) for attempt in attempts]
+    running = []
+    events = queue.Queue()
+    winner = None
+    last_error = None
+
+    def start_next():
+        attempt = pending.pop(0)
+        attempt.started_at = time.monotonic()
+        # Scheduler şeridi gibi context değişkenleri yeni thread'e taşınır
+        context = contextvars.copy_context()
+        threading.Thread(target=context.run, args=(attempt.run, events), daemon=True).start()
+        running.append(attempt)
+
+    def wait_event(timeout: float = None):
+        if deadline is not None:
+            deadline.check("generation")
+            timeout = deadline.timeout(timeout)
+        try:
+            return events.get(timeout=timeout)
+        except queue.Empty:
+            if deadline is not None:
+                deadline.check("generation")
+            raise
+
+    start_next()
+    try:
+        while winner is None:
+            timeout = None
+            if pending:
+                timeout = max(0.0, running[-1].started_at + hedge_after - time.monotonic())
+            try:
+                kind, attempt, payload = wait_event(timeout)
+            except queue.Empty:
+                if not pending:
+                    continue # Deadline beklemesi doldu ama saat henüz geçmedi
+                logger.warning(f"İlk token {hedge_after:.1f}s içinde gelmedi, hedge isteği başlatılıyor: {pending[0].name}")
+                if stats is not None:
+                    stats["hedged"] = stats.get("hedged", 0) + 1
+                FALLBACKS.inc(kind="llm_hedge")
+                if report is not None:
+                    report["hedged"] = True
+                start_next()
+                continue
+
+            if kind == "error":
+                last_error = payload
+                running.remove(attempt)
+                if attempt.breaker:
+                    attempt.breaker.record_failure()
+                logger.warning(f"'{attempt.name}' denemesi başarısız: {payload}")
+                if report is not None:
+                    report.setdefault("failed", []).append(attempt.name)
+                if pending:
+                    FALLBACKS.inc(kind="llm_failover")
+                    start_next()
+                elif not running:
+                    raise last_error
+                continue
+
+            winner = attempt
+            if stats is not None:
+                key = f"won:{attempt.name}"
+                stats[key] = stats.get(key, 0) + 1
+            if report is not None:
+                report["provider"] = attempt.name
+            for other in running:
+                if other is not winner:
+                    other.cancelled.set()
+
+            if kind == "chunk":
+                yield payload
+            else:
+                if winner.breaker:
+                    winner.breaker.record_success()
+                return
+
+        while True:
+            try:
+                kind, attempt, payload = wait_event()
+            except queue.Empty:
+                continue
+            if attempt is not winner:
+                continue
+            if kind == "chunk":
+                yield payload
+            elif kind == "done":
+                if winner.breaker:
+                    winner.breaker.record_success()
+                return
+            else:
+                if winner.breaker:
+                    winner.breaker.record_failure()
+                raise payload
+    finally:
+        for attempt in running:
+            attempt.cancelled.set()
@@ -0,0 +1,160 @@
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from qa_app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Aktif sorunun ücretli provider çağrıları bu listeye eklenir (deadline/trace gibi context ile taşınır)
+_current_calls = ContextVar("question_provider_calls", default=None)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS questions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    source TEXT,
+    trace_id TEXT,
+    question TEXT,
+    normalized TEXT,
+    route TEXT,
+    status TEXT,
+    latency_seconds REAL,
+    audio_seconds REAL,
+    answer_chars INTEGER,
+    degradations TEXT
+);
+CREATE TABLE IF NOT EXISTS provider_calls (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    question_id INTEGER NOT NULL REFERENCES questions(id),
+    kind TEXT,
+    provider TEXT,
+    model TEXT,
+    prompt_tokens INTEGER,
+    completion_tokens INTEGER,
+    characters INTEGER,
+    seconds REAL,
+    status TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_questions_ts ON questions(ts);
+CREATE INDEX IF NOT EXISTS idx_questions_normalized ON questions(normalized);
+CREATE INDEX IF NOT EXISTS idx_provider_calls_question ON provider_calls(question_id);
+"""
+
+
+@contextmanager
+def collect_calls(calls: list | None):
+    """Bu blok içindeki provider çağrıları `calls` listesine kaydedilir (None ise kayıt yapılmaz)."""
+    token = _current_calls.set(calls)
+    try:
+        yield calls
+    finally:
+        _current_calls.reset(token)
+
+
+def record_call(kind: str, provider: str, model: str, prompt_tokens: int = 0, completion_tokens: int = 0,
+                characters: int = 0, seconds: float = 0.0, status: str = "ok"):
+    """Aktif soru varsa ücretli bir provider çağrısını kaydeder; yoksa (ısıtma, script) no-op."""
+    calls = _current_calls.get()
+    if calls is None:
+        return
+    calls.append({
+        "kind": kind,
+        "provider": provider,
+        "model": model,
+        "prompt_tokens": int(prompt_tokens or 0),
+        "completion_tokens": int(completion_tokens or 0),
+        "characters": int(characters or 0),
+        "seconds": round(seconds, 4),
+        "status": status
+    })
+
+
+class QuestionLedger:
+    """
+    İşlenen her sorunun rotasını, provider çağrılarını (token/süre) ve üretilen ses süresini
+    yerel bir SQLite dosyasına yazar. Yazma arka plan thread'inde yapılır; soru akışı sadece
+    kuyruğa ekler. Rapor: qa_app/scripts/ledger_report.py
+    """
+
+    def __init__(self, path: str, enabled: bool = True, max_pending: int = 1000):
+        self.path = path
+        self.enabled = enabled
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = None
+        self._lock = threading.Lock()
+        self.stats = {
+            "recorded": 0,
+            "dropped": 0,
+            "write_errors": 0
+        }
+
+    @classmethod
+    def from_settings(cls) -> "QuestionLedger":
+        return cls(settings.LEDGER_PATH, enabled=settings.LEDGER_ENABLED)
+
+    def _ensure_writer(self):
+        # Thread ilk kayıtta başlatılır (gunicorn preload'da master yerine worker'da)
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._writer, name="ledger-writer", daemon=True)
+                self._thread.start()
+
+    def record(self, row: dict, calls: list):
+        if not self.enabled:
+            return
+        self._ensure_writer()
+        try:
+            self._queue.put_nowait((row, list(calls)))
+        except queue.Full:
+            self.stats["dropped"] += 1
+
+    def _connect(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(self.path)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.executescript(SCHEMA)
+        return connection
+
+    def _writer(self):
+        try:
+            connection = self._connect()
+        except Exception as e:
+            logger.error(f"Ledger açılamadı ({self.path}): {e}")
+            self.enabled = False
+            return
+
+        while True:
+            row, calls = self._queue.get()
+            try:
+                with connection:
+                    cursor = connection.execute(
+                        "INSERT INTO questions (ts, source, trace_id, question, normalized, route, status, "
+                        "latency_seconds, audio_seconds, answer_chars, degradations) "
+                        "VALUES (:ts, :source, :trace_id, :question, :normalized, :route, :status, "
+                        ":latency_seconds, :audio_seconds, :answer_chars, :degradations)",
+                        {**row, "degradations": json.dumps(row.get("degradations") or [], ensure_ascii=False)}
+                    )
+                    question_id = cursor.lastrowid
+                    connection.executemany(
+                        "INSERT INTO provider_calls (question_id, kind, provider, model, prompt_tokens, "
+                        "completion_tokens, characters, seconds, status) "
+                        "VALUES (:question_id, :kind, :provider, :model, :prompt_tokens, :completion_tokens, :characters, :seconds, :status)",
+                        [{**call, "question_id": question_id} for call in calls]
+                    )
+                self.stats["recorded"] += 1
+            except Exception as e:
+                self.stats["write_errors"] += 1
+                logger.error(f"Ledger kaydı yazılamadı: {e}")
+
+    def get_stats(self) -> dict:
+        return {**self.stats, "enabled": self.enabled, "path": self.path, "pending": self._queue.qsize()}
+
+
+question_ledger = QuestionLedger.from_settings()
@@ -0,0 +1,223 @@
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from qa_app.config import settings
+from qa_app.core.rate_limiter import TokenBucket
+from qa_app.core.deadline import current_deadline
+
+logger = logging.getLogger(__name__)
+
+# Öncelik şeritleri: canlı yayın cevapları > web arayüzü > arka plan işleri
+LANE_LIVE = "live"
+LANE_WEB = "web"
+LANE_BACKGROUND = "background"
+
+_current_lane = ContextVar("llm_lane", default=LANE_BACKGROUND)
+
+
+class SchedulerTimeoutError(TimeoutError):
+    """İstek, izin verilen maksimum kuyruk süresi içinde slot alamadı."""
+
+
+def estimate_tokens(text: str) -> int:
+    """Kaba token tahmini (~4 karakter = 1 token)."""
+    return len(text) // 4 + 1
+
+
+class _Waiter:
+    def __init__(self, tokens: int):
+        self.tokens = tokens
+        self.enqueued_at = time.monotonic()
+
+
+class _ProviderQueue:
+    """Tek bir provider/model için token bucket'lar ve şerit kuyrukları."""
+
+    def __init__(self, rpm: int, tpm: int, lanes: dict):
+        # Kapasite: ~10 saniyelik bütçe, böylece dakikalık limit tek seferde patlatılmaz
+        self.request_bucket = TokenBucket(rpm / 60.0, max(1.0, rpm / 6.0)) if rpm > 0 else None
+        self.token_bucket = TokenBucket(tpm / 60.0, max(1.0, tpm / 6.0)) if tpm > 0 else None
+        self.lanes = {lane: deque() for lane in lanes}
+        self.passes = {lane: 0.0 for lane in lanes}
+        self.virtual_time = 0.0
+
+    def time_until_ready(self, tokens: int) -> float:
+        wait = 0.0
+        if self.request_bucket:
+            wait = max(wait, self.request_bucket.time_until(1))
+        if self.token_bucket and tokens:
+            wait = max(wait, self.token_bucket.time_until(tokens))
+        return wait
+
+    def consume(self, tokens: int) -> bool:
+        if self.time_until_ready(tokens) > 0:
+            return False
+        if self.request_bucket and not self.request_bucket.try_consume(1):
+            return False
+        if self.token_bucket and tokens:
+            self.token_bucket.try_consume(tokens)
+        return True
+
+
+class LLMScheduler:
+    """
+    Tüm LLM ve TTS çağrılarının önünde duran merkezi zamanlayıcı.
+
+    - Provider/model başına RPM ve TPM token bucket'ları
+    - Ağırlıklı adil (stride) sıralama ile öncelik şeritleri
+    - Şerit başına kuyruk bekleme süresi metrikleri
+    """
+
+    def __init__(self, lane_weights: dict, provider_limits: dict, model_limits: dict,
+                 max_queue_seconds: float = 60.0):
+        self.lane_weights = lane_weights
+        self.provider_limits = provider_limits   # {provider: (rpm, tpm)}
+        self.model_limits = model_limits         # {(provider, model): (rpm, tpm)}
+        self.max_queue_seconds = max_queue_seconds
+
+        self._cond = threading.Condition()
+        self._queues = {}
+        self._stats = {
+            lane: {"granted": 0, "timeouts": 0, "waiting": 0, "total_wait_seconds": 0.0, "max_wait_seconds": 0.0}
+            for lane in lane_weights
+        }
+
+    @classmethod
+    def from_settings(cls):
+        model_limits = {}
+        # Format: "openai/gpt-4o=500:30000,openai/tts-1=50:0"
+        for entry in filter(None, (e.strip() for e in settings.LLM_MODEL_RATE_LIMITS.split(","))):
+            try:
+                key, limits = entry.split("=", 1)
+                provider, model = key.split("/", 1)
+                rpm, tpm = limits.split(":", 1)
+                model_limits[(provider.strip(), model.strip())] = (int(rpm), int(tpm))
+            except ValueError:
+                logger.warning(f"Geçersiz rate limit tanımı atlandı: '{entry}'")
+
+        return cls(
+            lane_weights={
+                LANE_LIVE: settings.SCHEDULER_WEIGHT_LIVE,
+                LANE_WEB: settings.SCHEDULER_WEIGHT_WEB,
+                LANE_BACKGROUND: settings.SCHEDULER_WEIGHT_BACKGROUND
+            },
+            provider_limits={
+                "openai": (settings.OPENAI_RPM, settings.OPENAI_TPM),
+                "ollama": (settings.OLLAMA_RPM, 0)
+            },
+            model_limits=model_limits,
+            max_queue_seconds=settings.SCHEDULER_MAX_QUEUE_SECONDS
+        )
+
+    @contextmanager
+    def lane(self, lane: str):
+        """Bu blok içinde (aynı thread/context) yapılan çağrıların şeridini belirler."""
+        token = _current_lane.set(lane)
+        try:
+            yield
+        finally:
+            _current_lane.reset(token)
+
+    def _get_queue(self, provider: str, model: str) -> _ProviderQueue:
+        key = (provider, model)
+        queue = self._queues.get(key)
+        if queue is None:
+            rpm, tpm = self.model_limits.get(key, self.provider_limits.get(provider, (0, 0)))
+            queue = _ProviderQueue(rpm, tpm, self.lane_weights)
+            self._queues[key] = queue
+        return queue
+
+    def _next_waiter(self, queue: _ProviderQueue):
+        """Bekleyen şeritler arasından en küçük pass değerine sahip olanın başındaki isteği seçer."""
+        candidates = [lane for lane, waiters in queue.lanes.items() if waiters]
+        if not candidates:
+            return None, None
+        lane = min(candidates, key=lambda name: queue.passes[name])
+        return lane, queue.lanes[lane][0]
+
+    def acquire(self, provider: str, model: str, tokens: int = 0, lane: str = None) -> float:
+        """
+        Provider/model limitleri izin verene kadar bloklar.
+
+        Returns:
+            Kuyrukta beklenen süre (saniye).
+        Raises:
+            SchedulerTimeoutError: max_queue_seconds aşılırsa.
+        """
+        lane = lane or _current_lane.get()
+        if lane not in self.lane_weights:
+            lane = LANE_BACKGROUND
+
+        waiter = _Waiter(tokens)
+        deadline = waiter.enqueued_at + self.max_queue_seconds
+        question_deadline = current_deadline()
+        if question_deadline is not None and question_deadline.expires_at is not None:
+            # Sorunun kendi bütçesi daha önce doluyorsa slot için o kadar beklenir
+            deadline = min(deadline, question_deadline.expires_at)
+
+        with self._cond:
+            queue = self._get_queue(provider, model)
+            if not queue.lanes[lane]:
+                # Boştan aktif hale gelen şerit geçmişte biriktirdiği krediyi kullanamaz
+                queue.passes[lane] = max(queue.passes[lane], queue.virtual_time)
+            queue.lanes[lane].append(waiter)
+            self._stats[lane]["waiting"] += 1
+
+            try:
+                while True:
+                    now = time.monotonic()
+                    if now >= deadline:
+                        queue.lanes[lane].remove(waiter)
+                        self._stats[lane]["timeouts"] += 1
+                        self._cond.notify_all()
+                        raise SchedulerTimeoutError(
+                            f"{provider}/{model} için {now - waiter.enqueued_at:.0f}s içinde slot alınamadı ({lane})"
+                        )
+
+                    _, head = self._next_waiter(queue)
+                    if head is waiter:
+                        if queue.consume(tokens):
+                            break
+                        timeout = queue.time_until_ready(tokens) or 0.05
+                    else:
+                        timeout = 0.5
+                    self._cond.wait(timeout=min(timeout, deadline - now))
+
+                queue.lanes[lane].popleft()
+                queue.virtual_time = queue.passes[lane]
+                queue.passes[lane] += 1.0 / self.lane_weights[lane]
+                self._cond.notify_all()
+            finally:
+                self._stats[lane]["waiting"] -= 1
+
+            waited = time.monotonic() - waiter.enqueued_at
+            stats = self._stats[lane]
+            stats["granted"] += 1
+            stats["total_wait_seconds"] += waited
+            stats["max_wait_seconds"] = max(stats["max_wait_seconds"], waited)
+
+        if waited > 1.0:
+            logger.info(f"LLM scheduler: {provider}/{model} ({lane}) {waited:.2f}s kuyrukta bekledi.")
+        return waited
+
+    def get_stats(self) -> dict:
+        with self._cond:
+            lanes = {}
+            for lane, stats in self._stats.items():
+                lanes[lane] = {
+                    **stats,
+                    "avg_wait_seconds": stats["total_wait_seconds"] / stats["granted"] if stats["granted"] else 0.0
+                }
+            return {
+                "lanes": lanes,
+                "queued": {
+                    f"{provider}/{model}": sum(len(waiters) for waiters in queue.lanes.values())
+                    for (provider, model), queue in self._queues.items()
+                }
+            }
+
+
+llm_scheduler = LLMScheduler.from_settings()
@@ -0,0 +1,241 @@
+import json
+import logging
+import threading
+import time
+from urllib.parse import urljoin
+from qa_app.config import settings
+from qa_app.core.ledger import record_call
+
+logger = logging.getLogger(__name__)
+
+
+class OllamaManager:
+    """
+    Tek yerel Ollama sunucusuna giden tüm istekleri yöneten oturum yöneticisi.
+
+    - Başlangıçta yapılandırılmış modelleri belleğe yükler (preload) ve ısıtır
+    - keep_alive ile modelleri bellekte tutar, periyodik ping ile tazeler
+    - /api/chat kullanır; sabit system mesajı sayesinde prompt prefix'i yeniden kullanılır
+    - Eş zamanlı istek sayısını sınırlar; yükleme, kuyruk ve ilk-token sürelerini ölçer
+    """
+
+    def __init__(self, base_url: str, keep_alive: str = "30m", max_concurrency: int = 2):
+        self.base_url = base_url
+        self.keep_alive = keep_alive
+        self._session = None  # requests ilk istekte yüklenir
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._preloaded = set()
+        self._prefixes = {}
+        self._keepalive_thread = None
+
+    @property
+    def session(self):
+        if self._session is None:
+            import requests
+            self._session = requests.Session()
+        return self._session
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            base_url=settings.OLLAMA_URL,
+            keep_alive=settings.OLLAMA_KEEP_ALIVE,
+            max_concurrency=settings.OLLAMA_MAX_CONCURRENCY
+        )
+
+    @staticmethod
+    def configured_models() -> list[str]:
+        """Ayarlara göre Ollama üzerinden çağrılabilecek modelleri döndürür."""
+        models = []
+        if settings.LLM_PROVIDER == "ollama" or settings.LLM_HEDGE_ENABLED:
+            models.append(settings.LLM_MODEL)
+        if settings.LLM_CASCADE_ENABLED and settings.LLM_CASCADE_FAST_PROVIDER == "ollama":
+            models.append(settings.LLM_CASCADE_FAST_MODEL)
+        if settings.CHITCHAT_CHECK_PROVIDER == "ollama":
+            models.append(settings.CHITCHAT_CHECK_MODEL)
+        return list(dict.fromkeys(models))
+
+    # ==================== STATS ====================
+    def _model_stats(self, model: str) -> dict:
+        stats = self._stats.get(model)
+        if stats is None:
+            stats = {
+                "requests": 0,
+                "errors": 0,
+                "loads": 0,
+                "total_load_seconds": 0.0,
+                "total_queue_seconds": 0.0,
+                "max_queue_seconds": 0.0,
+                "total_first_token_seconds": 0.0,
+                "max_first_token_seconds": 0.0
+            }
+            self._stats[model] = stats
+        return stats
+
+    def _record(self, model: str, queue_seconds: float, first_token_seconds: float | None, final: dict | None):
+        with self._lock:
+            stats = self._model_stats(model)
+            stats["requests"] += 1
+            stats["total_queue_seconds"] += queue_seconds
+            stats["max_queue_seconds"] = max(stats["max_queue_seconds"], queue_seconds)
+            if first_token_seconds is not None:
+                stats["total_first_token_seconds"] += first_token_seconds
+                stats["max_first_token_seconds"] = max(stats["max_first_token_seconds"], first_token_seconds)
+            # Ollama model yükleme süresini nanosaniye olarak döndürür; ~0 ise model zaten bellekteydi
+            load_seconds = (final or {}).get("load_duration", 0) / 1e9
+            if load_seconds > 0.5:
+                stats["loads"] += 1
+                stats["total_load_seconds"] += load_seconds
+                logger.info(f"Ollama modeli belleğe yüklendi: {model} ({load_seconds:.2f}s)")
+
+    def _record_error(self, model: str):
+        with self._lock:
+            self._model_stats(model)["errors"] += 1
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            models = {}
+            for model, stats in self._stats.items():
+                requests_count = stats["requests"] or 1
+                models[model] = {
+                    **stats,
+                    "avg_queue_seconds": stats["total_queue_seconds"] / requests_count,
+                    "avg_first_token_seconds": stats["total_first_token_seconds"] / requests_count
+                }
+            return {
+                "keep_alive": self.keep_alive,
+                "preloaded": sorted(self._preloaded),
+                "models": models
+            }
+    # ======================================================
+
+    def _acquire_slot(self, timeout: float | None) -> float:
+        start = time.perf_counter()
+        if not self._slots.acquire(timeout=timeout):
+            import requests
+            raise requests.exceptions.Timeout("Ollama istek kuyruğunda zaman aşımı")
+        return time.perf_counter() - start
+
+    def chat(self, model: str, messages: list[dict], options: dict = None, timeout: float = None, purpose: str = "chat"):
+        """/api/chat akışını açar ve metin parçalarını üretir. purpose, ledger'daki çağrı türüdür."""
+        queue_seconds = self._acquire_slot(timeout)
+        start = time.perf_counter()
+        first_token_seconds = None
+        final = None
+        status = "ok"
+        try:
+            payload = {
+                "model": model,
+                "messages": messages,
+                "stream": True,
+                "keep_alive": self.keep_alive
+            }
+            if options:
+                payload["options"] = options
+            response = self.session.post(urljoin(self.base_url, "/api/chat"), json=payload, stream=True, timeout=timeout)
+            response.raise_for_status()
+
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("done"):
+                    final = chunk
+                text_chunk = chunk.get("message", {}).get("content", "")
+                if text_chunk:
+                    if first_token_seconds is None:
+                        first_token_seconds = time.perf_counter() - start
+                    yield text_chunk
+        except GeneratorExit:
+            status = "cancelled"
+            raise
+        except Exception:
+            status = "error"
+            self._record_error(model)
+            raise
+        finally:
+            self._slots.release()
+            self._record(model, queue_seconds, first_token_seconds, final)
+            record_call(
+                purpose, "ollama", model,
+                prompt_tokens=(final or {}).get("prompt_eval_count", 0),
+                completion_tokens=(final or {}).get("eval_count", 0),
+                seconds=time.perf_counter() - start,
+                status=status
+            )
+
+    def chat_once(self, model: str, messages: list[dict], options: dict = None, timeout: float = None, purpose: str = "chat") -> str:
+        """Akışsız (tek parça) chat isteği."""
+        return "".join(self.chat(model, messages, options=options, timeout=timeout, purpose=purpose))
+
+    def register_prefix(self, model: str, system_prompt: str):
+        """Bir modelle sürekli kullanılacak system mesajını kaydeder (preload sırasında ısıtılır)."""
+        with self._lock:
+            prefixes = self._prefixes.setdefault(model, [])
+            if system_prompt not in prefixes:
+                prefixes.append(system_prompt)
+
+    def preload(self, models: list[str]):
+        """
+        Modelleri belleğe yükler. Boş mesaj listesi Ollama'da sadece modeli yükler;
+        kayıtlı system prefix'leri tek tokenlık isteklerle ayrıca ısıtılır.
+        """
+        for model in models:
+            try:
+                start = time.perf_counter()
+                response = self.session.post(
+                    urljoin(self.base_url, "/api/chat"),
+                    json={"model": model, "messages": [], "keep_alive": self.keep_alive},
+                    timeout=settings.OLLAMA_TIMEOUT_SECONDS
+                )
+                response.raise_for_status()
+                for system_prompt in list(self._prefixes.get(model, [])):
+                    self.chat_once(
+                        model,
+                        [{"role": "system", "content": system_prompt}, {"role": "user", "content": "merhaba"}],
+                        options={"num_predict": 1},
+                        timeout=settings.OLLAMA_TIMEOUT_SECONDS
+                    )
+                with self._lock:
+                    self._preloaded.add(model)
+                logger.info(f"Ollama modeli hazır: {model} ({time.perf_counter() - start:.2f}s)")
+            except Exception as e:
+                logger.warning(f"Ollama modeli önceden yüklenemedi ({model}): {e}")
+
+    def start_keepalive(self, models: list[str], interval: float = 240.0):
+        """Modelleri periyodik olarak pingleyerek bellekte tutar."""
+        if self._keepalive_thread or not models:
+            return
+
+        def _loop():
+            while True:
+                time.sleep(interval)
+                for model in models:
+                    try:
+                        self.session.post(
+                            urljoin(self.base_url, "/api/chat"),
+                            json={"model": model, "messages": [], "keep_alive": self.keep_alive},
+                            timeout=30
+                        ).raise_for_status()
+                    except Exception as e:
+                        logger.debug(f"Ollama keep-alive ping başarısız ({model}): {e}")
+
+        self._keepalive_thread = threading.Thread(target=_loop, daemon=True)
+        self._keepalive_thread.start()
+
+    def warm_up(self):
+        """Yapılandırılmış modelleri arka planda yükler ve keep-alive döngüsünü başlatır."""
+        models = self.configured_models()
+        if not models:
+            return
+
+        def _run():
+            self.preload(models)
+            self.start_keepalive(models, interval=settings.OLLAMA_KEEPALIVE_PING_SECONDS)
+
+        threading.Thread(target=_run, daemon=True).start()
+
+
+ollama_manager = OllamaManager.from_settings()
@@ -0,0 +1,144 @@
+import logging
+import queue
+import threading
+import time
+from qa_app.core.metrics import ERRORS
+
+logger = logging.getLogger(__name__)
+
+
+class Stage:
+    """
+    Pipeline'ın tek bir aşaması: sınırlı bir giriş kuyruğu ve onu tüketen worker thread'leri.
+
+    handler(item) işlenmiş item'ı döndürür; None dönerse item pipeline'dan düşer.
+    idle_timeout verilirse kuyruk bu süre boyunca boş kaldığında on_idle() çağrılır.
+    input_queue verilirse (ör. öncelikli zamanlayıcı) varsayılan FIFO kuyruk yerine o kullanılır.
+    """
+
+    def __init__(self, name: str, handler, workers: int = 1, maxsize: int = 8,
+                 idle_timeout: float = None, on_idle=None, input_queue=None):
+        self.name = name
+        self.handler = handler
+        self.workers = workers
+        self.queue = input_queue if input_queue is not None else queue.Queue(maxsize=maxsize)
+        self.idle_timeout = idle_timeout
+        self.on_idle = on_idle
+        self.stats = {
+            "processed": 0,
+            "dropped": 0,
+            "errors": 0,
+            "busy_seconds": 0.0
+        }
+
+
+class QuestionPipeline:
+    """
+    Soruları aşamalar arasında sınırlı kuyruklarla akıtan çok aşamalı işleyici.
+
+    Her aşamanın kendi worker'ları olduğu için avatar bir cevabı konuşurken
+    sıradaki sorular sınıflandırılır, cevaplanır ve seslendirilir.
+    Kuyruklar dolduğunda önceki aşama bekler (backpressure).
+    """
+
+    def __init__(self, stages: list[Stage], on_finish=None):
+        self.stages = stages
+        self.on_finish = on_finish
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._running = False
+        self._threads = []
+
+    def submit(self, item) -> bool:
+        """Item'ı ilk aşamanın kuyruğuna ekler; kuyruk doluysa False döner."""
+        # Sayaç önce artırılır: giriş kuyruğu item'ı hemen eleyip discard() çağırabilir
+        with self._lock:
+            self._in_flight += 1
+        try:
+            self.stages[0].queue.put_nowait(item)
+            return True
+        except queue.Full:
+            with self._lock:
+                self._in_flight -= 1
+            logger.warning(f"Pipeline giriş kuyruğu dolu ({self.stages[0].queue.maxsize}), item reddedildi.")
+            return False
+
+    def discard(self, item):
+        """Pipeline'a girmiş ama kuyrukta elenmiş (birleştirilmiş/eskimiş) item'ı tamamlanmış sayar."""
+        self._finish(item)
+
+    def in_flight(self) -> int:
+        """Pipeline'a girmiş ama henüz tamamlanmamış/düşmemiş item sayısı."""
+        with self._lock:
+            return self._in_flight
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        for index, stage in enumerate(self.stages):
+            for worker_no in range(stage.workers):
+                thread = threading.Thread(
+                    target=self._worker, args=(index,), name=f"pipeline-{stage.name}-{worker_no}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+        logger.info("Question pipeline başlatıldı: " + " → ".join(f"{s.name}(x{s.workers})" for s in self.stages))
+
+    def stop(self):
+        self._running = False
+
+    def _finish(self, item):
+        with self._lock:
+            self._in_flight -= 1
+        if self.on_finish:
+            try:
+                self.on_finish(item)
+            except Exception as e:
+                logger.error(f"Pipeline on_finish hatası: {e}")
+
+    def _worker(self, index: int):
+        stage = self.stages[index]
+        next_stage = self.stages[index + 1] if index + 1 < len(self.stages) else None
+
+        while self._running:
+            try:
+                item = stage.queue.get(timeout=stage.idle_timeout or 1.0)
+            except queue.Empty:
+                if stage.on_idle and stage.idle_timeout:
+                    try:
+                        stage.on_idle()
+                    except Exception as e:
+                        logger.error(f"Pipeline '{stage.name}' idle hatası: {e}")
+                continue
+
+            start = time.perf_counter()
+            try:
+                result = stage.handler(item)
+            except Exception as e:
+                logger.error(f"Pipeline '{stage.name}' aşamasında hata: {e}")
+                stage.stats["errors"] += 1
+                ERRORS.inc(component=f"pipeline_{stage.name}")
+                result = None
+            stage.stats["busy_seconds"] += time.perf_counter() - start
+            stage.queue.task_done()
+
+            if result is None:
+                stage.stats["dropped"] += 1
+                self._finish(item)
+                continue
+
+            stage.stats["processed"] += 1
+            if next_stage:
+                next_stage.queue.put(result)
+            else:
+                self._finish(result)
+
+    def get_stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight(),
+            "stages": {
+                stage.name: {**stage.stats, "queue_depth": stage.queue.qsize(), "workers": stage.workers}
+                for stage in self.stages
+            }
+        }
@@ -0,0 +1,330 @@
+import cProfile
+import io
+import logging
+import os
+import pstats
+import signal
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from contextlib import contextmanager
+from qa_app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _timestamp() -> str:
+    return time.strftime("%Y%m%d_%H%M%S")
+
+
+def format_thread_stacks() -> str:
+    """Tüm thread'lerin o anki yığınlarını okunabilir metin olarak döndürür."""
+    names = {thread.ident: thread.name for thread in threading.enumerate()}
+    parts = []
+    for ident, frame in sys._current_frames().items():
+        parts.append(f"--- Thread {names.get(ident, '?')} ({ident}) ---")
+        parts.append("".join(traceback.format_stack(frame)))
+    return "\n".join(parts)
+
+
+class CallProfileSession:
+    """
+    Sıradaki N sorunun işlenmesini cProfile ile profiller.
+
+    Bir soru birden fazla pipeline thread'inden geçtiği için her aşama çağrısı kendi
+    Profile nesnesiyle ölçülür ve sonuçlar tek bir pstats dosyasında birleştirilir.
+    cProfile thread başınadır; spekülatif havuz ve hedge thread'leri bu oturuma girmez
+    (onlar için sampling kullanılır).
+
+    Soru trafiği yoksa oturum kendiliğinden bitmez; max_seconds dolunca ya da stop() ile
+    o ana kadar ölçülen aşamalarla kapatılır.
+    """
+
+    def __init__(self, calls: int, output_dir: str, max_seconds: float = None):
+        self.calls = calls
+        self.output_dir = output_dir
+        self.max_seconds = max_seconds
+        self.started_at = time.time()
+        self.claimed = 0
+        self.completed = 0
+        self.skipped = 0
+        self.finished = None  # completed / expired / cancelled
+        self.result_path = None
+        self._stats = None
+        self._lock = threading.Lock()
+
+    @property
+    def done(self) -> bool:
+        return self.finished is not None
+
+    @property
+    def expired(self) -> bool:
+        return self.max_seconds is not None and time.time() - self.started_at >= self.max_seconds
+
+    def claim(self) -> bool:
+        """Soru için profil slotu ayırır; oturum doluysa, bittiyse ya da süresi dolduysa False."""
+        with self._lock:
+            if self.done or self.claimed >= self.calls or self.expired:
+                return False
+            self.claimed += 1
+            return True
+
+    @contextmanager
+    def profile(self):
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Python 3.12+'da aynı anda tek profiler çalışabilir; çakışan aşama atlanır
+            with self._lock:
+                self.skipped += 1
+            yield
+            return
+        try:
+            yield
+        finally:
+            profiler.disable()
+            with self._lock:
+                if self._stats is None:
+                    self._stats = pstats.Stats(profiler)
+                else:
+                    self._stats.add(profiler)
+
+    def complete_one(self):
+        with self._lock:
+            self.completed += 1
+            if self.completed < self.calls:
+                return
+        self.stop("completed")
+
+    def stop(self, reason: str = "cancelled"):
+        """Oturumu kapatır ve o ana kadar ölçülen aşamaları yazar (idempotent)."""
+        with self._lock:
+            if self.done:
+                return
+            self.finished = reason
+            stats = self._stats
+
+        if stats is None:
+            logger.warning(f"Profil oturumu bitti ({reason}) ama hiçbir aşama ölçülemedi.")
+            return
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir, f"questions_{_timestamp()}.pstats")
+        stats.dump_stats(path)
+        # Hızlı bakış için kümülatif süreye göre ilk 40 fonksiyon metin olarak da yazılır
+        summary = io.StringIO()
+        pstats.Stats(path, stream=summary).sort_stats("cumulative").print_stats(40)
+        with open(path.replace(".pstats", ".txt"), "w", encoding="utf-8") as f:
+            f.write(summary.getvalue())
+        self.result_path = path
+        logger.info(f"Profil yazıldı ({self.completed}/{self.calls} soru, {reason}): {path}")
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "mode": "calls",
+                "calls": self.calls,
+                "claimed": self.claimed,
+                "completed": self.completed,
+                "skipped_stages": self.skipped,
+                "started_at": self.started_at,
+                "max_seconds": self.max_seconds,
+                "finished": self.finished,
+                "result_path": self.result_path
+            }
+
+
+class SamplingSession:
+    """
+    Belirli bir süre boyunca tüm thread'lerin yığınlarını örnekler ve flamegraph
+    araçlarının okuyabildiği collapsed-stack (.folded) formatında yazar.
+    """
+
+    def __init__(self, seconds: float, interval: float, output_dir: str):
+        self.seconds = seconds
+        self.interval = interval
+        self.output_dir = output_dir
+        self.started_at = time.time()
+        self.samples = 0
+        self.finished = None  # completed / cancelled
+        self.result_path = None
+        self._stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler-sampler", daemon=True)
+
+    @property
+    def done(self) -> bool:
+        return self.result_path is not None
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self, reason: str = "cancelled"):
+        """Örneklemeyi erken bitirir; o ana kadarki yığınlar yazılır."""
+        self._stop.set()
+        self._thread.join(timeout=5)
+
+    def _run(self):
+        own_ident = threading.get_ident()
+        deadline = time.monotonic() + self.seconds
+        while time.monotonic() < deadline and not self._stop.is_set():
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self._stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+            self._stop.wait(self.interval)
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir, f"sample_{_timestamp()}.folded")
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self._stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        self.finished = "cancelled" if self._stop.is_set() else "completed"
+        self.result_path = path
+        logger.info(f"Sampling profili yazıldı ({self.samples} örnek, {self.seconds:.0f}s): {path}")
+
+    def get_stats(self) -> dict:
+        return {
+            "mode": "sampling",
+            "seconds": self.seconds,
+            "interval": self.interval,
+            "samples": self.samples,
+            "started_at": self.started_at,
+            "finished": self.finished,
+            "result_path": self.result_path
+        }
+
+
+class Profiler:
+    """
+    Canlı süreçte yeniden başlatmadan profil almak için kontrol noktası.
+
+    Aynı anda tek oturum çalışır. Soru akışı, oturum yokken sadece bir None kontrolü yapar.
+    Soru oturumları call_max_seconds sonunda kısmi sonuçla kapanır; cancel() ile erken durdurulabilir.
+    """
+
+    def __init__(self, output_dir: str, call_max_seconds: float = None):
+        self.output_dir = output_dir
+        self.call_max_seconds = call_max_seconds
+        self.session = None
+        self.history = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls) -> "Profiler":
+        return cls(settings.PROFILE_OUTPUT_DIR, settings.PROFILE_MAX_SECONDS or None)
+
+    @staticmethod
+    def _expire(session):
+        if isinstance(session, CallProfileSession) and not session.done and session.expired:
+            logger.warning(f"Profil oturumu {session.max_seconds:.0f}s içinde {session.calls} soruya ulaşmadı, "
+                           f"kısmi sonuçla kapatılıyor ({session.completed} soru).")
+            session.stop("expired")
+
+    def _start(self, session):
+        with self._lock:
+            if self.session is not None:
+                self._expire(self.session)
+            if self.session is not None and not self.session.done:
+                raise RuntimeError("Zaten çalışan bir profil oturumu var.")
+            if self.session is not None:
+                self.history.append(self.session.get_stats())
+                self.history = self.history[-10:]
+            self.session = session
+        return session
+
+    def profile_questions(self, calls: int) -> CallProfileSession:
+        session = self._start(CallProfileSession(calls, self.output_dir, self.call_max_seconds))
+        logger.info(f"Profil oturumu başladı: sıradaki {calls} soru cProfile ile ölçülecek.")
+        return session
+
+    def sample(self, seconds: float, interval: float = 0.01) -> SamplingSession:
+        session = self._start(SamplingSession(seconds, interval, self.output_dir))
+        session.start()
+        logger.info(f"Sampling profili başladı: {seconds:.0f}s, {interval * 1000:.0f}ms aralık.")
+        return session
+
+    def cancel(self):
+        """Çalışan oturumu durdurur (o ana kadarki ölçüm yazılır); çalışan oturum yoksa None."""
+        session = self.session
+        if session is None or session.done:
+            return None
+        session.stop("cancelled")
+        logger.info("Profil oturumu iptal edildi.")
+        return session
+
+    # --- Soru akışı kancaları ---
+    def claim(self) -> bool:
+        session = self.session
+        return isinstance(session, CallProfileSession) and not session.done and session.claim()
+
+    @contextmanager
+    def profile(self, ctx):
+        """ctx profil için seçildiyse bloğu cProfile altında çalıştırır."""
+        session = self.session
+        if not ctx.profiled or not isinstance(session, CallProfileSession):
+            yield
+            return
+        with session.profile():
+            yield
+
+    def complete(self, ctx):
+        session = self.session
+        if ctx.profiled and isinstance(session, CallProfileSession):
+            ctx.profiled = False
+            session.complete_one()
+
+    def dump_stacks(self) -> tuple[str, str]:
+        """Thread yığınlarını diske yazar; (yol, metin) döndürür."""
+        text = format_thread_stacks()
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir, f"stacks_{_timestamp()}.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        logger.info(f"Thread yığınları yazıldı: {path}")
+        return path, text
+
+    def install_signal_handler(self, signal_name: str, sample_seconds: float):
+        """
+        Sinyal gelince thread yığınlarını yazar ve sample_seconds'lık bir sampling profili başlatır.
+        Sadece ana thread'den çağrılabilir (gunicorn'da post_worker_init).
+        """
+        signum = getattr(signal, signal_name, None)
+        if signum is None:
+            logger.warning(f"Profil sinyali bu platformda yok: {signal_name}")
+            return
+
+        def _handler(received, frame):
+            # Sinyal handler'ı kısa tutulur; dosya yazma ayrı thread'de
+            def _run():
+                try:
+                    self.dump_stacks()
+                    self.sample(sample_seconds)
+                except Exception as e:
+                    logger.warning(f"Sinyal ile profil başlatılamadı: {e}")
+            threading.Thread(target=_run, name="profiler-signal", daemon=True).start()
+
+        signal.signal(signum, _handler)
+        logger.info(f"Profil sinyali kuruldu: kill -{signal_name.replace('SIG', '')} {os.getpid()}")
+
+    def get_stats(self) -> dict:
+        session = self.session
+        self._expire(session)
+        return {
+            "output_dir": self.output_dir,
+            "active": session.get_stats() if session is not None else None,
+            "history": list(self.history)
+        }
+
+
+profiler = Profiler.from_settings()
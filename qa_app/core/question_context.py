@@ -0,0 +1,88 @@
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+# Single-flight ile kopyalara paylaştırılan alanlar
+SHARED_FIELDS = ("route", "answer", "audio_filename", "skip_tts")
+
+
+@dataclass
+class QuestionContext:
+    """
+    Bir sorunun intake'ten oynatmaya kadar tüm aşamalarda paylaşılan durumu.
+
+    Author ayrıştırma, normalizasyon ve embedding intake'te bir kez yapılır; sonraki
+    aşamalar (router, dedup, retrieval) bunları tekrar hesaplamak yerine buradan okur.
+    Aşama süreleri ve verilen kararlar da aynı nesnede toplanır.
+    """
+    question: str
+    author: str | None = None
+    cleaned_question: str = ""
+    normalized: str = ""          # Router normalizasyonu (Türkçe karakter, noktalama, küçük harf)
+    query_hash: str = ""          # normalized'ın hash'i (retrieval cache anahtarı)
+    is_greeting: bool = False
+    low_value: bool = False       # Kuyruk dolunca ilk feda edilecekler (selamlama/chitchat)
+    live: bool = False            # YouTube canlı yayın sorusu mu?
+
+    # Kuyruk ve birleştirme
+    cluster_key: str | None = None
+    embedding: object = None      # Sentence encoder çıktısı (retrieval'da tekrar kullanılır)
+    askers: list = field(default_factory=list)
+    demand: int = 1
+    queue_wait: float = 0.0
+
+    # Kararlar ve sonuç
+    route: str | None = None      # injection / chitchat / rag / web
+    context: list | None = None
+    answer: str | None = None
+    audio_filename: str | None = None
+    audio_bytes: int | None = None
+    skip_tts: bool = False
+    budget: object = None         # AnswerBudget
+    deadline: object = None       # Deadline
+    trace: object = None          # Trace (sohbet mesajından oynatma sonuna)
+    spoken_seconds: float | None = None
+    decisions: dict = field(default_factory=dict)
+    generation: dict = field(default_factory=dict)  # RAGEngine.generate raporu (prompt boyutu, provider, fallback yolu)
+    provider_calls: list = field(default_factory=list)  # Ücretli çağrılar (ledger): tür, model, token, süre
+
+    # Pipeline iç durumu
+    flight: tuple | None = None
+    retrieval_future: object = None
+    profiled: bool = False        # Aktif profil oturumu bu soruyu ölçüyor mu?
+
+    created_at: float = field(default_factory=time.time)
+    timings: dict = field(default_factory=dict)
+
+    @contextmanager
+    def timed(self, stage: str):
+        """Blok süresini timings[stage]'e ekler."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[stage] = self.timings.get(stage, 0.0) + time.perf_counter() - start
+
+    def decide(self, name: str, value):
+        self.decisions[name] = value
+
+    def shared_result(self) -> dict:
+        """Single-flight kopyalarına yayınlanacak sonuç."""
+        return {name: getattr(self, name) for name in SHARED_FIELDS}
+
+    def apply_result(self, result: dict):
+        for name, value in result.items():
+            setattr(self, name, value)
+
+    def summary(self) -> dict:
+        """Loglama/istatistik için sorunun gecikme ve karar özeti."""
+        return {
+            "question": self.cleaned_question,
+            "author": self.author,
+            "route": self.route,
+            "queue_wait": self.queue_wait,
+            "timings": dict(self.timings),
+            "total_seconds": time.time() - self.created_at,
+            "decisions": dict(self.decisions),
+            "degradations": list(self.deadline.degradations) if self.deadline else []
+        }
@@ -0,0 +1,89 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy as np  # Çalışma zamanında assign() içinde yüklenir
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticDeduplicator:
+    """
+    Kayan zaman penceresi içinde anlamca aynı soruları tek bir kümede toplar.
+
+    Her mesaj embedding modeliyle vektörleştirilir; penceredeki bir kümenin temsilcisine
+    kosinüs benzerliği eşiği geçerse o kümenin anahtarını alır. Böylece farklı kelimelerle
+    sorulan aynı soru kuyrukta tek bir iş olarak birleşir.
+    """
+
+    def __init__(self, encode_fn, threshold: float = 0.88, window: float = 60.0, max_clusters: int = 256):
+        self.encode_fn = encode_fn
+        self.threshold = threshold
+        self.window = window
+        self.max_clusters = max_clusters
+        self._clusters = OrderedDict()  # cluster_key -> [embedding, last_seen]
+        self._lock = threading.Lock()
+        self.stats = {
+            "messages": 0,
+            "clusters": 0,
+            "merged": 0
+        }
+
+    def _expire(self, now: float):
+        while self._clusters:
+            key, (_, last_seen) = next(iter(self._clusters.items()))
+            if now - last_seen <= self.window and len(self._clusters) <= self.max_clusters:
+                break
+            self._clusters.popitem(last=False)
+
+    def assign(self, key: str, text: str, embedding=None) -> tuple[str, "np.ndarray"]:
+        """
+        Mesajı bir kümeye atar.
+
+        Args:
+            embedding: Önceden hesaplanmış vektör (verilmezse encode_fn ile hesaplanır)
+
+        Returns:
+            (cluster_key, embedding) - embedding normalize edilmiş vektördür.
+        """
+        import numpy as np
+
+        if embedding is None:
+            embedding = self.encode_fn(text)
+        embedding = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(embedding)
+        if norm > 0:
+            embedding = embedding / norm
+
+        now = time.time()
+        with self._lock:
+            self.stats["messages"] += 1
+            self._expire(now)
+
+            cluster_key = None
+            if key in self._clusters:
+                cluster_key = key
+            elif self._clusters:
+                keys = list(self._clusters.keys())
+                similarities = np.stack([self._clusters[k][0] for k in keys]) @ embedding
+                best = int(similarities.argmax())
+                if similarities[best] >= self.threshold:
+                    cluster_key = keys[best]
+                    logger.info(f"Semantic dedup: '{text[:60]}' → '{cluster_key[:60]}' ({similarities[best]:.2f})")
+
+            if cluster_key is not None:
+                self.stats["merged"] += 1
+                self._clusters[cluster_key][1] = now
+                self._clusters.move_to_end(cluster_key)
+                return cluster_key, embedding
+
+            self._clusters[key] = [embedding, now]
+            self.stats["clusters"] += 1
+            return key, embedding
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {**self.stats, "active_clusters": len(self._clusters), "threshold": self.threshold}
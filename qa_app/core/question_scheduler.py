@@ -0,0 +1,290 @@
+import logging
+import queue
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class QueuedQuestion:
+    """Kuyrukta bekleyen tek bir soru (ve aynı soruyu soran diğer izleyiciler)."""
+    item: object
+    key: str
+    author: str | None
+    enqueued_at: float
+    demand: int = 1
+    askers: list = field(default_factory=list)
+    first_time: bool = False
+    low_value: bool = False
+    attached: list = field(default_factory=list)  # Bu soru cevaplanırken gelen kopyalar
+
+
+class QuestionScheduler:
+    """
+    YouTube soru kuyruğu için tazelik (freshness) odaklı öncelikli zamanlayıcı.
+
+    queue.Queue ile aynı arayüzü (put_nowait / get / task_done / qsize) sunar, böylece
+    pipeline'ın giriş kuyruğu olarak doğrudan kullanılabilir.
+
+    Öncelik skoru:
+        freshness_weight * (1 - yaş / max_age)
+        + first_time_bonus    (yayında ilk kez soru soran izleyici)
+        + demand_bonus * (talep - 1)  (aynı soruyu soran ek izleyici sayısı)
+
+    Kuyruk maxsize'a ulaştığında yük atılır (load shedding): önce selamlama/chitchat
+    (low_value_fn True dönenler), sonra en eski bilgi soruları feda edilir. Böylece kuyruk
+    derinliği ve dolayısıyla kabul edilen soruların bekleme süresi sınırlı kalır.
+
+    max_age'i geçen sorular artık alakasız kabul edilip düşürülür.
+
+    Kuyruktan çıkan soru, finish(item, answered) çağrılana kadar uçuşta sayılır; bu sırada
+    aynı anahtarla gelen kopyalar ona bağlanır (soranlar cevapta anılır). Leader cevapsız
+    biterse bağlanan kopyalar kuyruğa geri döner. served_window > 0 ise cevaplanan sorunun
+    anahtarı served_window saniye boyunca bastırılır. Düşürülen ya da birleştirilen
+    item'lar on_discard(item) ile bildirilir.
+    """
+
+    def __init__(self, key_fn, author_fn, low_value_fn=None, maxsize: int = 100, max_age: float = 180.0,
+                 freshness_weight: float = 1.0, first_time_bonus: float = 0.5, demand_bonus: float = 0.3,
+                 seen_authors_limit: int = 10000, served_window: float = 0.0):
+        self.key_fn = key_fn
+        self.author_fn = author_fn
+        self.low_value_fn = low_value_fn
+        self.maxsize = maxsize
+        self.max_age = max_age
+        self.freshness_weight = freshness_weight
+        self.first_time_bonus = first_time_bonus
+        self.demand_bonus = demand_bonus
+        self.seen_authors_limit = seen_authors_limit
+        self.served_window = served_window
+
+        self._cond = threading.Condition()
+        self._pending = {}  # key -> QueuedQuestion
+        self._seen_authors = OrderedDict()  # Sınırlı LRU: ilk kez soranları tespit etmek için
+        self._in_flight = {}  # key -> kuyruktan çıkmış, finish() bekleyen QueuedQuestion
+        self._served = OrderedDict()  # key -> cevaplanma zamanı (served_window için)
+        self.on_discard = None
+        self.stats = {
+            "enqueued": 0,
+            "dequeued": 0,
+            "merged_duplicates": 0,
+            "attached_in_flight": 0,
+            "requeued_after_failure": 0,
+            "suppressed_recent": 0,
+            "dropped_stale": 0,
+            "shed_chitchat": 0,
+            "shed_knowledge": 0,
+            "total_wait_seconds": 0.0,
+            "max_wait_seconds": 0.0
+        }
+
+    def _is_first_time(self, author: str | None) -> bool:
+        if not author:
+            return False
+        if author in self._seen_authors:
+            self._seen_authors.move_to_end(author)
+            return False
+        self._seen_authors[author] = True
+        if len(self._seen_authors) > self.seen_authors_limit:
+            self._seen_authors.popitem(last=False)
+        return True
+
+    def _score(self, entry: QueuedQuestion, now: float) -> float:
+        freshness = max(0.0, 1.0 - (now - entry.enqueued_at) / self.max_age)
+        score = self.freshness_weight * freshness + self.demand_bonus * (entry.demand - 1)
+        if entry.first_time:
+            score += self.first_time_bonus
+        return score
+
+    def _drop_stale(self, now: float) -> list:
+        dropped = []
+        for key, entry in list(self._pending.items()):
+            age = now - entry.enqueued_at
+            if age > self.max_age:
+                del self._pending[key]
+                self.stats["dropped_stale"] += 1
+                dropped.append(entry.item)
+                logger.info(f"Soru çok eski olduğu için düşürüldü ({age:.0f}s): '{key[:60]}'")
+        return dropped
+
+    def _discard(self, items: list):
+        if self.on_discard:
+            for item in items:
+                self.on_discard(item)
+
+    # --- queue.Queue uyumlu arayüz ---
+    def put_nowait(self, item):
+        key = self.key_fn(item)
+        author = self.author_fn(item)
+        low_value = bool(self.low_value_fn(item)) if self.low_value_fn else False
+        now = time.time()
+        discarded = []
+        try:
+            with self._cond:
+                self._enqueue(item, key, author, low_value, now, discarded)
+        finally:
+            self._discard(discarded)
+
+    def _shed(self, low_value: bool, now: float) -> QueuedQuestion | None:
+        """
+        Kuyruk doluyken feda edilecek soruyu seçer: önce low-value, sonra en eski.
+        None dönerse yeni gelen sorunun kendisi feda edilmelidir.
+        """
+        victim = min(self._pending.values(), key=lambda entry: (not entry.low_value, entry.enqueued_at))
+        if (not victim.low_value, victim.enqueued_at) > (not low_value, now):
+            return None
+        del self._pending[victim.key]
+        return victim
+
+    def _enqueue(self, item, key: str, author: str | None, low_value: bool, now: float, discarded: list):
+        existing = self._pending.get(key)
+        if existing is not None:
+            # Aynı soru zaten bekliyor: yeni kopya talebi artırır, ayrıca işlenmez
+            existing.demand += 1
+            if author and author not in existing.askers:
+                existing.askers.append(author)
+            self.stats["merged_duplicates"] += 1
+            discarded.append(item)
+            return
+
+        leader = self._in_flight.get(key)
+        if leader is not None:
+            # Aynı soru şu an cevaplanıyor: yeni soran leader'a bağlanır; leader cevapsız
+            # biterse kopya kuyruğa döner, cevaplanırsa o zaman düşürülür
+            leader.demand += 1
+            if author and author not in leader.askers:
+                leader.askers.append(author)
+            leader.attached.append(item)
+            self.stats["attached_in_flight"] += 1
+            return
+
+        # Aynı soru az önce cevaplandıysa tekrar cevaplanmaz
+        while self._served and now - next(iter(self._served.values())) > self.served_window:
+            self._served.popitem(last=False)
+        if key in self._served:
+            self.stats["suppressed_recent"] += 1
+            discarded.append(item)
+            return
+
+        if len(self._pending) >= self.maxsize:
+            discarded.extend(self._drop_stale(now))
+        if len(self._pending) >= self.maxsize:
+            victim = self._shed(low_value, now)
+            shed_low_value = victim.low_value if victim else low_value
+            self.stats["shed_chitchat" if shed_low_value else "shed_knowledge"] += 1
+            if victim is None:
+                logger.warning(f"Kuyruk dolu ({self.maxsize}), yeni soru feda edildi: '{key[:60]}'")
+                discarded.append(item)
+                return
+            logger.warning(f"Kuyruk dolu ({self.maxsize}), soru feda edildi: '{victim.key[:60]}'")
+            discarded.append(victim.item)
+
+        self._pending[key] = QueuedQuestion(
+            item=item,
+            key=key,
+            author=author,
+            enqueued_at=now,
+            askers=[author] if author else [],
+            first_time=self._is_first_time(author),
+            low_value=low_value
+        )
+        self.stats["enqueued"] += 1
+        self._cond.notify()
+
+    def get(self, block: bool = True, timeout: float = None):
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        discarded = []
+        try:
+            with self._cond:
+                while True:
+                    now = time.time()
+                    discarded.extend(self._drop_stale(now))
+                    if self._pending:
+                        break
+                    if not block:
+                        raise queue.Empty
+                    remaining = deadline - time.monotonic() if deadline is not None else None
+                    if remaining is not None and remaining <= 0:
+                        raise queue.Empty
+                    self._cond.wait(remaining)
+
+                entry = max(self._pending.values(), key=lambda candidate: self._score(candidate, now))
+                del self._pending[entry.key]
+                self._in_flight[entry.key] = entry
+
+                waited = now - entry.enqueued_at
+                self.stats["dequeued"] += 1
+                self.stats["total_wait_seconds"] += waited
+                self.stats["max_wait_seconds"] = max(self.stats["max_wait_seconds"], waited)
+        finally:
+            self._discard(discarded)
+
+        # Birleştirilen talepler ve bekleme süresi item'a (dict ya da nesne) işlenir
+        for name, value in (("askers", entry.askers), ("demand", entry.demand), ("queue_wait", waited)):
+            if isinstance(entry.item, dict):
+                entry.item[name] = value
+            elif hasattr(entry.item, name):
+                setattr(entry.item, name, value)
+        return entry.item
+
+    def finish(self, item, answered: bool):
+        """
+        Kuyruktan çıkan sorunun işi bittiğinde (pipeline on_finish) çağrılır.
+
+        Cevaplandıysa bağlanan kopyalar düşürülür ve anahtar served_window boyunca bastırılır.
+        Cevaplanamadıysa (hata, deadline, intake'te elenme) kopyalar kuyruğa geri döner;
+        böylece leader'ın başarısızlığı sonradan soranları cevapsız bırakmaz.
+        Uçuştaki leader olmayan item'lar (ör. kuyrukta elenen kopyalar) yok sayılır.
+        """
+        key = self.key_fn(item)
+        discarded = []
+        try:
+            with self._cond:
+                entry = self._in_flight.get(key)
+                if entry is None or entry.item is not item:
+                    return
+                del self._in_flight[key]
+                now = time.time()
+                if answered:
+                    if self.served_window > 0:
+                        self._served.pop(key, None)
+                        self._served[key] = now
+                    discarded.extend(entry.attached)
+                    return
+                if entry.attached:
+                    logger.info(f"Leader cevapsız bitti, {len(entry.attached)} kopya kuyruğa geri döndü: '{key[:60]}'")
+                    self.stats["requeued_after_failure"] += 1
+                for attached in entry.attached:
+                    low_value = bool(self.low_value_fn(attached)) if self.low_value_fn else False
+                    self._enqueue(attached, key, self.author_fn(attached), low_value, now, discarded)
+        finally:
+            self._discard(discarded)
+
+    def task_done(self):
+        """queue.Queue uyumluluğu için; ayrıca takip edilecek bir şey yok."""
+
+    def qsize(self) -> int:
+        with self._cond:
+            return len(self._pending)
+
+    def oldest_age(self) -> float:
+        """Kuyrukta en uzun süredir bekleyen sorunun yaşı (saniye)."""
+        with self._cond:
+            now = time.time()
+            return max((now - entry.enqueued_at for entry in self._pending.values()), default=0.0)
+
+    def get_stats(self) -> dict:
+        with self._cond:
+            now = time.time()
+            ages = [now - entry.enqueued_at for entry in self._pending.values()]
+            dequeued = self.stats["dequeued"]
+            return {
+                **self.stats,
+                "depth": len(ages),
+                "in_flight": len(self._in_flight),
+                "oldest_age_seconds": max(ages, default=0.0),
+                "avg_wait_seconds": self.stats["total_wait_seconds"] / dequeued if dequeued else 0.0
+            }
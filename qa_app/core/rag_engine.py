@@ -1,13 +1,22 @@
-from venv import logger
-import torch, json, unicodedata, hashlib
-import pandas as pd
-import requests, re, os
-import numpy as np
-import openai
-from collections import OrderedDict
-from sentence_transformers import SentenceTransformer, util
-from urllib.parse import urljoin
+import logging
+import unicodedata
+import re, threading, time
+# torch, pandas, numpy, sentence_transformers, openai ve requests kullanıldıkları yerde import edilir;
+# modülü import etmek (script'ler, testler, main) model yüklenene kadar hafif kalır.
 from qa_app.config import settings
+from qa_app.core.llm_scheduler import llm_scheduler, estimate_tokens
+from qa_app.core.hedging import CircuitBreaker, hedged_stream
+from qa_app.core.ollama_manager import ollama_manager
+from qa_app.core.deadline import DeadlineExceeded, current_deadline
+from qa_app.core.metrics import STAGE_LATENCY, FALLBACKS
+from qa_app.core.cache import InstrumentedCache, SemanticCache
+from qa_app.core.tracing import span, traced_stream
+from qa_app.core.ledger import record_call
+from qa_app.core.router import normalize_text, text_hash
+
+SYSTEM_PROMPT = "Sen bir üniversite yönetmelik uzmanısın."
+
+logger = logging.getLogger(__name__)
 
 class RAGEngine:
     def __init__(self, enable_cache: bool = True, cache_size: int = 100, semantic_cache_threshold: float = 0.95):
@@ -19,62 +28,99 @@ class RAGEngine:
             cache_size: Maksimum cache boyutu (default: 100 sorgu)
             semantic_cache_threshold: Semantic cache için minimum benzerlik skoru (default: 0.95)
         """
-        print("RAG Motoru başlatılıyor...")
+        import torch
+        logger.info("RAG Motoru başlatılıyor...")
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
-        print(f"Kullanılan cihaz: {self.device}")
+        logger.info(f"Kullanılan cihaz: {self.device}")
 
         # Cache ayarları
         self.enable_cache = enable_cache
         self.cache_size = cache_size
-        self._query_cache = OrderedDict()  # LRU cache için OrderedDict (exact match)
+        self._query_cache = InstrumentedCache("retrieval", max_size=cache_size)  # Exact match (LRU, thread-safe)
         
-        # Semantic cache
+        # Semantic cache: farklı yazılmış aynı sorgu embedding benzerliğiyle eşleşir
         self.semantic_cache_threshold = semantic_cache_threshold
-        self._semantic_cache = []  # [(query_embedding, results), ...]
-        self._semantic_cache_queries = []  # Orijinal query metinleri (debug için)
+        self._semantic_cache = SemanticCache(
+            "retrieval_semantic", self._semantic_scores, semantic_cache_threshold, max_size=cache_size
+        )
         
-        print(f"Cache: {'Aktif' if enable_cache else 'Kapalı'} (max {cache_size} sorgu, semantic threshold: {semantic_cache_threshold})")
+        logger.info(f"Cache: {'Aktif' if enable_cache else 'Kapalı'} (max {cache_size} sorgu, semantic threshold: {semantic_cache_threshold})")
 
         self.embedding_model = self._load_embedding_model()
         self.text_chunks, self.sources, self.embeddings = self._load_vector_db()
 
         # OpenAI Client Init
+        # Cascade'in hızlı katmanı OpenAI olabileceği için anahtar varsa istemci her zaman kurulur.
         self.openai_client = None
-        if settings.LLM_PROVIDER == "openai":
-            if not settings.OPENAI_API_KEY:
-                print("UYARI: OpenAI seçildi ama OPENAI_API_KEY bulunamadı!")
-            else:
-                self.openai_client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
-                print(f"OpenAI Client başlatıldı (Model: {settings.OPENAI_MODEL_NAME})")
+        if settings.OPENAI_API_KEY:
+            import openai
+            self.openai_client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
+            logger.info(f"OpenAI Client başlatıldı (Model: {settings.OPENAI_MODEL_NAME})")
+        elif settings.LLM_PROVIDER == "openai":
+            logger.warning("OpenAI seçildi ama OPENAI_API_KEY bulunamadı!")
 
-        print("RAG Motoru başarıyla başlatıldı ve kullanıma hazır.")
+        # Ollama kullanılabilecek modeller için system prefix'i kaydet (preload sırasında ısıtılır)
+        for model in (settings.LLM_MODEL, settings.LLM_CASCADE_FAST_MODEL):
+            ollama_manager.register_prefix(model, SYSTEM_PROMPT)
+
+        # Provider başına circuit breaker ve hedge istatistikleri
+        self._breakers = {
+            provider: CircuitBreaker(
+                provider,
+                failure_threshold=settings.LLM_BREAKER_FAILURE_THRESHOLD,
+                reset_timeout=settings.LLM_BREAKER_RESET_SECONDS
+            )
+            for provider in ("openai", "ollama")
+        }
+        self._hedge_stats = {}
+
+        # Model cascade istatistikleri
+        self._cascade_lock = threading.Lock()
+        self._cascade_stats = {
+            "requests": 0,
+            "accepted_fast": 0,
+            "escalated": 0,
+            "escalation_reasons": {},
+            "tiers": {
+                tier: {"calls": 0, "total_seconds": 0.0, "max_seconds": 0.0}
+                for tier in ("fast", "large")
+            }
+        }
+
+        logger.info("RAG Motoru başarıyla başlatıldı ve kullanıma hazır.")
 
     def _load_embedding_model(self):
         """Embedding modelini yükler."""
-        print(f"Embedding modeli yükleniyor: {settings.EMBEDDING_MODEL}")
+        from sentence_transformers import SentenceTransformer
+        logger.info(f"Embedding modeli yükleniyor: {settings.EMBEDDING_MODEL}")
         return SentenceTransformer(settings.EMBEDDING_MODEL, device=self.device)
 
     def _load_vector_db(self):
         """İşlenmiş Parquet dosyasını okur ve embedding'leri bir Torch tensor'üne dönüştürür."""
-        print(f"Vektör veritabanı yükleniyor: {settings.PROCESSED_DATA_PATH}")
+        import numpy as np
+        import pandas as pd
+        import torch
+        logger.info(f"Vektör veritabanı yükleniyor: {settings.PROCESSED_DATA_PATH}")
         try:
             df = pd.read_parquet(settings.PROCESSED_DATA_PATH)
             text_chunks = df['text_chunk'].tolist()
             sources = df['source_document'].tolist()
             embeddings_list = df['embedding'].tolist()
             embeddings = torch.tensor(np.array(embeddings_list), dtype=torch.float32).to(self.device)
-            print(f"Vektör veritabanı başarıyla yüklendi. Toplam {len(text_chunks)} chunk.")
+            logger.info(f"Vektör veritabanı başarıyla yüklendi. Toplam {len(text_chunks)} chunk.")
             return text_chunks, sources, embeddings
         except FileNotFoundError:
-            print(f"HATA: Embedding dosyası bulunamadı! Lütfen önce 'scripts/ingest.py' script'ini çalıştırın.")
+            logger.error("Embedding dosyası bulunamadı! Lütfen önce 'scripts/ingest.py' script'ini çalıştırın.")
             raise
 
     def add_knowledge(self, text: str, source: str):
         """
         Dynamically adds new knowledge to the vector database (memory + disk).
         """
+        import pandas as pd
+        import torch
         try:
-            print(f"Adding new knowledge from source: {source}")
+            logger.info(f"Adding new knowledge from source: {source}")
             
             # 1. Compute embedding
             with torch.no_grad():
@@ -101,86 +147,46 @@ class RAGEngine:
                 }])
                 df = pd.concat([df, new_row], ignore_index=True)
                 df.to_parquet(settings.PROCESSED_DATA_PATH)
-                print("Knowledge successfully saved to Parquet.")
+                logger.info("Knowledge successfully saved to Parquet.")
                 
                 # 4. Invalidate Cache
                 # This ensures the next query (likely the same one) doesn't hit the stale cache
                 self.clear_cache()
                 
             except Exception as e:
-                print(f"Error saving to parquet: {e}")
+                logger.error(f"Error saving to parquet: {e}")
 
         except Exception as e:
-            print(f"Error adding knowledge: {e}")
+            logger.error(f"Error adding knowledge: {e}")
 
     # ==================== CACHE METHODS ====================
-    def _get_cache_key(self, query: str, top_k: int) -> str:
-        """Sorgu için unique cache key üretir"""
-        key_str = f"{query.lower().strip()}_{top_k}"
-        return hashlib.md5(key_str.encode()).hexdigest()
-
-    def _get_from_cache(self, cache_key: str):
-        """Cache'den sonuç getirir (LRU - en son kullanılanı güncelle)"""
-        if cache_key in self._query_cache:
-            # LRU: En son kullanılanı en sona taşı
-            self._query_cache.move_to_end(cache_key)
-            return self._query_cache[cache_key]
-        return None
-
-    def _save_to_cache(self, cache_key: str, results: list):
-        """Sonucu cache'e kaydeder (LRU mantığı)"""
-        if len(self._query_cache) >= self.cache_size:
-            # En eski elemanı sil (FIFO - OrderedDict'in ilk elemanı)
-            self._query_cache.popitem(last=False)
-        self._query_cache[cache_key] = results
+    def _get_cache_key(self, normalized: str, top_k: int, query_hash: str = None) -> str:
+        """Sorgu için unique cache key üretir; query_hash (QuestionContext) verildiyse tekrar hashlenmez"""
+        return f"{query_hash or text_hash(normalized)}_{top_k}"
 
     def clear_cache(self):
         """Cache'i temizler"""
         self._query_cache.clear()
         self._semantic_cache.clear()
-        self._semantic_cache_queries.clear()
-        print("✅ Cache temizlendi")
+        logger.info("Cache temizlendi")
 
     def get_cache_stats(self) -> dict:
-        """Cache istatistiklerini döndürür"""
+        """Cache istatistiklerini döndürür (hit/miss/eviction ve tahmini kazanılan süre dahil)"""
         return {
             "enabled": self.enable_cache,
-            "exact_cache_size": len(self._query_cache),
-            "semantic_cache_size": len(self._semantic_cache),
-            "max_size": self.cache_size,
-            "semantic_threshold": self.semantic_cache_threshold
+            "exact": self._query_cache.get_stats(),
+            "semantic": self._semantic_cache.get_stats()
         }
-    
-    def _find_semantic_match(self, query_embedding):
-        """Semantik olarak benzer cached sorgu var mı?"""
-        if not self._semantic_cache:
-            return None
-        
-        # Tüm cache embeddingler ile karşılaştır
-        cached_embeddings = torch.stack([item[0] for item in self._semantic_cache])
-        similarities = util.cos_sim(query_embedding, cached_embeddings)[0]
-        
-        max_idx = similarities.argmax()
-        max_sim = similarities[max_idx].item()
-        
-        if max_sim >= self.semantic_cache_threshold:
-            print(f"💡 Semantic cache hit! (benzerlik: {max_sim:.2%})")
-            print(f"   Orijinal sorgu: '{self._semantic_cache_queries[max_idx]}'")
-            return self._semantic_cache[max_idx][1]  # Cached results
-        
-        return None
-    
-    def _save_to_semantic_cache(self, query_embedding, query_text, results):
-        """Semantic cache'e kaydet"""
-        if len(self._semantic_cache) >= self.cache_size:
-            self._semantic_cache.pop(0)
-            self._semantic_cache_queries.pop(0)
-        
-        self._semantic_cache.append((query_embedding.cpu(), results))
-        self._semantic_cache_queries.append(query_text)
+
+    @staticmethod
+    def _semantic_scores(query_embedding, cached_embeddings: list):
+        import torch
+        from sentence_transformers import util
+        return util.cos_sim(query_embedding, torch.stack(cached_embeddings))[0].tolist()
     # ======================================================
 
-    def retrieve(self, query: str, top_k: int = 5, similarity_threshold: float = 0.3, use_cache: bool = None) -> list[dict]:
+    def retrieve(self, query: str, top_k: int = 5, similarity_threshold: float = 0.3, use_cache: bool = None,
+                 embedding=None, normalized: str = None, query_hash: str = None) -> list[dict]:
         """
         Anlamsal arama yapar ve metin parçalarını kaynak bilgileriyle birlikte döndürür.
         
@@ -189,48 +195,63 @@ class RAGEngine:
             top_k: En benzer kaç sonuç döndürülecek
             similarity_threshold: Minimum benzerlik skoru
             use_cache: Cache kullanımı (None ise self.enable_cache kullanılır)
+            embedding: query için embed() ile önceden hesaplanmış vektör (sorgu genişletilmezse tekrar kullanılır)
+            normalized: query'nin normalize_text() hali (QuestionContext.normalized; verilmezse burada hesaplanır)
+            query_hash: normalized'ın text_hash() değeri (QuestionContext.query_hash)
         """
+        import torch
+        from sentence_transformers import util
+
         # Cache kontrolü
         if use_cache is None:
             use_cache = self.enable_cache
         
+        started = time.perf_counter()
+        normalized_query = normalized if normalized is not None else normalize_text(query)
         if use_cache:
-            cache_key = self._get_cache_key(query, top_k)
-            cached = self._get_from_cache(cache_key)
+            cache_key = self._get_cache_key(normalized_query, top_k, query_hash)
+            cached = self._query_cache.get(cache_key)
             if cached is not None:
-                print("💾 Cache hit!")
+                logger.debug("Retrieval cache hit")
                 return cached
 
         # Query expansion (GELİŞTİRİLMİŞ - v3.0)
+        # Anahtar kelimeler normalize metinde (Türkçe karaktersiz) aranır; cache anahtarıyla tutarlı kalır
         search_query = query
-        query_lower = query.lower()
+        query_lower = normalized_query
         
         # 1. ÇAP başvuru koşulları (pozitif + negatif sorular)
-        if ("çift anadal" in query_lower or "çap" in query_lower) and \
-           ("koşul" in query_lower or "şart" in query_lower or "nasıl" in query_lower or 
-            "kimler" in query_lower or "başvuramaz" in query_lower or "yapamaz" in query_lower):
-            print("--- INFO: 'ÇAP Koşulları' sorgu genişletmesi (v3.0) ---")
+        if ("cift anadal" in query_lower or "cap" in query_lower) and \
+           ("kosul" in query_lower or "sart" in query_lower or "nasil" in query_lower or 
+            "kimler" in query_lower or "basvuramaz" in query_lower or "yapamaz" in query_lower):
+            logger.debug("'ÇAP Koşulları' sorgu genişletmesi (v3.0)")
             search_query = f"{query} ÇAP başvuru koşulları AGNO GANO genel not ortalaması en az kaç olmalı anadal başarı sırası şartı kabul"
         
         # 2. ÇAP başarısızlık/ara sınıf durumları
-        elif ("çap" in query_lower or "çift anadal" in query_lower) and \
-             ("kalırsa" in query_lower or "başarısız" in query_lower or "ara sınıf" in query_lower or 
-              "düşürse" in query_lower or "etkilemez" in query_lower):
-            print("--- INFO: 'ÇAP Başarısızlık' sorgu genişletmesi ---")
+        elif ("cap" in query_lower or "cift anadal" in query_lower) and \
+             ("kalirsa" in query_lower or "basarisiz" in query_lower or "ara sinif" in query_lower or 
+              "dusurse" in query_lower or "etkilemez" in query_lower):
+            logger.debug("'ÇAP Başarısızlık' sorgu genişletmesi")
             search_query = f"{query} ÇAP başarısızlık mezuniyet etkilemez ana dal transkript ayrı program"
 
-        # Embedding oluştur (optimized - no gradient)
-        with torch.no_grad():
-            query_embedding = self.embedding_model.encode(
-                search_query,
-                convert_to_tensor=True,
-                device=self.device,
-                show_progress_bar=False
-            )
+        # Embedding oluştur (optimized - no gradient); intake'te hesaplanmışsa tekrar kullan
+        if embedding is not None and search_query == query:
+            query_embedding = embedding
+        else:
+            query_embedding = self.embed(search_query)
+
+        if use_cache:
+            cached = self._semantic_cache.get(query_embedding.cpu(), scope=top_k)
+            if cached is not None:
+                logger.debug("Semantic retrieval cache hit")
+                self._query_cache.put(cache_key, cached)
+                return cached
+        search_started = time.perf_counter()
         
         # Similarity search
-        scores = util.dot_score(query_embedding, self.embeddings)[0]
-        top_results = torch.topk(scores, k=min(top_k, len(self.embeddings)))
+        with STAGE_LATENCY.time(stage="search"), span("search", top_k=top_k):
+            scores = util.dot_score(query_embedding, self.embeddings)[0]
+            top_results = torch.topk(scores, k=min(top_k, len(self.embeddings)))
 
         # Sonuçları filtrele
         results = []
@@ -238,15 +259,29 @@ class RAGEngine:
             if score > similarity_threshold:
                 results.append({
                     "text": self.text_chunks[idx],
-                    "source": self.sources[idx]
+                    "source": self.sources[idx],
+                    "score": score.item()
                 })
         
-        # Cache'e kaydet
+        # Cache'e kaydet (maliyet: exact hit encode + search'ü, semantic hit sadece search'ü kazandırır)
         if use_cache:
-            self._save_to_cache(cache_key, results)
+            now = time.perf_counter()
+            self._query_cache.put(cache_key, results, cost=now - started)
+            self._semantic_cache.put(query_embedding.cpu(), results, cost=now - search_started, scope=top_k)
         
         return results
     
+    def embed(self, text: str):
+        """Metnin embedding vektörünü (torch tensor) döndürür."""
+        import torch
+        with STAGE_LATENCY.time(stage="encode"), span("encode"), torch.no_grad():
+            return self.embedding_model.encode(
+                text,
+                convert_to_tensor=True,
+                device=self.device,
+                show_progress_bar=False
+            )
+
     def _clean_llm_output(self, text: str) -> str:
         """LLM çıktısındaki istenmeyen tüm etiketleri ve formatlamayı temizler."""
         text = unicodedata.normalize('NFKC', text).strip()
@@ -275,20 +310,27 @@ class RAGEngine:
         
         return text
 
-    def generate(self, query: str, context: list[dict], is_web_search: bool = False) -> str:
-        """Verilen sorgu ve zenginleştirilmiş bağlam (context) ile cevap üretir."""
+    def generate(self, query: str, context: list[dict], is_web_search: bool = False, budget=None, report: dict = None) -> str:
+        """
+        Verilen sorgu ve zenginleştirilmiş bağlam (context) ile cevap üretir.
+
+        budget (AnswerBudget) verilirse cevap uzunluğu prompt kuralı ve token sınırıyla
+        kuyruk durumuna göre ayarlanır; None ise model serbest bırakılır.
+        report verilirse bu çağrının prompt boyutu, izlenen yol (cascade/hedge/failover)
+        ve cevabı üreten provider report["calls"] listesine eklenir (yavaş soru logu için).
+        """
+        length_rule = f"\n7. {budget.prompt_rule()}" if budget else ""
+        max_tokens = budget.max_tokens if budget else None
+
         context_str = ""
         for item in context:
             context_str += f"Kaynak: {item['source']}\nMetin: {item['text']}\n\n"
 
-        # --- DEBUG LOGGING ---
-        print("\n" + "="*40)
+        # Tam bağlam sadece debug seviyesinde yazılır (her soruda terminale döküm cevap yolunu yavaşlatıyordu)
         mode = "WEB SEARCH" if is_web_search else "RAG"
-        print(f"🔍 {mode} CONTEXT (Query: {query})")
-        print("="*40)
-        print(context_str.strip())
-        print("="*40 + "\n")
-        # ---------------------
+        logger.info(f"{mode} generate: {len(context)} kaynak, {len(context_str)} karakter bağlam")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"{mode} CONTEXT (Query: {query})\n{context_str.strip()}")
 
         if is_web_search:
             # --- WEB SEARCH PROMPT (ESNEK) ---
@@ -306,7 +348,7 @@ KURALLAR:
 3. "NO_CONTEXT" DEME. Elindeki bilgiyle yardımcı olmaya çalış.
 4. EĞER aranan bölüm/konu metinde yoksa ama "şu fakülte altında", "şu isimle geçiyor" gibi bir açıklama varsa, BU BİLGİYİ KULLANARAK CEVAP VER. (Örn: Matematik -> Mühendislik ve Doğa Bilimleri altındadır gibi).
 5. Tek paragraf, Türkçe, net ve anlaşılır özetle.
-6. Cevabı DOĞRUDAN başlat.
+6. Cevabı DOĞRUDAN başlat.{length_rule}
             """
         else:
             # --- RAG PROMPT (GÜVENLİ/KATI) ---
@@ -324,86 +366,310 @@ Soru: {query}
 3. Bağlam (Context) soruyla tamamen alakasızsa, "NO_CONTEXT" yaz.
 4. "Bu metinde bilgi yok" veya "Bilmiyorum" deme, sadece "NO_CONTEXT" çıktısı ver.
 5. Cevabı DOĞRUDAN başlat - "Cevap:", "Yanıt:" gibi başlık KULLANMA.
-6. Tek paragraf, Türkçe, net ve kısa cevap ver.
+6. Tek paragraf, Türkçe, net ve kısa cevap ver.{length_rule}
             """
 
-        payload = {
-            "model": settings.LLM_MODEL,
-            "prompt": prompt,
-            "stream": True
-        }
-        
-        # --- OPENAI ENTEGRASYONU ---
+        call = None
+        if report is not None:
+            call = {
+                "mode": "web" if is_web_search else "rag",
+                "prompt_chars": len(prompt),
+                "prompt_tokens": estimate_tokens(prompt),
+                "max_tokens": max_tokens,
+                "path": []
+            }
+            report.setdefault("calls", []).append(call)
+
+        if settings.LLM_CASCADE_ENABLED and not is_web_search and self._is_tier_available(settings.LLM_CASCADE_FAST_PROVIDER):
+            yield from self._observe_generation(self._generate_cascade(prompt, context, max_tokens, call), mode="cascade")
+            return
+
+        yield from self._observe_generation(self._generate_large(prompt, max_tokens, call), mode="web" if is_web_search else "large")
+
+    @staticmethod
+    def _observe_generation(chunks, mode: str):
+        """Akışın ilk parça ve toplam süresini metriklere ve aktif ize kaydeder."""
+        start = time.perf_counter()
+        first_chunk = True
+        try:
+            for chunk in traced_stream("llm.generate", chunks, mode=mode):
+                if first_chunk:
+                    STAGE_LATENCY.observe(time.perf_counter() - start, stage="llm_first_token")
+                    first_chunk = False
+                yield chunk
+        finally:
+            STAGE_LATENCY.observe(time.perf_counter() - start, stage="llm_total")
+
+    # ==================== MODEL CASCADE ====================
+    def _is_tier_available(self, provider: str) -> bool:
+        """Verilen provider için istemci hazır mı?"""
+        if provider == "openai":
+            return self.openai_client is not None
+        return provider == "ollama"
+
+    def _large_tier(self) -> tuple[str, str]:
+        """Büyük (varsayılan) modelin provider ve model adını döndürür."""
         if settings.LLM_PROVIDER == "openai" and self.openai_client:
-            try:
-                stream = self.openai_client.chat.completions.create(
-                    model=settings.OPENAI_MODEL_NAME,
-                    messages=[
-                        {"role": "system", "content": "Sen bir üniversite yönetmelik uzmanısın."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    stream=True,
-                )
+            return "openai", settings.OPENAI_MODEL_NAME
+        return "ollama", settings.LLM_MODEL
 
-                buffer = ""
-                is_start_cleaned = False
-                
-                for chunk in stream:
-                    if chunk.choices[0].delta.content:
-                        text_chunk = chunk.choices[0].delta.content
-                        
-                        if not is_start_cleaned:
-                            buffer += text_chunk
-                            if len(buffer) >= 50: # OpenAI daha temiz dönüyor, buffer'ı kısa tutabiliriz
-                                cleaned_buffer = self._clean_llm_output(buffer)
-                                yield cleaned_buffer
-                                is_start_cleaned = True
-                                buffer = ""
-                        else:
-                            yield text_chunk
-                
-                if buffer and not is_start_cleaned:
-                    cleaned_buffer = self._clean_llm_output(buffer)
-                    yield cleaned_buffer
-                    
-                return # OpenAI bitti, fonksiyondan çık
-                
+    def _cascade_escalation_reason(self, answer: str) -> str | None:
+        """Hızlı modelin cevabı yetersizse yükseltme nedenini döndürür, yeterliyse None."""
+        stripped = answer.strip()
+        if not stripped:
+            return "empty_answer"
+        if "NO_CONTEXT" in stripped:
+            return "no_context"
+        if len(stripped) < settings.LLM_CASCADE_MIN_ANSWER_CHARS:
+            return "short_answer"
+        return None
+
+    def _record_tier_latency(self, tier: str, elapsed: float):
+        with self._cascade_lock:
+            stats = self._cascade_stats["tiers"][tier]
+            stats["calls"] += 1
+            stats["total_seconds"] += elapsed
+            stats["max_seconds"] = max(stats["max_seconds"], elapsed)
+
+    def _generate_cascade(self, prompt: str, context: list[dict], max_tokens: int = None, report: dict = None):
+        """
+        Önce hızlı modeli dener, ucuz sezgisel kontrollerle cevabı doğrular ve
+        sadece gerektiğinde büyük modele yükseltir.
+        """
+        top_score = max((item.get("score", 0.0) for item in context), default=0.0)
+
+        if top_score < settings.LLM_CASCADE_MIN_RETRIEVAL_SCORE:
+            reason = "low_retrieval_score"
+        elif not self._breakers[settings.LLM_CASCADE_FAST_PROVIDER].allow_request():
+            reason = "fast_circuit_open"
+        else:
+            fast_provider = settings.LLM_CASCADE_FAST_PROVIDER
+            fast_model = settings.LLM_CASCADE_FAST_MODEL
+            if report is not None:
+                report["path"].append(f"fast:{fast_provider}/{fast_model}")
+            start = time.perf_counter()
+            try:
+                fast_answer = "".join(self._stream_tier(fast_provider, fast_model, prompt, max_tokens))
+                self._breakers[fast_provider].record_success()
+                reason = self._cascade_escalation_reason(fast_answer)
             except Exception as e:
-                logger.error(f"OpenAI Hatası: {e}")
-                yield f"OpenAI API ile iletişimde hata oluştu: {str(e)}"
+                self._breakers[fast_provider].record_failure()
+                logger.warning(f"Cascade hızlı model hatası ({fast_provider}/{fast_model}): {e}")
+                self._raise_if_deadline_expired(e)
+                reason = "fast_error"
+            self._record_tier_latency("fast", time.perf_counter() - start)
+
+            if reason is None:
+                with self._cascade_lock:
+                    self._cascade_stats["requests"] += 1
+                    self._cascade_stats["accepted_fast"] += 1
+                if report is not None:
+                    report["provider"] = fast_provider
+                yield fast_answer
                 return
 
-        # --- OLLAMA (ESKİ YÖNTEM) ---
+        logger.info(f"Cascade: büyük modele yükseltiliyor (neden: {reason}, retrieval skoru: {top_score:.2f})")
+        with self._cascade_lock:
+            self._cascade_stats["requests"] += 1
+            self._cascade_stats["escalated"] += 1
+            reasons = self._cascade_stats["escalation_reasons"]
+            reasons[reason] = reasons.get(reason, 0) + 1
+        FALLBACKS.inc(kind="cascade_escalation")
+        if report is not None:
+            report["path"].append(f"escalate:{reason}")
+
+        start = time.perf_counter()
         try:
-            api_url = urljoin(settings.OLLAMA_URL, "/api/generate")
-            response = requests.post(api_url, json=payload, stream=True, timeout=300)
-            response.raise_for_status()
-            
-            buffer = ""
-            is_start_cleaned = False
-            
-            for line in response.iter_lines():
-                if line:
-                    chunk = json.loads(line)
-                    text_chunk = chunk['response']
-                    
-                    if not is_start_cleaned:
-                        buffer += text_chunk
-                        if len(buffer) >= 100:
-                            cleaned_buffer = self._clean_llm_output(buffer)
-                            yield cleaned_buffer
-                            is_start_cleaned = True
-                            buffer = ""
-                    else:
-                        yield text_chunk
-            
-            if buffer and not is_start_cleaned:
-                cleaned_buffer = self._clean_llm_output(buffer)
-                yield cleaned_buffer
-                        
+            yield from self._generate_large(prompt, max_tokens, report)
+        finally:
+            # Hata, deadline ya da tüketicinin akışı erken kapatması durumunda da gecikme kaydedilir
+            self._record_tier_latency("large", time.perf_counter() - start)
+
+    def get_cascade_stats(self) -> dict:
+        """Cascade katmanlarının gecikme ve yükseltme istatistiklerini döndürür."""
+        with self._cascade_lock:
+            requests_total = self._cascade_stats["requests"]
+            tiers = {}
+            for tier, stats in self._cascade_stats["tiers"].items():
+                tiers[tier] = {
+                    **stats,
+                    "avg_seconds": stats["total_seconds"] / stats["calls"] if stats["calls"] else 0.0
+                }
+            return {
+                "enabled": settings.LLM_CASCADE_ENABLED,
+                "fast_model": f"{settings.LLM_CASCADE_FAST_PROVIDER}/{settings.LLM_CASCADE_FAST_MODEL}",
+                "requests": requests_total,
+                "accepted_fast": self._cascade_stats["accepted_fast"],
+                "escalated": self._cascade_stats["escalated"],
+                "escalation_rate": self._cascade_stats["escalated"] / requests_total if requests_total else 0.0,
+                "escalation_reasons": dict(self._cascade_stats["escalation_reasons"]),
+                "tiers": tiers
+            }
+    # ======================================================
+
+    # ==================== HEDGING & FAILOVER ====================
+    def _alternate_tier(self, provider: str) -> tuple[str, str] | None:
+        """OpenAI <-> Ollama yedek provider'ını döndürür (kullanılamıyorsa None)."""
+        if provider == "openai":
+            return "ollama", settings.LLM_MODEL
+        if self.openai_client:
+            return "openai", settings.OPENAI_MODEL_NAME
+        return None
+
+    def _large_attempts(self, prompt: str, max_tokens: int = None) -> list:
+        """
+        Büyük model için deneme sırasını kurar. Circuit breaker'ı açık olan provider
+        sıranın sonuna atılır; böylece bozuk provider beklenmeden atlanır.
+        """
+        primary = self._large_tier()
+        alternate = self._alternate_tier(primary[0])
+
+        tiers = []
+        if self._breakers[primary[0]].allow_request():
+            tiers.append(primary)
+        else:
+            logger.warning(f"Circuit breaker açık: '{primary[0]}' atlanıyor.")
+
+        if alternate and (settings.LLM_HEDGE_ENABLED or not tiers) and self._breakers[alternate[0]].allow_request():
+            tiers.append(alternate)
+
+        if not tiers:
+            # Tüm provider'lar kapalıysa yine de birincil provider denenir
+            tiers.append(primary)
+
+        return [
+            (provider, lambda provider=provider, model=model: self._stream_tier(provider, model, prompt, max_tokens), self._breakers[provider])
+            for provider, model in tiers
+        ]
+
+    def get_hedge_stats(self) -> dict:
+        """Hedge ve circuit breaker istatistiklerini döndürür."""
+        return {
+            "enabled": settings.LLM_HEDGE_ENABLED,
+            "first_token_deadline": settings.LLM_HEDGE_FIRST_TOKEN_SECONDS,
+            "counters": dict(self._hedge_stats),
+            "breakers": {name: breaker.get_stats() for name, breaker in self._breakers.items()}
+        }
+    # ======================================================
+
+    def _generate_large(self, prompt: str, max_tokens: int = None, report: dict = None):
+        """Varsayılan (büyük) modelle akış halinde cevap üretir; hataları kullanıcı mesajına çevirir."""
+        import requests
+        attempts = self._large_attempts(prompt, max_tokens)
+        provider = attempts[0][0]
+        if report is not None:
+            report["path"].append("large:" + "|".join(attempt[0] for attempt in attempts))
+        try:
+            yield from hedged_stream(attempts, settings.LLM_HEDGE_FIRST_TOKEN_SECONDS, stats=self._hedge_stats, report=report)
+        except DeadlineExceeded:
+            raise
         except requests.exceptions.RequestException as e:
-            print(f"Ollama API'sine bağlanırken hata oluştu: {e}")
+            self._raise_if_deadline_expired(e)
+            if report is not None:
+                report["error"] = str(e)
+            logger.error(f"Ollama API'sine bağlanırken hata oluştu: {e}")
             yield "Üzgünüm, yapay zeka sunucusuna bağlanırken bir sorun oluştu."
+        except Exception as e:
+            self._raise_if_deadline_expired(e)
+            if provider != "openai":
+                raise
+            if report is not None:
+                report["error"] = str(e)
+            logger.error(f"OpenAI Hatası: {e}")
+            yield f"OpenAI API ile iletişimde hata oluştu: {str(e)}"
+
+    @staticmethod
+    def _raise_if_deadline_expired(error: Exception):
+        """Provider zaman aşımı sorunun bütçesi dolduğu için olduysa hata mesajı yerine DeadlineExceeded fırlatır."""
+        deadline = current_deadline()
+        if deadline is not None and deadline.expired():
+            raise DeadlineExceeded(str(error)) from error
+
+    def _stream_tier(self, provider: str, model: str, prompt: str, max_tokens: int = None):
+        """Provider'a göre temizlenmiş metin parçalarını üretir. Hataları yukarı fırlatır."""
+        if provider == "openai":
+            chunks = self._clean_stream(self._stream_openai(prompt, model, max_tokens), buffer_size=50) # OpenAI daha temiz dönüyor, buffer'ı kısa tutabiliriz
+        else:
+            chunks = self._clean_stream(self._stream_ollama(prompt, model, max_tokens), buffer_size=100)
+        return traced_stream(f"llm.{provider}", chunks, model=model)
+
+    def _clean_stream(self, chunks, buffer_size: int):
+        """Akışın ilk kısmını biriktirip etiketlerden temizler, sonrasını olduğu gibi aktarır."""
+        buffer = ""
+        is_start_cleaned = False
+
+        for text_chunk in chunks:
+            if not is_start_cleaned:
+                buffer += text_chunk
+                if len(buffer) >= buffer_size:
+                    cleaned_buffer = self._clean_llm_output(buffer)
+                    yield cleaned_buffer
+                    is_start_cleaned = True
+                    buffer = ""
+            else:
+                yield text_chunk
+
+        if buffer and not is_start_cleaned:
+            cleaned_buffer = self._clean_llm_output(buffer)
+            yield cleaned_buffer
+
+    # --- OPENAI ENTEGRASYONU ---
+    def _stream_openai(self, prompt: str, model: str, max_tokens: int = None):
+        llm_scheduler.acquire("openai", model, tokens=estimate_tokens(prompt) + (max_tokens or 300))
+        extra = {"max_tokens": max_tokens} if max_tokens else {}
+        deadline = current_deadline()
+        if deadline is not None and deadline.expires_at is not None:
+            extra["timeout"] = deadline.timeout()
+        start = time.perf_counter()
+        usage = None
+        status = "ok"
+        try:
+            stream = self.openai_client.chat.completions.create(
+                model=model,
+                messages=[
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt}
+                ],
+                stream=True,
+                stream_options={"include_usage": True}, # Son parça token sayılarını taşır (ledger)
+                **extra
+            )
+            for chunk in stream:
+                if getattr(chunk, "usage", None):
+                    usage = chunk.usage
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except GeneratorExit:
+            status = "cancelled" # Hedge yarışını kaybeden akış da faturalanır
+            raise
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            record_call(
+                "generation", "openai", model,
+                prompt_tokens=getattr(usage, "prompt_tokens", 0) if usage else estimate_tokens(prompt),
+                completion_tokens=getattr(usage, "completion_tokens", 0),
+                seconds=time.perf_counter() - start,
+                status=status
+            )
+
+    # --- OLLAMA ---
+    def _stream_ollama(self, prompt: str, model: str, max_tokens: int = None):
+        # Sabit system mesajı Ollama'nın prompt prefix'ini tekrar kullanmasını sağlar
+        llm_scheduler.acquire("ollama", model, tokens=estimate_tokens(prompt) + (max_tokens or 300))
+        deadline = current_deadline()
+        timeout = deadline.timeout(settings.OLLAMA_TIMEOUT_SECONDS) if deadline else settings.OLLAMA_TIMEOUT_SECONDS
+        yield from ollama_manager.chat(
+            model,
+            [
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            options={"num_predict": max_tokens} if max_tokens else None,
+            timeout=timeout,
+            purpose="generation"
+        )
 
     def answer_query(self, query: str) -> str:
         """Tüm RAG sürecini yönetir: retrieval ve generation."""
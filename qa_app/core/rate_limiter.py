@@ -0,0 +1,130 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class TokenBucket:
+    """
+    Klasik token bucket: saniyede `rate` token dolar, en fazla `capacity` token birikir.
+    Thread-safe'tir.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        elapsed = now - self._last
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._last = now
+
+    def try_consume(self, amount: float = 1.0) -> bool:
+        """Yeterli token varsa düşer ve True döner; yoksa hiçbir şey düşmez."""
+        # Kapasiteden büyük istekler asla karşılanamayacağı için kapasiteye sabitlenir
+        amount = min(amount, self.capacity)
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= amount:
+                self._tokens -= amount
+                return True
+            return False
+
+    def time_until(self, amount: float = 1.0) -> float:
+        """`amount` token birikene kadar beklenmesi gereken süre (saniye)."""
+        amount = min(amount, self.capacity)
+        with self._lock:
+            self._refill(time.monotonic())
+            missing = amount - self._tokens
+            if missing <= 0:
+                return 0.0
+            return missing / self.rate if self.rate > 0 else float("inf")
+
+    @property
+    def tokens(self) -> float:
+        with self._lock:
+            self._refill(time.monotonic())
+            return self._tokens
+
+
+class ChatRateLimiter:
+    """
+    Sohbet mesajları için sınırlı bellekli, O(1) rate limiter.
+
+    - İzleyici başına token bucket (varsayılan: 30 saniyede 1 soru)
+    - LLM bütçesini koruyan global token bucket
+    - Uzun süre sessiz kalan izleyicilerin bucket'ları TTL ile silinir (OrderedDict başından,
+      amortize O(1)); izleyici sayısı ayrıca max_authors ile sınırlıdır
+    - Bastırılan mesajlar için sayaçlar
+    """
+
+    def __init__(self, per_user_rate: float, per_user_burst: float, global_rate: float, global_burst: float,
+                 idle_ttl: float = 600.0, max_authors: int = 50000):
+        self.per_user_rate = per_user_rate
+        self.per_user_burst = per_user_burst
+        self.idle_ttl = idle_ttl
+        self.max_authors = max_authors
+        self.global_bucket = TokenBucket(global_rate, global_burst) if global_rate > 0 else None
+        self._buckets = OrderedDict()  # author -> [TokenBucket, last_seen]
+        self._lock = threading.Lock()
+        self.stats = {
+            "allowed": 0,
+            "suppressed_user": 0,
+            "suppressed_global": 0,
+            "evicted": 0
+        }
+
+    def _evict(self, now: float):
+        while self._buckets:
+            _, (_, last_seen) = next(iter(self._buckets.items()))
+            if now - last_seen < self.idle_ttl and len(self._buckets) <= self.max_authors:
+                break
+            self._buckets.popitem(last=False)
+            self.stats["evicted"] += 1
+
+    def allow(self, author: str | None, exempt_user: bool = False) -> bool:
+        """
+        Mesaj kabul edilecekse True döner.
+
+        Args:
+            author: İzleyici adı (None ise sadece global limit uygulanır)
+            exempt_user: True ise izleyici limiti atlanır (ör. selamlamalar), global limit yine uygulanır
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._evict(now)
+
+            bucket = None
+            if author and not exempt_user:
+                entry = self._buckets.get(author)
+                if entry is None:
+                    entry = [TokenBucket(self.per_user_rate, self.per_user_burst), now]
+                    self._buckets[author] = entry
+                else:
+                    entry[1] = now
+                    self._buckets.move_to_end(author)
+                bucket = entry[0]
+
+                if bucket.time_until(1) > 0:
+                    self.stats["suppressed_user"] += 1
+                    return False
+
+            if self.global_bucket and not self.global_bucket.try_consume(1):
+                self.stats["suppressed_global"] += 1
+                return False
+
+            if bucket:
+                bucket.try_consume(1)
+            self.stats["allowed"] += 1
+            return True
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                **self.stats,
+                "tracked_authors": len(self._buckets),
+                "global_tokens": self.global_bucket.tokens if self.global_bucket else None
+            }
@@ -1,10 +1,42 @@
+import hashlib
 import re
 import unicodedata
 from difflib import SequenceMatcher
+from functools import cached_property
 import logging
 
 logger = logging.getLogger(__name__)
 
+TURKISH_REPLACEMENTS = {
+    'ı': 'i', 'ğ': 'g', 'ü': 'u', 'ş': 's', 'ö': 'o', 'ç': 'c',
+    'İ': 'i', 'Ğ': 'g', 'Ü': 'u', 'Ş': 's', 'Ö': 'o', 'Ç': 'c'
+}
+
+
+def normalize_text(text: str) -> str:
+    """
+    Sorunun tüm aşamalarda paylaşılan normalize hali (QuestionContext.normalized):
+    Türkçe karakterler sadeleşir, noktalama kalkar, küçük harfe çevrilir.
+    """
+    for tr_char, en_char in TURKISH_REPLACEMENTS.items():
+        text = text.replace(tr_char, en_char)
+    # lower() sonra: 'İ'.lower() 'i' + birleşik nokta üretir ve kelimeyi böler
+    text = text.lower()
+
+    text = re.sub(r'[^\w\s]', ' ', text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def text_hash(normalized: str) -> str:
+    """Normalize metnin sabit uzunluklu anahtarı (retrieval cache'i); intake'te bir kez hesaplanır."""
+    return hashlib.md5(normalized.encode()).hexdigest()
+
+
+# normalize() çıktısıyla (küçük harf, Türkçe karaktersiz) karşılaştırılır
+GREETING_WORDS = frozenset({"merhaba", "merhabalar", "hello", "selam", "selamlar", "hi", "gunaydin", "hey"})
+GREETING_PHRASES = ("iyi aksamlar",)
+
+
 class QueryRouter:
     def __init__(self):
         """
@@ -46,8 +78,7 @@ class QueryRouter:
             r'<\s*(system|prompt|instruction|admin|root)\s*>',
             r'```(system|user|assistant|prompt)',
         ]
-        
-        self.injection_regex = re.compile('|'.join(self.injection_patterns), re.IGNORECASE | re.UNICODE)
+        # Birleşik regex ilk injection kontrolünde derlenir (bkz. injection_regex)
         
         # Tehlikeli kelime kombinasyonları 
         self.danger_keywords_tr = {
@@ -128,7 +159,7 @@ class QueryRouter:
         
         for category, data in raw_chitchat_patterns.items():
             normalized_keywords = [
-                self._normalize_turkish(kw) for kw in data["keywords"]
+                self.normalize(kw) for kw in data["keywords"]
             ]
             self.chitchat_patterns[category] = {
                 "keywords": normalized_keywords,
@@ -139,31 +170,27 @@ class QueryRouter:
         
         logger.info(f"QueryRouter başlatıldı. {len(self.all_keywords_set)} chitchat pattern yüklendi.")
 
-    def _normalize_turkish(self, text: str) -> str:
-        """Türkçe karakterleri normalize eder ve küçük harfe çevirir."""
-        text = text.lower()
-        
-        replacements = {
-            'ı': 'i', 'ğ': 'g', 'ü': 'u', 'ş': 's', 'ö': 'o', 'ç': 'c',
-            'İ': 'i', 'Ğ': 'g', 'Ü': 'u', 'Ş': 's', 'Ö': 'o', 'Ç': 'c'
-        }
-        for tr_char, en_char in replacements.items():
-            text = text.replace(tr_char, en_char)
-        
-        text = re.sub(r'[^\w\s]', ' ', text)
-        text = re.sub(r'\s+', ' ', text).strip()
-        
-        return text
+    @cached_property
+    def injection_regex(self) -> re.Pattern:
+        return re.compile('|'.join(self.injection_patterns), re.IGNORECASE | re.UNICODE)
+
+    def normalize(self, text: str) -> str:
+        """
+        Türkçe karakterleri normalize eder, noktalamayı kaldırır ve küçük harfe çevirir.
+        is_injection_attempt / get_chitchat_response çağrılarına normalized= olarak verilebilir.
+        """
+        return normalize_text(text)
 
     def _calculate_similarity(self, str1: str, str2: str) -> float:
         """İki string arasındaki benzerliği hesaplar (0-1 arası)"""
         return SequenceMatcher(None, str1, str2).ratio()
 
-    def is_injection_attempt(self, query: str) -> bool:
+    def is_injection_attempt(self, query: str, normalized: str = None) -> bool:
         """
         Gelişmiş injection tespiti yapar.
         
         ÖNEMLİ: Hem orijinal hem normalize edilmiş metni kontrol eder.
+        normalized: Önceden normalize() ile hesaplanmış metin (verilmezse burada hesaplanır)
         """
         # 1. Regex kontrolü (orijinal metin)
         if self.injection_regex.search(query):
@@ -171,7 +198,8 @@ class QueryRouter:
             return True
         
         # 2. Normalize edilmiş metin üzerinde regex kontrolü
-        normalized = self._normalize_turkish(query)
+        if normalized is None:
+            normalized = self.normalize(query)
         if self.injection_regex.search(normalized):
             logger.warning(f" Injection detected (normalized regex): {query[:100]}")
             return True
@@ -204,13 +232,26 @@ class QueryRouter:
         
         # 6. Kod injection pattern'leri
         code_patterns = ['```', '<script', 'javascript:', 'onclick=', 'onerror=']
-        if any(pattern in query.lower() for pattern in code_patterns):
+        if any(pattern in words_lower for pattern in code_patterns):
             logger.warning(f" Code injection pattern detected")
             return True
         
         return False
 
-    def get_chitchat_response(self, query: str) -> str | None:
+    def is_greeting(self, query: str, normalized: str = None) -> bool:
+        """
+        Mesaj bir selamlama içeriyor mu? Kelime (token) bazında eşleşir; alt dize eşleşmesi
+        "tarihi" ya da "sehir" içindeki "hi"yi selamlama sayıp bilgi sorusunu düşük değerli yapardı.
+
+        normalized: Önceden normalize() ile hesaplanmış metin (verilmezse burada hesaplanır)
+        """
+        normalized_query = normalized if normalized is not None else self.normalize(query)
+        if not GREETING_WORDS.isdisjoint(normalized_query.split()):
+            return True
+        padded = f" {normalized_query} "
+        return any(f" {phrase} " in padded for phrase in GREETING_PHRASES)
+
+    def get_chitchat_response(self, query: str, normalized: str = None) -> str | None:
         """
         OPTİMİZE EDİLMİŞ chitchat tespiti.
         
@@ -218,8 +259,10 @@ class QueryRouter:
         1. Set lookup (O(1)) ile hızlı exact match
         2. Substring kontrolü sadece kısa sorgularda
         3. Fuzzy matching EN SON çare olarak
+
+        normalized: Önceden normalize() ile hesaplanmış metin (verilmezse burada hesaplanır)
         """
-        normalized_query = self._normalize_turkish(query)
+        normalized_query = normalized if normalized is not None else self.normalize(query)
         
         if not normalized_query or len(normalized_query) < 2:
             return "Lütfen bir soru sorun."
@@ -269,7 +312,7 @@ class QueryRouter:
 
     def debug_query(self, query: str) -> dict:
         """Sorgunun nasıl işlendiğini gösterir"""
-        normalized = self._normalize_turkish(query)
+        normalized = self.normalize(query)
         chitchat_response = self.get_chitchat_response(query)
         
         # En yakın pattern'i bul
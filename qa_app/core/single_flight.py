@@ -0,0 +1,105 @@
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    """Uçuştaki (in-flight) tek bir çağrının sonucunu taşır."""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.duplicates = 0
+
+
+class SingleFlight:
+    """
+    Aynı anahtarla eş zamanlı gelen çağrıları tek bir upstream çağrısında birleştirir.
+
+    İlk çağrı (leader) işi yapar; o sürerken aynı anahtarla gelen diğer çağrılar
+    leader'ın sonucunu bekler ve aynı sonucu (ya da aynı hatayı) alır.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.stats = {
+            "leaders": 0,
+            "coalesced": 0,
+            "wait_timeouts": 0
+        }
+
+    def begin(self, key: str, join: bool = True):
+        """
+        Bloklamadan uçuşa katılır. Leader ise işi yapıp finish() çağırmakla yükümlüdür;
+        değilse dönen çağrının event'i üzerinden sonucu bekleyebilir.
+
+        Args:
+            join: False ise sadece leader olunabilir; anahtar zaten uçuştaysa (None, False)
+                döner ve çağıran işi kendisi, uçuşa bağlanmadan yapar.
+
+        Returns:
+            (call, is_leader)
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                if not join:
+                    return None, False
+                call.duplicates += 1
+                self.stats["coalesced"] += 1
+                return call, False
+            call = _Call()
+            self._calls[key] = call
+            self.stats["leaders"] += 1
+            return call, True
+
+    def finish(self, key: str, call: _Call, result=None, error: Exception = None):
+        """Leader'ın sonucunu yayınlar ve anahtarı serbest bırakır."""
+        call.result = result
+        call.error = error
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+        call.event.set()
+
+    def do(self, key: str, fn, timeout: float = None):
+        """
+        fn() fonksiyonunu anahtar başına tek sefer çalıştırır.
+
+        Args:
+            timeout: Kopyaların leader'ı en fazla bekleyeceği süre (None = sınırsız).
+                Leader bu sürede bitmezse kopya TimeoutError alır; leader etkilenmez.
+
+        Returns:
+            (result, shared) - shared True ise sonuç başka bir çağrıdan paylaşılmıştır.
+        """
+        call, is_leader = self.begin(key)
+
+        if not is_leader:
+            logger.info(f"Single-flight: '{key[:60]}' zaten işleniyor, sonuç bekleniyor.")
+            if not call.event.wait(timeout):
+                with self._lock:
+                    self.stats["wait_timeouts"] += 1
+                raise TimeoutError(f"Single-flight: '{key[:60]}' için leader {timeout:.1f}s içinde bitmedi")
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            result = fn()
+        except Exception as e:
+            self.finish(key, call, error=e)
+            raise
+        self.finish(key, call, result=result)
+        return result, False
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {**self.stats, "in_flight": len(self._calls)}
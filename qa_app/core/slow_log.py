@@ -0,0 +1,96 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class SlowQuestionLog:
+    """
+    Cevap gecikmesi eşiği aşan soruları aşama kırılımıyla ayrı bir JSON Lines dosyasına yazar.
+
+    Gecikme, sorunun oluşturulmasından avatarın konuşmaya başlamasına kadar geçen süredir
+    (konuşma süresi dahil edilmez). Eşiğin altındaki sorular için sadece bir karşılaştırma
+    yapılır; kayıt hazırlama ve dosya yazma yalnızca yavaş sorularda olur.
+    """
+
+    def __init__(self, path: str, threshold_seconds: float, recent_size: int = 20):
+        self.path = path
+        self.threshold_seconds = threshold_seconds
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=recent_size)
+        self.stats = {
+            "observed": 0,
+            "slow": 0,
+            "write_errors": 0
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold_seconds > 0
+
+    def observe(self, ctx, latency: float):
+        """Soru eşiği aştıysa kaydını yazar."""
+        self.stats["observed"] += 1
+        if not self.enabled or latency < self.threshold_seconds:
+            return
+
+        entry = self._build_entry(ctx, latency)
+        logger.warning(
+            f"Yavaş soru ({latency:.1f}s > {self.threshold_seconds:.0f}s): '{entry['question']}' "
+            f"route={entry['route']} aşamalar={entry['timings']}"
+        )
+        with self._lock:
+            self.stats["slow"] += 1
+            self._recent.append({"question": entry["question"], "latency_seconds": entry["latency_seconds"], "at": entry["at"]})
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+            except Exception as e:
+                self.stats["write_errors"] += 1
+                logger.error(f"Yavaş soru logu yazılamadı ({self.path}): {e}")
+
+    @staticmethod
+    def _build_entry(ctx, latency: float) -> dict:
+        context = ctx.context or []
+        return {
+            "at": time.time(),
+            "trace_id": ctx.trace.trace_id if ctx.trace else None,
+            "question": ctx.cleaned_question,
+            "author": ctx.author,
+            "live": ctx.live,
+            "latency_seconds": round(latency, 3),
+            "queue_wait_seconds": round(ctx.queue_wait, 3),
+            "timings": {stage: round(seconds, 3) for stage, seconds in ctx.timings.items()},
+            "route": ctx.route,
+            "decisions": dict(ctx.decisions),
+            "retrieval": {
+                "count": len(context),
+                "scores": [round(item.get("score", 0.0), 4) for item in context],
+                "sources": [item.get("source") for item in context]
+            },
+            "generation": ctx.generation.get("calls", []), # prompt boyutu, cascade/hedge yolu, provider
+            "degradations": list(ctx.deadline.degradations) if ctx.deadline else [],
+            "budget_seconds": ctx.budget.seconds if ctx.budget else None,
+            "answer_chars": len(ctx.answer) if ctx.answer else 0,
+            "tts": {
+                "skipped": ctx.skip_tts,
+                "audio_bytes": ctx.audio_bytes,
+                "spoken_seconds": ctx.spoken_seconds
+            }
+        }
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                **self.stats,
+                "threshold_seconds": self.threshold_seconds,
+                "path": self.path,
+                "recent": list(self._recent)
+            }
@@ -0,0 +1,124 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+LOADING = "loading"
+READY = "ready"
+FAILED = "failed"
+
+
+class LazyComponent:
+    """
+    İlk kullanımda oluşturulan bileşen vekili (web search, YouTube, avatar gibi kritik olmayanlar).
+
+    Öznitelik erişimleri gerçek nesneye aktarılır; eş zamanlı ilk erişimlerde nesne bir kez
+    oluşturulur, diğerleri bekler. warm_in_background() ile kullanımdan önce arka planda
+    ısıtılabilir (ör. Chrome açılışı ilk cevabı bekletmesin).
+    """
+
+    def __init__(self, tracker: "StartupTracker", name: str, factory):
+        self._tracker = tracker
+        self._name = name
+        self._factory = factory
+        self._instance = None
+        self._lock = threading.Lock()
+        tracker._register(name, critical=False)
+
+    @property
+    def loaded(self) -> bool:
+        return self._instance is not None
+
+    def get(self):
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    self._instance = self._tracker._build(self._name, self._factory)
+        return self._instance
+
+    def warm_in_background(self):
+        threading.Thread(target=self._warm, name=f"warm-{self._name}", daemon=True).start()
+
+    def _warm(self):
+        try:
+            self.get()
+        except Exception:
+            pass # Hata tracker'a ve loga yazıldı; ilk kullanımda tekrar denenir
+
+    def __getattr__(self, attribute):
+        return getattr(self.get(), attribute)
+
+
+class StartupTracker:
+    """
+    Bileşenlerin başlangıç durumunu ve süresini tutar.
+
+    Kritik bileşenler (RAG, TTS, router, sınıflandırıcı) paralel yüklenir; hepsi hazır
+    olduğunda servis hazırdır (/ready). Kritik olmayanlar LazyComponent ile ertelenir.
+    """
+
+    def __init__(self):
+        self.started_at = time.time()
+        self._components = {}
+        self._lock = threading.Lock()
+
+    def _register(self, name: str, critical: bool):
+        with self._lock:
+            self._components.setdefault(name, {"status": PENDING, "critical": critical, "seconds": None, "error": None})
+
+    def _set(self, name: str, **fields):
+        with self._lock:
+            self._components[name].update(fields)
+
+    def _build(self, name: str, factory):
+        self._set(name, status=LOADING, error=None)
+        start = time.perf_counter()
+        try:
+            instance = factory()
+        except Exception as e:
+            seconds = time.perf_counter() - start
+            self._set(name, status=FAILED, seconds=round(seconds, 3), error=str(e))
+            logger.error(f"Bileşen başlatılamadı: {name} ({seconds:.2f}s): {e}")
+            raise
+        seconds = time.perf_counter() - start
+        self._set(name, status=READY, seconds=round(seconds, 3))
+        logger.info(f"Bileşen hazır: {name} ({seconds:.2f}s)")
+        return instance
+
+    def load_parallel(self, factories: dict, max_workers: int = None) -> dict:
+        """
+        Birbirinden bağımsız kritik bileşenleri paralel oluşturur; {isim: nesne} döndürür.
+        Biri başarısız olursa diğerleri bittikten sonra ilk hata yükseltilir.
+        """
+        for name in factories:
+            self._register(name, critical=True)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max_workers or len(factories), thread_name_prefix="startup") as executor:
+            futures = {name: executor.submit(self._build, name, factory) for name, factory in factories.items()}
+        # Executor kapanırken tüm thread'ler beklenir (gunicorn preload'da fork'tan önce iş kalmaz)
+        instances = {name: future.result() for name, future in futures.items()}
+        logger.info(f"Kritik bileşenler {time.perf_counter() - start:.2f}s içinde yüklendi: {', '.join(factories)}")
+        return instances
+
+    def lazy(self, name: str, factory) -> LazyComponent:
+        return LazyComponent(self, name, factory)
+
+    def is_ready(self) -> bool:
+        with self._lock:
+            critical = [component for component in self._components.values() if component["critical"]]
+            return bool(critical) and all(component["status"] == READY for component in critical)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            components = {name: dict(component) for name, component in self._components.items()}
+        return {
+            "ready": self.is_ready(),
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "components": components
+        }
+
+
+startup = StartupTracker()
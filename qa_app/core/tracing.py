@@ -0,0 +1,272 @@
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from qa_app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Aktif span; alt span'ler ve derindeki çağrılar (retrieval, LLM, TTS, avatar) ebeveynlerini buradan bulur.
+# Deadline gibi spekülatif işlere ve hedge thread'lerine context kopyasıyla taşınır.
+_current_span = ContextVar("trace_span", default=None)
+
+
+class Span:
+    __slots__ = ("trace", "span_id", "parent_id", "name", "start", "end", "attributes", "error")
+
+    def __init__(self, trace: "Trace", span_id: int, parent_id: int | None, name: str, start: float, attributes: dict):
+        self.trace = trace
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.name = name
+        self.start = start
+        self.end = None
+        self.attributes = attributes
+        self.error = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def to_dict(self, origin: float) -> dict:
+        entry = {
+            "id": self.span_id,
+            "parent": self.parent_id,
+            "name": self.name,
+            "start_ms": round((self.start - origin) * 1000, 1),
+            "duration_ms": round((self.end - self.start) * 1000, 1) if self.end is not None else None
+        }
+        if self.attributes:
+            entry["attrs"] = self.attributes
+        if self.error:
+            entry["error"] = self.error
+        return entry
+
+
+class Trace:
+    """
+    Tek bir sorunun sohbet mesajından avatarın konuşmayı bitirmesine kadarki izi.
+
+    origin, izin başlangıç anıdır (YouTube'da mesajın chat zaman damgası); tüm span
+    başlangıçları buna göre milisaniye olarak yazılır. Span'ler farklı pipeline
+    thread'lerinden eklenebilir.
+    """
+
+    def __init__(self, tracer: "Tracer", source: str, origin: float = None, **attributes):
+        self.tracer = tracer
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.source = source
+        self.created_at = time.time()
+        self.origin = origin if origin is not None else self.created_at
+        self.attributes = attributes
+        self.spans = []
+        self.events = {}
+        self.finished = False
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.root = self._new_span("question", None, self.origin, {})
+
+    def _new_span(self, name: str, parent_id: int | None, start: float, attributes: dict) -> Span:
+        with self._lock:
+            span = Span(self, next(self._ids), parent_id, name, start, attributes)
+            self.spans.append(span)
+            return span
+
+    def start_span(self, name: str, parent: Span = None, **attributes) -> Span:
+        parent = parent or self.root
+        return self._new_span(name, parent.span_id, time.time(), attributes)
+
+    def record(self, name: str, start: float, end: float, parent: Span = None, **attributes) -> Span:
+        """Başlangıç ve bitişi önceden bilinen span'i ekler (generator'lar gibi context'e bağlanamayan işler için)."""
+        span = self.start_span(name, parent, **attributes)
+        span.start, span.end = start, end
+        return span
+
+    def event(self, name: str, **attributes):
+        """Anlık bir olayı (ör. ilk ses) işaretler; aynı isimli olaylardan ilki tutulur."""
+        with self._lock:
+            if name not in self.events:
+                self.events[name] = (time.time(), attributes)
+
+    @contextmanager
+    def activate(self):
+        """Bu blok içindeki span() çağrıları bu izin kök span'ine bağlanır."""
+        token = _current_span.set(self.root)
+        try:
+            yield self
+        finally:
+            _current_span.reset(token)
+
+    def finish(self, status: str = "ok", **attributes):
+        """İzi kapatır ve tracer'a yazdırır (idempotent)."""
+        with self._lock:
+            if self.finished:
+                return
+            self.finished = True
+        self.root.end = time.time()
+        self.attributes.update(attributes)
+        self.tracer.write(self, status)
+
+    def to_dict(self, status: str) -> dict:
+        with self._lock:
+            spans = list(self.spans)
+            events = dict(self.events)
+
+        entry = {
+            "trace_id": self.trace_id,
+            "source": self.source,
+            "status": status,
+            "origin": self.origin,
+            "total_ms": round((self.root.end - self.origin) * 1000, 1),
+            **self.attributes,
+            "events": {
+                name: {"at_ms": round((at - self.origin) * 1000, 1), **attrs}
+                for name, (at, attrs) in events.items()
+            },
+            "spans": [span.to_dict(self.origin) for span in spans if span is not self.root]
+        }
+        first_output = events.get("first_audio") or events.get("first_text")
+        if first_output:
+            # İzleyicinin algıladığı gecikme: mesajın chat'e düşmesinden avatarın sesinin (ya da sadece metin cevabın) başlamasına
+            entry["perceived_latency_ms"] = round((first_output[0] - self.origin) * 1000, 1)
+        return entry
+
+
+class Tracer:
+    """Biten izleri JSON Lines dosyasına yazar (her satır bir soru)."""
+
+    def __init__(self, path: str, enabled: bool = True):
+        self.path = path
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.stats = {
+            "started": 0,
+            "written": 0,
+            "write_errors": 0
+        }
+
+    @classmethod
+    def from_settings(cls) -> "Tracer":
+        return cls(settings.TRACE_LOG_PATH, enabled=settings.TRACING_ENABLED)
+
+    def start_trace(self, source: str, origin: float = None, **attributes) -> Trace | None:
+        """Yeni iz başlatır; tracing kapalıysa None döner (tüm yardımcılar None'ı tolere eder)."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            self.stats["started"] += 1
+        return Trace(self, source, origin, **attributes)
+
+    def write(self, trace: Trace, status: str):
+        try:
+            line = json.dumps(trace.to_dict(status), ensure_ascii=False, default=str)
+            with self._lock:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+                self.stats["written"] += 1
+        except Exception as e:
+            with self._lock:
+                self.stats["write_errors"] += 1
+            logger.error(f"Trace yazılamadı ({self.path}): {e}")
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {**self.stats, "enabled": self.enabled, "path": self.path}
+
+
+def current_span() -> Span | None:
+    return _current_span.get()
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Aktif izin içinde alt span açar ve bloğun süresini kaydeder. Aktif iz yoksa
+    (ör. filler, değerlendirme script'leri) hiçbir şey yapmaz.
+    """
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+
+    child = parent.trace.start_span(name, parent, **attributes)
+    token = _current_span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        child.end = time.time()
+        _current_span.reset(token)
+
+
+def record_span(name: str, start: float, end: float = None, **attributes):
+    """Aktif izin altına, süresi dışarıda ölçülmüş bir span ekler (aktif iz yoksa no-op)."""
+    parent = _current_span.get()
+    if parent is not None:
+        parent.trace.record(name, start, end if end is not None else time.time(), parent, **attributes)
+
+
+def traced_stream(name: str, chunks, **attributes):
+    """
+    Generator'ı sararak akışın toplam süresini ve ilk parça gecikmesini span olarak kaydeder.
+    Generator'lar context'e güvenli şekilde bağlanamadığı için span aktif yapılmaz.
+    """
+    parent = _current_span.get()
+    if parent is None:
+        yield from chunks
+        return
+
+    start = time.time()
+    first_chunk_at = None
+    status = "ok"
+    try:
+        for chunk in chunks:
+            if first_chunk_at is None:
+                first_chunk_at = time.time()
+            yield chunk
+    except GeneratorExit:
+        status = "cancelled" # Hedge yarışını kaybeden ya da yarıda bırakılan akış
+        raise
+    except BaseException as e:
+        status = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        if first_chunk_at is not None:
+            attributes["first_chunk_ms"] = round((first_chunk_at - start) * 1000, 1)
+        if status != "ok":
+            attributes["status"] = status
+        parent.trace.record(name, start, time.time(), parent, **attributes)
+
+
+def current_trace() -> Trace | None:
+    parent = _current_span.get()
+    return parent.trace if parent is not None else None
+
+
+def trace_event(name: str, **attributes):
+    """Aktif ize anlık olay ekler (aktif iz yoksa no-op)."""
+    parent = _current_span.get()
+    if parent is not None:
+        parent.trace.event(name, **attributes)
+
+
+@contextmanager
+def activate(trace: Trace | None):
+    """trace None olabilir; bu durumda blok izlenmeden çalışır."""
+    if trace is None:
+        yield None
+        return
+    with trace.activate():
+        yield trace
+
+
+tracer = Tracer.from_settings()
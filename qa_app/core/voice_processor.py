@@ -160,11 +160,7 @@ class VoiceProcessor:
                 return None
             
             logger.info(f"Ses üretimi başlatıldı. Karakter: {len(clean_text)}")
-            print(f"\n{'='*50}")
-            print(f"🔊 OKUNACAK METİN:")
-            print(f"{'='*50}")
-            print(clean_text)
-            print(f"{'='*50}\n")
+            logger.debug(f"Okunacak metin: {clean_text}")
             
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             audio_file = self.audio_dir / f"response_{timestamp}.mp3"
@@ -1,6 +1,9 @@
-from openai import OpenAI
 from qa_app.config import settings
+from qa_app.core.llm_scheduler import llm_scheduler, estimate_tokens
+from qa_app.core.metrics import ERRORS
+from qa_app.core.ledger import record_call
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -8,6 +11,7 @@ class WebSearchAgent:
     def __init__(self):
         self.client = None
         if settings.OPENAI_API_KEY:
+            from openai import OpenAI
             self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
         else:
             logger.warning("OPENAI_API_KEY not found. Web search will not work.")
@@ -25,12 +29,21 @@ class WebSearchAgent:
             # Using the new model which supports search (e.g. gpt-5-search-api)
             # We rely on the model name to trigger the search capability natively.
             
+            llm_scheduler.acquire("openai", settings.OPENAI_SEARCH_MODEL, tokens=estimate_tokens(query) + 1000)
+            start = time.perf_counter()
             response = self.client.chat.completions.create(
                 model=settings.OPENAI_SEARCH_MODEL,
                 messages=[
                     {"role": "user", "content": query}
                 ]
             )
+            usage = getattr(response, "usage", None)
+            record_call(
+                "web_search", "openai", settings.OPENAI_SEARCH_MODEL,
+                prompt_tokens=getattr(usage, "prompt_tokens", 0),
+                completion_tokens=getattr(usage, "completion_tokens", 0),
+                seconds=time.perf_counter() - start
+            )
 
             return response.choices[0].message.content
 
@@ -38,4 +51,5 @@ class WebSearchAgent:
 
         except Exception as e:
             logger.error(f"Web Search Error: {e}")
+            ERRORS.inc(component="web_search")
             return f"Web araması sırasında hata oluştu: {str(e)}"
@@ -1,8 +1,8 @@
 
 import logging
-import pytchat
 import threading
 import time
+from qa_app.core.tracing import tracer, activate
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +24,7 @@ class YouTubeClient:
             return
 
         try:
+            import pytchat
             self.chat = pytchat.create(video_id=video_id)
             self.is_listening = True
             
@@ -38,7 +39,13 @@ class YouTubeClient:
                             
                             # No filter - pass everything to main app for classification (Knowledge vs Chitchat)
                             logger.info(f"Message from {author}: {message}")
-                            callback(author, message)
+
+                            # İz, mesajın chat'e düştüğü andan başlar (pytchat zaman damgası ms cinsinden)
+                            trace = tracer.start_trace("youtube", origin=self._chat_timestamp(c), author=author, message_id=c.id)
+                            if trace:
+                                trace.event("received")
+                            with activate(trace):
+                                callback(author, message)
                                 
                     except Exception as e:
                         logger.error(f"Error in chat listener: {e}")
@@ -54,6 +61,13 @@ class YouTubeClient:
             logger.error(f"Failed to start YouTube listener: {e}")
             self.is_listening = False
 
+    @staticmethod
+    def _chat_timestamp(item) -> float | None:
+        try:
+            return float(item.timestamp) / 1000.0
+        except (AttributeError, TypeError, ValueError):
+            return None
+
     def stop_listening(self):
         self.is_listening = False
         if self.chat:
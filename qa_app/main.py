@@ -2,15 +2,37 @@ import logging
 from flask import Flask, request, render_template, jsonify, Response
 import signal
 import sys
-import queue
 import threading
 import time
+import uuid
+import contextvars
+import hmac
+from functools import wraps
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 
 # DEĞİŞİKLİK BURADA ⬇️: Tam adresi veriyoruz
-from qa_app.core.router import QueryRouter
+from qa_app.core.router import QueryRouter, text_hash
 from qa_app.core.rag_engine import RAGEngine
 from qa_app.core.audio_engine import TTSEngine # YENİ
-from qa_app.core.avatar_controller import AvatarController # YENİ
+from qa_app.core.llm_scheduler import llm_scheduler, LANE_LIVE, LANE_WEB
+from qa_app.core.pipeline import QuestionPipeline, Stage
+from qa_app.core.question_scheduler import QuestionScheduler
+from qa_app.core.question_dedup import SemanticDeduplicator
+from qa_app.core.answer_budget import AnswerLengthPolicy, complete_sentences
+from qa_app.core.deadline import Deadline, DeadlineExceeded
+from qa_app.core.answer_cache import AnswerCache
+from qa_app.core.cache import InstrumentedCache, cache_registry
+from qa_app.core.question_context import QuestionContext
+from qa_app.core.chitchat_classifier import ChitchatClassifier
+from qa_app.core.rate_limiter import ChatRateLimiter
+from qa_app.core.single_flight import SingleFlight
+from qa_app.core.ollama_manager import ollama_manager
+from qa_app.core.metrics import metrics, STAGE_LATENCY, QUESTION_LATENCY, FALLBACKS, ERRORS, QUEUE_DEPTH
+from qa_app.core.tracing import tracer, activate, span, current_trace
+from qa_app.core.slow_log import SlowQuestionLog
+from qa_app.core.profiler import profiler
+from qa_app.core.ledger import question_ledger, collect_calls
+from qa_app.core.startup import startup
 from qa_app.config import settings # Bu zaten doğru yerde olduğu için değişmiyor
 
 logging.basicConfig(level=settings.LOG_LEVEL)
@@ -18,15 +40,6 @@ logger = logging.getLogger(__name__)
 
 # Flask'in template ve static klasörlerini doğru bulması için düzeltme
 # 'qa_app' içinden çalıştığı için bir üst klasöre çıkması gerekiyor
-app = Flask(__name__, template_folder='templates', static_folder='static')
-
-logging.basicConfig(level=settings.LOG_LEVEL)
-logger = logging.getLogger(__name__)
-
-app = Flask(__name__, template_folder='templates', static_folder='static')
-
-
-
 app = Flask(__name__, template_folder='templates', static_folder='static')
 import json
 import os
@@ -34,6 +47,7 @@ import os
 # --- Load Filler Data (Global) ---
 filler_data = []
 filler_index = 0
+filler_stats = {"played": 0, "preempted": 0}
 try:
     filler_path = os.path.join(settings.RAW_DATA_DIR, "../filler_qa.json") # qa_app/data/filler_qa.json
     if os.path.exists(filler_path):
@@ -46,33 +60,170 @@ except Exception as e:
     logger.error(f"Error loading filler data: {e}")
 
 
-# --- Motorları ve Yönlendiriciyi Başlatma ---
-logger.info("Sistem bileşenleri başlatılıyor...")
-try:
-    rag_engine = RAGEngine()
-    tts_engine = TTSEngine() # YENİ
-    avatar_controller = AvatarController() # YENİ: Avatar kontrolcüsünü başlat
-    query_router = QueryRouter() # Yönlendiriciyi başlat
-    
-    # WEB SEARCH AGENT
+# --- Hafif, süreç içi durum (import sırasında oluşturulur) ---
+# RATE LIMITING: İzleyici başına + global token bucket (sınırlı bellek, TTL ile temizlenir)
+chat_rate_limiter = ChatRateLimiter(
+    per_user_rate=1.0 / settings.CHAT_USER_INTERVAL_SECONDS,
+    per_user_burst=settings.CHAT_USER_BURST,
+    global_rate=settings.CHAT_GLOBAL_PER_MINUTE / 60.0,
+    global_burst=settings.CHAT_GLOBAL_BURST,
+    idle_ttl=settings.CHAT_AUTHOR_TTL_SECONDS
+)
+# /predict ayrı bir global bucket kullanır: web trafiği canlı yayın sohbetinin bütçesini tüketmez
+web_rate_limiter = ChatRateLimiter(
+    per_user_rate=1.0 / settings.CHAT_USER_INTERVAL_SECONDS,
+    per_user_burst=settings.CHAT_USER_BURST,
+    global_rate=settings.WEB_GLOBAL_PER_MINUTE / 60.0,
+    global_burst=settings.WEB_GLOBAL_BURST,
+    idle_ttl=settings.CHAT_AUTHOR_TTL_SECONDS
+)
+
+# SPEKÜLATİF İŞLER: Güvenlik/sınıflandırma ile retrieval'ı paralel çalıştırmak için
+# (thread'ler ilk iş geldiğinde oluşur; fork öncesi oluşturmak güvenlidir)
+speculative_executor = ThreadPoolExecutor(
+    max_workers=settings.SPECULATIVE_WORKERS, thread_name_prefix="speculative"
+)
+speculation_stats = {"retrievals": 0, "discarded": 0}
+
+# DEADLINE: Bütçe dolmak üzereyken kullanılacak son cevaplar ve kısaltma sayaçları
+answer_cache = AnswerCache(max_size=settings.ANSWER_CACHE_SIZE, ttl=settings.ANSWER_CACHE_TTL_SECONDS)
+audio_cache = InstrumentedCache("audio", max_size=settings.AUDIO_CACHE_SIZE)  # (metin, hız) -> TALKING_HEAD_PATH altındaki mp3
+deadline_stats = {}
+
+# LOAD SHEDDING: /predict için eş zamanlılık tavanı (aşılırsa 429 + Retry-After)
+web_slots = threading.BoundedSemaphore(settings.WEB_MAX_CONCURRENCY)
+load_shedding_stats = {"web_rejected_busy": 0, "web_rejected_rate_limit": 0}
+
+# SINGLE-FLIGHT: Aynı anda gelen özdeş soruları tek işleme indirger
+question_flight = SingleFlight()
+
+# Eşiği aşan soruların aşama kırılımı (eşik altı sorular için sadece bir karşılaştırma)
+slow_question_log = SlowQuestionLog(settings.SLOW_LOG_PATH, settings.SLOW_QUESTION_THRESHOLD_SECONDS)
+
+# --- Ağır bileşenler: init_components() / start_background() ile oluşturulur ---
+rag_engine = None
+tts_engine = None
+query_router = None
+chitchat_classifier = None
+
+# Kritik olmayanlar ilk kullanımda oluşturulur (avatar start_background'da arka planda ısıtılır).
+# Modülleri (selenium, pytchat, openai) de o an import edilir.
+def _create_web_search_agent():
     from qa_app.core.web_search_agent import WebSearchAgent
-    web_search_agent = WebSearchAgent()
+    return WebSearchAgent()
+
 
-    # YOUTUBE ENTEGRASYONU
+def _create_youtube_client():
     from qa_app.core.youtube_client import YouTubeClient
-    youtube_client = YouTubeClient()
-    
-    # AI CHITCHAT CLASSIFIER
-    from qa_app.core.chitchat_classifier import ChitchatClassifier
-    chitchat_classifier = ChitchatClassifier()
-    
-    # Rate Limiting Storage
-    user_last_question_time = {} # {author_name: timestamp}
+    return YouTubeClient()
+
+
+def _create_avatar_controller():
+    from qa_app.core.avatar_controller import AvatarController
+    return AvatarController()
+
+
+web_search_agent = startup.lazy("web_search", _create_web_search_agent)
+youtube_client = startup.lazy("youtube", _create_youtube_client)
+avatar_controller = startup.lazy("avatar", _create_avatar_controller)
+_background_started = False
+
+
+def init_components():
+    """
+    Modelleri ve istemcileri yükler (RAG, TTS, router, sınıflandırıcı).
+    Birbirinden bağımsız oldukları için paralel yüklenir; süreler /ready ve loglarda.
+    Süreç başına bir kez çalışır; gunicorn preload_app ile master süreçte çalışıp
+    worker'lara copy-on-write ile paylaşılır. Dönüşte arka planda thread kalmaz.
+    """
+    global rag_engine, tts_engine, query_router, chitchat_classifier
+    if rag_engine is not None:
+        return
 
+    logger.info("Sistem bileşenleri başlatılıyor...")
+    try:
+        components = startup.load_parallel({
+            "rag_engine": RAGEngine,
+            "tts_engine": TTSEngine,
+            "query_router": QueryRouter,
+            "chitchat_classifier": ChitchatClassifier
+        })
+    except Exception as e:
+        logger.error(f"Başlangıç sırasında KRİTİK HATA oluştu: {e}")
+        raise
+    tts_engine = components["tts_engine"]
+    query_router = components["query_router"]
+    chitchat_classifier = components["chitchat_classifier"]
+    rag_engine = components["rag_engine"] # En son: init_components'in tamamlandığını işaretler
     logger.info("Tüm bileşenler başarıyla yüklendi ve hazır.")
-except Exception as e:
-    logger.error(f"Başlangıç sırasında KRİTİK HATA oluştu: {e}")
-    raise
+
+
+def start_background():
+    """
+    Thread ve tarayıcı gerektiren kısımları başlatır: avatar (Chrome), Ollama ısıtma,
+    question pipeline ve YouTube dinleyicisi. Thread'ler fork'tan sağ çıkmadığı için
+    gunicorn'da post_fork hook'u ile worker içinde çağrılır.
+    """
+    global _background_started
+    if _background_started:
+        return
+    _background_started = True
+    init_components()
+
+    # Chrome açılışı sunucuyu bekletmez; playback ilk kullanımda hazır olmasını bekler
+    avatar_controller.warm_in_background()
+
+    # OLLAMA: Yerel modelleri önceden yükle ve bellekte tut (arka planda)
+    ollama_manager.warm_up()
+
+    # --- Question Pipeline ---
+    # intake → classification → retrieval → generation → synthesis → playback
+    question_pipeline.start()
+
+    # --- Auto-Start YouTube Listener if Configured ---
+    if settings.YOUTUBE_VIDEO_ID:
+        logger.info(f"Auto-starting YouTube listener for Video ID: {settings.YOUTUBE_VIDEO_ID}")
+        
+        def on_question_auto(author, message):
+            logger.info(f"YouTube sorusu alındı ({author}): {message}")
+            enqueue_question(author, message)
+
+        # Start listening
+        youtube_client.start_listening(settings.YOUTUBE_VIDEO_ID, on_question_auto)
+
+
+def shutdown():
+    """Pipeline'ı, YouTube dinleyicisini ve avatar tarayıcısını kapatır."""
+    logger.info("Shutdown: temizlik yapılıyor...")
+    question_pipeline.stop()
+    if youtube_client.loaded:
+        logger.info("Stopping YouTube client...")
+        youtube_client.stop_listening()
+    if avatar_controller.loaded:
+        logger.info("Closing Avatar controller...")
+        avatar_controller.close()
+    logger.info("Cleanup complete.")
+
+
+def create_app(start_workers: bool = False) -> Flask:
+    """
+    App factory. Modelleri yükler ve Flask uygulamasını döndürür.
+
+    start_workers=False iken arka plan işleri başlatılmaz (gunicorn preload'da master
+    süreç için); True ise tek süreçli çalıştırmalarda hepsi hemen başlatılır.
+    """
+    init_components()
+    if start_workers:
+        start_background()
+    return app
+
+
+@app.route("/ready", methods=["GET"])
+def ready():
+    """Readiness: kritik bileşenler yüklendiyse 200, değilse 503; bileşen başına durum ve süre."""
+    stats = startup.get_stats()
+    return jsonify(stats), 200 if stats["ready"] else 503
+
 
 @app.route("/")
 def index():
@@ -87,7 +238,8 @@ def text_to_speech():
         if not text:
             return jsonify({"error": "No text provided"}), 400
             
-        audio_stream = tts_engine.generate_audio_stream(text)
+        with llm_scheduler.lane(LANE_WEB):
+            audio_stream = tts_engine.generate_audio_stream(text)
         
         if not audio_stream:
             return jsonify({"error": "TTS engine failed"}), 500
@@ -98,187 +250,673 @@ def text_to_speech():
         logger.error(f"TTS Error: {e}")
         return jsonify({"error": str(e)}), 500
 
-def process_question(question: str):
+# ==================== SORU İŞLEME AŞAMALARI ====================
+# Her aşama soruya ait QuestionContext'i yerinde günceller ve devam edilecekse onu,
+# akış burada bitecekse None döndürür. Aynı aşamalar hem /predict için sırayla
+# (process_question) hem de YouTube kuyruğu için çok aşamalı pipeline'da kullanılır.
+
+def _parse_author(question: str) -> tuple[str | None, str]:
+    """KARAR AĞACI ADIM 0: Author Parsing (YouTube Entegrasyonu için)."""
+    if ": " in question:
+        possible_author, possible_msg = question.split(": ", 1)
+        # Basic heuristic: names are usually short, messages can be anything.
+        if len(possible_author) < 50: 
+            return possible_author, possible_msg
+    return None, question
+
+
+def _new_context(question: str) -> QuestionContext:
     """
-    RAG + TTS + Avatar akışını çalıştıran yardımcı fonksiyon.
+    Soru bağlamını oluşturur: author ayrıştırma, normalizasyon ve selamlama tespiti
+    burada bir kez yapılır, sonraki aşamalar tekrar hesaplamaz.
+    """
+    ctx = QuestionContext(question=question)
+    ctx.author, ctx.cleaned_question = _parse_author(question)
+    ctx.normalized = query_router.normalize(ctx.cleaned_question)
+    ctx.query_hash = text_hash(ctx.normalized)
+    ctx.is_greeting = query_router.is_greeting(ctx.cleaned_question, normalized=ctx.normalized)
+    return ctx
+
+
+def _admit(ctx: QuestionContext, limiter: ChatRateLimiter = chat_rate_limiter) -> bool:
+    """
+    KARAR AĞACI ADIM 0.5: Rate Limiting.
+    Hiçbir model çağrısından önce çalışır; selamlamalar izleyici limitine takılmaz
+    ama global LLM bütçesine dahildir. Web istekleri web_rate_limiter'ı kullanır.
+    """
+    if limiter.allow(ctx.author, exempt_user=ctx.is_greeting):
+        return True
+    logger.warning(f"Rate Limit: {ctx.author or 'anonim'} mesajı bastırıldı. Ignored.")
+    return False
+
+
+def stage_intake(ctx: QuestionContext):
+    """İşlemeye başlar: uçtan uca zaman bütçesi burada başlar ve tüm aşamalardan geçer."""
+    logger.info(f"Soru İşleniyor: '{ctx.question}'")
+    ctx.deadline = Deadline(settings.QUESTION_DEADLINE_SECONDS or None)
+    return ctx
+
+
+def _degrade(ctx: QuestionContext, action: str):
+    """Deadline yüzünden yapılan kısaltmayı soru bağlamına ve sayaçlara işler."""
+    ctx.deadline.degrade(action)
+    deadline_stats[action] = deadline_stats.get(action, 0) + 1
+    FALLBACKS.inc(kind=f"deadline_{action}")
+
+
+def _fallback_answer(ctx: QuestionContext, default: str | None) -> str | None:
+    """Yeni cevaba vakit yoksa önbellekteki cevabı, o da yoksa default'u döndürür."""
+    cached = answer_cache.get(_flight_key(ctx))
+    if cached:
+        _degrade(ctx, "cached_answer")
+        return cached
+    return default
+
+
+DEADLINE_APOLOGY = "Üzgünüm, bu soruya zamanında cevap yetiştiremedim."
+NO_INFO_ANSWER = "Üzgünüm, bu konuda bilgi bulamadım."
+UNCACHEABLE_PREFIXES = ("Üzgünüm", "OpenAI API ile iletişimde hata") # Özür ve provider hata mesajları saklanmaz
+
+
+def _answer_after_deadline(ctx: QuestionContext, partial_text: str) -> str:
+    """
+    Üretim bütçe dolduğu için kesildi: tam cümleli yarım cevap, yoksa önbellekteki cevap,
+    o da yoksa seslendirilmeyen (sadece metin) kısa bir özür.
+    """
+    partial = complete_sentences(partial_text)
+    if partial and "NO_CONTEXT" not in partial:
+        _degrade(ctx, "partial_answer")
+        return partial
+    cached = _fallback_answer(ctx, None)
+    if cached:
+        return cached
+    _degrade(ctx, "text_only")
+    ctx.skip_tts = True
+    return DEADLINE_APOLOGY
+
+
+def _submit_speculative(fn, *args, **kwargs):
+    """İşi spekülatif havuzda, çağıranın context'i (scheduler şeridi vb.) ile çalıştırır."""
+    context = contextvars.copy_context()
+    return speculative_executor.submit(context.run, fn, *args, **kwargs)
+
+
+def _discard_speculative_retrieval(ctx: QuestionContext):
+    future = ctx.retrieval_future
+    if future is not None:
+        ctx.retrieval_future = None
+        future.cancel() # Henüz başlamadıysa hiç çalışmaz; başladıysa sonucu yok sayılır
+        speculation_stats["discarded"] += 1
+
+
+def stage_classify(ctx: QuestionContext):
+    """
+    Güvenlik kontrolü ve chitchat tespiti.
+    AI sınıflandırma ve retrieval paralel başlatılır; böylece bilgi sorularında
+    sınıflandırıcının ağ gecikmesi kritik yoldan çıkar. Soru chitchat ya da
+    injection çıkarsa spekülatif retrieval sonucu atılır.
     """
-    import time
-    import os
+    cleaned_question = ctx.cleaned_question
 
+    chitchat_future = _submit_speculative(chitchat_classifier.is_chitchat, cleaned_question, normalized=ctx.normalized)
+    ctx.retrieval_future = _submit_speculative(
+        rag_engine.retrieve, cleaned_question, 3,
+        embedding=ctx.embedding, normalized=ctx.normalized, query_hash=ctx.query_hash
+    )
+    speculation_stats["retrievals"] += 1
+
+    # KARAR AĞACI ADIM 1: GÜVENLİK KONTROLÜ (Cleaned question üzerinden)
+    with STAGE_LATENCY.time(stage="injection_check"), span("injection_check"):
+        is_injection = query_router.is_injection_attempt(cleaned_question, normalized=ctx.normalized)
+    if is_injection:
+        logger.warning(f"Potansiyel Prompt Injection: '{cleaned_question}'")
+        chitchat_future.cancel()
+        _discard_speculative_retrieval(ctx)
+        ctx.route = "injection"
+        ctx.answer = "Sorunuz güvenlik nedeniyle yanıtlanamadı."
+        return None
+
+    # KARAR AĞACI ADIM 2: AI DESTEKLİ CHITCHAT KONTROLÜ
+    # Yapay zekaya "Is this chitchat?" diye sorduk, cevabını bekliyoruz
     try:
-        logger.info(f"Soru İşleniyor: '{question}'")
-        
-        # KARAR AĞACI ADIM 0: Author Parsing (YouTube Entegrasyonu için)
-        author = None
-        cleaned_question = question
-        if ": " in question:
-            possible_author, possible_msg = question.split(": ", 1)
-            # Basic heuristic: names are usually short, messages can be anything.
-            if len(possible_author) < 50: 
-                author = possible_author
-                cleaned_question = possible_msg
-
-        # KARAR AĞACI ADIM 0.5: Rate Limiting & Greeting Detection
-        greetings = ["merhaba", "hello", "selam", "hi", "günaydın", "iyi akşamlar", "hey"]
-        lower_q = cleaned_question.lower()
-        is_greeting = any(g in lower_q for g in greetings)
+        is_chitchat = chitchat_future.result(timeout=ctx.deadline.timeout())
+    except FutureTimeoutError:
+        _degrade(ctx, "classifier_skipped")
+        is_chitchat = False
+    if is_chitchat:
+        logger.info(f"AI 'chitchat' tespiti yaptı: '{cleaned_question}'")
+        ctx.decide("chitchat", "ai")
+
+    # KARAR AĞACI ADIM 3: Normal Chitchat Kontrolü (Router'da varsa)
+    elif query_router.get_chitchat_response(cleaned_question, normalized=ctx.normalized):
+        logger.info(f"Router 'chitchat' tespiti yaptı: '{cleaned_question}'")
+        ctx.decide("chitchat", "router")
+        is_chitchat = True
+
+    if is_chitchat:
+        _discard_speculative_retrieval(ctx)
+        ctx.route = "chitchat"
+        # If chitchat detected + has author tag + IS GREETING -> Personalized Greeting
+        if ctx.author and ctx.is_greeting:
+            # "👋 Merhaba, hoşgeldin (username) sorunu sabırsızlıkla bekliyorum :)"
+            ctx.answer = f"👋 Merhaba, hoşgeldin {ctx.author} sorunu sabırsızlıkla bekliyorum :)"
+            ctx.skip_tts = True
+            return ctx
+        return None # Tamamen sessiz kal (Anonim chitchat veya Greeting olmayan)
+
+    ctx.route = "rag"
+    return ctx
+
+
+def stage_retrieve(ctx: QuestionContext):
+    """KARAR AĞACI ADIM 4a: Vektör veritabanında ilgili bağlamı bulur."""
+    if ctx.skip_tts:
+        return ctx
+    future = ctx.retrieval_future
+    ctx.retrieval_future = None
+    if future is not None:
+        # Sınıflandırma ile paralel başlatılan spekülatif retrieval'ın sonucu
+        try:
+            ctx.context = future.result(timeout=ctx.deadline.timeout())
+        except FutureTimeoutError:
+            _degrade(ctx, "retrieval_timeout")
+            ctx.context = []
+    else:
+        ctx.context = rag_engine.retrieve(
+            ctx.cleaned_question, top_k=3,
+            embedding=ctx.embedding, normalized=ctx.normalized, query_hash=ctx.query_hash
+        )
+    return ctx
+
+
+def stage_generate(ctx: QuestionContext):
+    """KARAR AĞACI ADIM 4b: Cevap üretimi ve gerekirse Web Search fallback."""
+    if ctx.skip_tts:
+        return ctx
+
+    started = time.perf_counter()
+    question = ctx.question
+    cleaned_question = ctx.cleaned_question
+
+    # Canlı yayında cevap uzunluğu kuyruk durumuna göre ayarlanır (web arayüzü serbest)
+    if ctx.live and settings.ANSWER_BUDGET_ENABLED:
+        ctx.budget = answer_length_policy.budget(
+            queue_depth=max(0, question_pipeline.in_flight() - 1),
+            oldest_age=question_scheduler.oldest_age()
+        )
+
+    deadline = ctx.deadline
+    if not deadline.has(settings.DEADLINE_MIN_GENERATION_SECONDS):
+        ctx.answer = _answer_after_deadline(ctx, "")
+        return ctx
+
+    rag_response = ""
+    try:
+        for chunk in rag_engine.generate(cleaned_question, ctx.context, budget=ctx.budget, report=ctx.generation):
+                rag_response += chunk
+    except DeadlineExceeded:
+        ctx.answer = _answer_after_deadline(ctx, rag_response)
+        return ctx
+    
+    # --- FALLBACK MECHANISM: WEB SEARCH ---
+    if "NO_CONTEXT" in rag_response or not rag_response.strip():
+        if not deadline.has(settings.DEADLINE_MIN_WEB_SECONDS):
+            # Web araması + ikinci LLM çağrısı bütçeye sığmaz
+            _degrade(ctx, "web_fallback_skipped")
+            ctx.answer = _fallback_answer(ctx, NO_INFO_ANSWER)
+            return ctx
+
+        logger.info("RAG cevapsız kaldı (NO_CONTEXT). Web Search agent devreye giriyor...")
+        ctx.route = "web"
+        FALLBACKS.inc(kind="web_search")
         
-        if author:
-            # If IT IS a greeting: Allow it (don't check timer), and don't update timer.
-            # If IT IS NOT a greeting: Check timer.
-            if not is_greeting:
-                last_time = user_last_question_time.get(author, 0)
-                if time.time() - last_time < 30:
-                    logger.warning(f"Rate Limit: {author} is asking too fast. Ignored.")
-                    return None # Ignore spam
-                else:
-                    # Update timer for valid question
-                    user_last_question_time[author] = time.time()
-
-        # KARAR AĞACI ADIM 1: GÜVENLİK KONTROLÜ (Cleaned question üzerinden)
-        if query_router.is_injection_attempt(cleaned_question):
-            logger.warning(f"Potansiyel Prompt Injection: '{cleaned_question}'")
-            return "Sorunuz güvenlik nedeniyle yanıtlanamadı."
-
-        # Avatar kullanımı için bayrak (Default: Aktif)
-        should_use_avatar = True
-        skip_tts = False  # New flag for text-only updates
-
-        # KARAR AĞACI ADIM 2: AI DESTEKLİ CHITCHAT KONTROLÜ
-        # Önce yapay zeka ile "Is this chitchat?" diye soruyoruz
-        is_chitchat = chitchat_classifier.is_chitchat(cleaned_question)
-        answer = None
+        # 1. Get raw info/context from Web Search
+        with STAGE_LATENCY.time(stage="web_search"), span("web_search"):
+            web_context_text = web_search_agent.search_and_answer(cleaned_question)
         
-        if is_chitchat:
-            logger.info(f"AI 'chitchat' tespiti yaptı: '{cleaned_question}'")
+        if web_context_text:
+            logger.info("Web Search context alındı. Main LLM ile işleniyor...")
             
-        if is_chitchat:
-            logger.info(f"AI 'chitchat' tespiti yaptı: '{cleaned_question}'")
+            # 2. Format as context for RAG Engine's generator
+            web_context_structured = [{
+                "text": web_context_text,
+                "source": "Web Search (GPT-5)"
+            }]
             
-            # If chitchat detected + has author tag + IS GREETING -> Personalized Greeting
-            if author and is_greeting:
-                # "👋 Merhaba, hoşgeldin (username) sorunu sabırsızlıkla bekliyorum :)"
-                answer = f"👋 Merhaba, hoşgeldin {author} sorunu sabırsızlıkla bekliyorum :)"
-                skip_tts = True
-            else:
-                return None # Tamamen sessiz kal (Anonim chitchat veya Greeting olmayan)
-
-        # KARAR AĞACI ADIM 3: Normal Chitchat Kontrolü (Router'da varsa)
-        if not answer: # Check if answer already set by Step 2
-            chitchat_answer_router = query_router.get_chitchat_response(cleaned_question)
-            if chitchat_answer_router:
-                 logger.info(f"Router 'chitchat' tespiti yaptı: '{cleaned_question}'")
-                 
-                 # Logic simplified since we detected is_greeting above
-                 if author and is_greeting:
-                     answer = f"👋 Merhaba, hoşgeldin {author} sorunu sabırsızlıkla bekliyorum :)"
-                     skip_tts = True
-                 else:
-                     return None # Tamamen sessiz kal
-
-        # KARAR AĞACI ADIM 4: BİLGİ SORGUSU (RAG)
-        if not answer: # Only run RAG if no answer yet
-            rag_response = ""
-            for chunk in rag_engine.answer_query(cleaned_question):
-                    rag_response += chunk
-            
-            # --- FALLBACK MECHANISM: WEB SEARCH ---
-            if "NO_CONTEXT" in rag_response or not rag_response.strip():
-                logger.info("RAG cevapsız kaldı (NO_CONTEXT). Web Search agent devreye giriyor...")
-                
-                # 1. Get raw info/context from Web Search
-                web_context_text = web_search_agent.search_and_answer(cleaned_question)
-                
-                if web_context_text:
-                    logger.info("Web Search context alındı. Main LLM ile işleniyor...")
-                    
-                    # 2. Format as context for RAG Engine's generator
-                    web_context_structured = [{
-                        "text": web_context_text,
-                        "source": "Web Search (GPT-5)"
-                    }]
-                    
-                    # 3. Generate final concise answer using Main LLM
-                    final_answer_buf = ""
-                    # rag_engine.generate returns a generator, so we join the chunks
-                    for chunk in rag_engine.generate(cleaned_question, web_context_structured, is_web_search=True):
-                         final_answer_buf += chunk
+            # 3. Generate final concise answer using Main LLM
+            final_answer_buf = ""
+            # rag_engine.generate returns a generator, so we join the chunks
+            try:
+                for chunk in rag_engine.generate(cleaned_question, web_context_structured, is_web_search=True, budget=ctx.budget, report=ctx.generation):
+                     final_answer_buf += chunk
+                answer = final_answer_buf
+                logger.info("Main LLM cevabı üretti.")
+            except DeadlineExceeded:
+                answer = _answer_after_deadline(ctx, final_answer_buf)
+
+            # 4. Save FINAL ANSWER to Vector DB & JSONL (Only if no error)
+            if "Web araması sırasında hata oluştu" not in web_context_text:
+                try:
+                    qa_entry = {
+                        "question": question,
+                        "answer": answer,
+                        "raw_web_context": web_context_text,
+                        "source": "web_search",
+                        "timestamp": time.time()
+                    }
                     
-                    answer = final_answer_buf
-                    logger.info("Main LLM cevabı üretti.")
-
-                    # 4. Save FINAL ANSWER to Vector DB & JSONL (Only if no error)
-                    if "Web araması sırasında hata oluştu" not in web_context_text:
-                        try:
-                            import json
-                            qa_entry = {
-                                "question": question,
-                                "answer": answer,
-                                "raw_web_context": web_context_text,
-                                "source": "web_search",
-                                "timestamp": time.time()
-                            }
-                            
-                            # Ensure directory exists
-                            raw_data_dir = settings.RAW_DATA_DIR
-                            if not os.path.exists(raw_data_dir):
-                                os.makedirs(raw_data_dir)
-                                
-                            web_qa_path = os.path.join(raw_data_dir, "web_search_qa.jsonl")
-                            with open(web_qa_path, "a", encoding="utf-8") as f:
-                                f.write(json.dumps(qa_entry, ensure_ascii=False) + "\n")
-                            logger.info(f"QA saved to {web_qa_path}")
-                        
-                            # 5. Add to Vector DB (Dynamic Update)
-                            # User Request: Save the Web Agent result (raw context), not the refined answer
-                            rag_engine.add_knowledge(
-                                f"SORU: {question}\nBİLGİ: {web_context_text}", 
-                                source="web_search_fallback"
-                            )
-                            
-                        except Exception as save_err:
-                            logger.error(f"Error saving web search result: {save_err}")
-                    else:
-                        logger.warning("Web search returned an error, skipping save to knowledge base.")
-                        logger.error(f"Error saving web search result: {save_err}")
+                    # Ensure directory exists
+                    raw_data_dir = settings.RAW_DATA_DIR
+                    if not os.path.exists(raw_data_dir):
+                        os.makedirs(raw_data_dir)
                         
-                else:
-                    answer = "Üzgünüm, bu konuda bilgi bulamadım."
+                    web_qa_path = os.path.join(raw_data_dir, "web_search_qa.jsonl")
+                    with open(web_qa_path, "a", encoding="utf-8") as f:
+                        f.write(json.dumps(qa_entry, ensure_ascii=False) + "\n")
+                    logger.info(f"QA saved to {web_qa_path}")
+                
+                    # 5. Add to Vector DB (Dynamic Update)
+                    # User Request: Save the Web Agent result (raw context), not the refined answer
+                    rag_engine.add_knowledge(
+                        f"SORU: {question}\nBİLGİ: {web_context_text}", 
+                        source="web_search_fallback"
+                    )
+                    
+                except Exception as save_err:
+                    logger.error(f"Error saving web search result: {save_err}")
             else:
-                answer = rag_response
+                logger.warning("Web search returned an error, skipping save to knowledge base.")
+                
+        else:
+            answer = NO_INFO_ANSWER
+    else:
+        answer = rag_response
 
-        # --- Talking Head Entegrasyonu ---
-        # Sadece cevap varsa buraya gelir
-        import time
-        import os
+    ctx.answer = answer
+    # Tam üretilmiş cevaplar, sonraki bütçesi dar kopyalar için saklanır
+    if not deadline.degradations and not answer.startswith(UNCACHEABLE_PREFIXES):
+        answer_cache.put(_flight_key(ctx), answer, cost=time.perf_counter() - started)
+    return ctx
+
+
+def stage_synthesize(ctx: QuestionContext):
+    """Cevabı sese dönüştürür (Talking Head için mp3 dosyası)."""
+    if not ctx.skip_tts and not ctx.deadline.has(settings.DEADLINE_MIN_TTS_SECONDS):
+        # Seslendirmeye vakit yok: avatar bekletilmez, cevap sadece metin olarak gösterilir
+        _degrade(ctx, "text_only")
+        ctx.skip_tts = True
+
+    if not ctx.skip_tts:
+        # 1. Dosya adı oluştur (eş zamanlı sentezlerde çakışmaması için benzersiz)
+        audio_filename = f"response_{int(time.time())}_{uuid.uuid4().hex[:8]}.mp3"
+        full_audio_path = os.path.join(settings.TALKING_HEAD_PATH, audio_filename)
         
-        # Determine behavior based on skip_tts flag
-        if skip_tts:
-             logger.info("Only displaying text (No TTS) for chitchat.")
-             avatar_controller.add_qa_text(question, answer)
+        # 2. Sesi kaydet (bütçeyi belirgin aşan cevaplar tam cümlelerle kısaltılır, hız hafifçe artırılır)
+        speech_text = ctx.answer
+        speed = 1.0
+        if ctx.budget:
+            speech_text = ctx.budget.fit_for_speech(ctx.answer)
+            speed = ctx.budget.speed
+            if speech_text != ctx.answer:
+                answer_length_policy.record_trim()
+
+        # Aynı metin aynı hızla daha önce seslendirildiyse (filler tekrarı, önbellekten cevap) dosya tekrar kullanılır
+        audio_key = (speech_text, round(speed, 2))
+        cached_filename = audio_cache.get(audio_key)
+        if cached_filename and os.path.exists(os.path.join(settings.TALKING_HEAD_PATH, cached_filename)):
+            audio_filename = cached_filename
+            full_audio_path = os.path.join(settings.TALKING_HEAD_PATH, cached_filename)
+            synthesized = True
         else:
-            # 1. Dosya adı oluştur
-            audio_filename = f"response_{int(time.time())}.mp3"
-            full_audio_path = os.path.join(settings.TALKING_HEAD_PATH, audio_filename)
-            
-            # 2. Sesi kaydet
-            if tts_engine.save_to_file(answer, full_audio_path):
+            tts_started = time.perf_counter()
+            synthesized = tts_engine.save_to_file(speech_text, full_audio_path, speed=speed)
+            if synthesized:
                 logger.info(f"Ses dosyası kaydedildi: {full_audio_path}")
-                # 3. Avatarı konuştur
-                avatar_controller.speak(question, answer, audio_filename)
+                audio_cache.put(audio_key, audio_filename, cost=time.perf_counter() - tts_started)
+
+        if synthesized:
+            ctx.audio_filename = audio_filename
+            ctx.audio_bytes = os.path.getsize(full_audio_path)
+        else:
+            logger.warning("Ses oluşturulamadı.")
+            if ctx.deadline.expired():
+                _degrade(ctx, "text_only")
+                ctx.skip_tts = True
+
+    # Cevap ve ses hazır: aynı soruyu bekleyen kopyalar artık sonucu alabilir
+    _finish_flight(ctx)
+    return ctx
+
+
+def stage_playback(ctx: QuestionContext):
+    """Avatarı konuşturur (ses bitene kadar bloklar) ya da sadece metni gösterir."""
+    question = ctx.question
+    if len(ctx.askers) > 1:
+        # Aynı soruyu soran tüm izleyiciler tek cevapta anılır
+        question = f"{', '.join(ctx.askers)}: {ctx.cleaned_question}"
+
+    if ctx.skip_tts:
+        logger.info("Only displaying text (No TTS) for chitchat.")
+        avatar_controller.add_qa_text(question, ctx.answer)
+    elif ctx.audio_filename:
+        # 3. Avatarı konuştur (ses bitene kadar bloklar; süre cevap uzunluğu politikasını izlemek için kaydedilir)
+        start = time.perf_counter()
+        avatar_controller.speak(question, ctx.answer, ctx.audio_filename)
+        ctx.spoken_seconds = time.perf_counter() - start
+        STAGE_LATENCY.observe(ctx.spoken_seconds, stage="avatar_playback")
+        answer_length_policy.record_spoken(ctx.budget, ctx.spoken_seconds)
+    return ctx
+
+
+RESOLVE_STAGES = (
+    ("classification", stage_classify),
+    ("retrieval", stage_retrieve),
+    ("generation", stage_generate),
+    ("synthesis", stage_synthesize)
+)
+
+
+def _flight_key(ctx: QuestionContext) -> str:
+    # Pipeline'daki işler semantik küme anahtarını kullanır; böylece farklı kelimelerle
+    # sorulan aynı soru da uçuştaki işe bağlanır
+    return ctx.cluster_key or ctx.normalized
+
+
+def _finish_flight(ctx: QuestionContext):
+    """Soru bir single-flight leader'ı ise sonucu bekleyen kopyalara yayınlar (idempotent)."""
+    flight = ctx.flight
+    if flight:
+        ctx.flight = None
+        key, call = flight
+        question_flight.finish(key, call, ctx.shared_result())
+
+
+def _run_stages(ctx: QuestionContext, stages) -> QuestionContext:
+    for name, stage in stages:
+        with ctx.timed(name), span(name):
+            if stage(ctx) is None:
+                break
+    return ctx
+
+
+def process_question(ctx: QuestionContext):
+    """
+    RAG + TTS + Avatar akışını çalıştıran yardımcı fonksiyon.
+    Tüm aşamaları sırayla, çağıran thread üzerinde çalıştırır.
+    """
+    ctx.profiled = profiler.claim()
+    try:
+        with profiler.profile(ctx), collect_calls(ctx.provider_calls):
+            return _process_question(ctx)
+    finally:
+        profiler.complete(ctx)
+        _record_ledger(ctx, "web")
+
+
+def _process_question(ctx: QuestionContext):
+    try:
+        if stage_intake(ctx) is None:
+            return None
+
+        # KARAR AĞACI ADIM 1-4: Güvenlik, chitchat, RAG ve TTS
+        # Aynı soru eş zamanlı birden fazla kez gelirse iş sadece bir kez yapılır,
+        # diğer kopyalar aynı cevabı ve aynı ses dosyasını paylaşır.
+        # Selamlamalar kişiye özel olduğu için paylaşılmaz.
+        shared = False
+        with activate(ctx.trace), ctx.deadline.activate():
+            if ctx.is_greeting:
+                _run_stages(ctx, RESOLVE_STAGES)
             else:
-                logger.warning("Ses oluşturulamadı.")
-             
-        return answer
+                try:
+                    result, shared = question_flight.do(
+                        _flight_key(ctx), lambda: _run_stages(ctx, RESOLVE_STAGES).shared_result(),
+                        timeout=ctx.deadline.timeout()
+                    )
+                except TimeoutError:
+                    # Leader bu sorunun bütçesi içinde bitmedi (DeadlineExceeded da buraya düşer):
+                    # diğer aşamalar gibi önbellekteki cevaba ya da sadece metin özre düşülür
+                    _degrade(ctx, "flight_wait_timeout")
+                    ctx.answer = _answer_after_deadline(ctx, "")
+                    return ctx.answer
+                ctx.apply_result(result)
+                if shared:
+                    ctx.decide("shared", True)
+
+        if ctx.route == "injection" or ctx.answer is None:
+            return ctx.answer
+
+        # --- Talking Head Entegrasyonu ---
+        # Paylaşılan sonuçta avatar zaten leader çağrısı tarafından konuşturuluyor.
+        if shared:
+            logger.info("Single-flight: cevap eş zamanlı aynı sorudan paylaşıldı, avatar tekrar konuşturulmuyor.")
+        else:
+            with ctx.timed("playback"), activate(ctx.trace), span("playback"):
+                stage_playback(ctx)
+        _observe_question(ctx, "web")
              
-        return answer
+        return ctx.answer
 
 
     except Exception as e:
         logger.error(f"Soru işleme hatası: {e}")
+        ERRORS.inc(component="process_question")
         return "Bir hata oluştu."
 
 
+def _observe_question(ctx: QuestionContext, source: str):
+    """Cevaplanan sorunun toplam süresini metriklere, eşiği aştıysa yavaş soru loguna işler."""
+    if ctx.answer is None:
+        return
+    total = time.time() - ctx.created_at
+    QUESTION_LATENCY.observe(total, source=source, route=ctx.route or "unknown")
+    # Yavaşlık avatarın konuşmaya başlamasına kadar ölçülür; cevabın kendi uzunluğu sayılmaz
+    slow_question_log.observe(ctx, total - (ctx.spoken_seconds or 0.0))
+
+
+def _record_ledger(ctx: QuestionContext, source: str):
+    """Rotası belirlenmiş soruyu provider çağrıları ve üretilen ses süresiyle ledger'a yazar."""
+    if ctx.route is None:
+        return # Intake'te (rate limit dahil) elenen soru
+    degradations = list(ctx.deadline.degradations) if ctx.deadline else []
+    audio_seconds = ctx.spoken_seconds
+    if audio_seconds is None and ctx.audio_bytes and ctx.answer:
+        # Çalınmayan (paylaşılan / web) ses için kelime sayısından tahmin
+        audio_seconds = len(ctx.answer.split()) / settings.TTS_WORDS_PER_SECOND
+    question_ledger.record({
+        "ts": ctx.created_at,
+        "source": source,
+        "trace_id": ctx.trace.trace_id if ctx.trace else None,
+        "question": ctx.cleaned_question,
+        "normalized": ctx.normalized,
+        "route": "cache" if "cached_answer" in degradations else ctx.route,
+        "status": _ledger_status(ctx),
+        "latency_seconds": round(time.time() - ctx.created_at - (ctx.spoken_seconds or 0.0), 3),
+        "audio_seconds": round(audio_seconds, 2) if audio_seconds is not None else None,
+        "answer_chars": len(ctx.answer) if ctx.answer else 0,
+        "degradations": degradations
+    }, ctx.provider_calls)
+
+
+def _ledger_status(ctx: QuestionContext) -> str:
+    # /predict'te paylaşılan kopya leader'ın rotasını ve cevabını taşır ama provider çağrısı
+    # yapmaz; ayrı durumla yazılır ki soru başı maliyet ve gecikme leader'larla karışmasın
+    if ctx.answer is None:
+        return "dropped"
+    return "shared" if ctx.decisions.get("shared") else "answered"
+
+
+def _finish_trace(ctx: QuestionContext, status: str = None):
+    """Sorunun izini kapatır; durum verilmezse cevaplanıp cevaplanmadığına göre belirlenir."""
+    if ctx.trace is None:
+        return
+    if status is None:
+        status = "answered" if ctx.answer is not None else "dropped"
+    ctx.trace.finish(
+        status,
+        question=ctx.cleaned_question,
+        route=ctx.route,
+        queue_wait_ms=round(ctx.queue_wait * 1000, 1),
+        degradations=list(ctx.deadline.degradations) if ctx.deadline else []
+    )
+
+
+def _on_pipeline_finish(ctx: QuestionContext):
+    """Pipeline'dan çıkan (tamamlanan ya da düşen) her soru için çağrılır."""
+    _finish_flight(ctx)
+    # Sadece cevaplanan soru served_window'a girer; cevapsız biten leader'a bağlı kopyalar yeniden kuyruğa döner
+    question_scheduler.finish(ctx, ctx.answer is not None)
+    _observe_question(ctx, "live")
+    _finish_trace(ctx)
+    profiler.complete(ctx)
+    _record_ledger(ctx, "live")
+
+
+# ==================== QUESTION PIPELINE (YouTube kuyruğu) ====================
+def _pipeline_stage(name: str, stage):
+    """Pipeline aşamasını canlı yayın öncelik şeridinde, sorunun deadline'ı altında çalıştırır ve süresini ölçer."""
+    def wrapper(ctx: QuestionContext):
+        with ctx.timed(name), profiler.profile(ctx), activate(ctx.trace), span(name), collect_calls(ctx.provider_calls), \
+                llm_scheduler.lane(LANE_LIVE), ctx.deadline.activate():
+            return stage(ctx)
+    return wrapper
+
+
+def pipeline_intake(ctx: QuestionContext):
+    """Intake + single-flight: soru, aynı soruyu soran /predict istekleri için uçuş leader'ı olur."""
+    ctx.profiled = profiler.claim()
+    if ctx.trace:
+        # Öncelikli kuyrukta bekleme süresi
+        now = time.time()
+        ctx.trace.record("queue_wait", now - ctx.queue_wait, now)
+    if stage_intake(ctx) is None:
+        return None
+    if not ctx.is_greeting:
+        # Pipeline uçuşa sadece leader olarak girer: /predict kopyaları bu sonucu paylaşabilir,
+        # ama uçuştaki bir /predict'in cevabı yayında oynatılmadığı için canlı soru ona bağlanmaz.
+        # Pipeline içi kopyalar zaten kuyrukta (QuestionScheduler) leader'a bağlanır.
+        key = _flight_key(ctx)
+        call, is_leader = question_flight.begin(key, join=False)
+        if is_leader:
+            ctx.flight = (key, call)
+    return ctx
+
+
+def play_filler():
+    """Pipeline tamamen boşken sıradaki hazır Filler Q&A'yı oynatır."""
+    global filler_index # Use global index to cycle through fillers
+    if not filler_data or question_pipeline.in_flight() > 0:
+        return
+
+    logger.info("Queue empty. Injecting Filler Q&A...")
+    item = filler_data[filler_index]
+
+    # Use pre-generated asset (NO LLM, NO NEW TTS)
+    # avatar_controller.speak expects just the filename if it's in the assets folder
+    # (save_fillers.py saved them to TALKING_HEAD_PATH, which is served at TALKING_HEAD_URL)
+    logger.info(f"Playing filler: {item['question']}")
+    # Filler kesilebilir: gerçek bir cevap oynatılmaya hazır olduğunda ses kısılarak durdurulur.
+    # Soru bu sırada diğer aşamalarda işlenmeye devam ettiği için filler cevaba gecikme eklemez.
+    completed = avatar_controller.speak(item['question'], item['answer'], item['audio_file'], preempt=_answer_waiting)
+    filler_stats["played"] += 1
+    if not completed:
+        filler_stats["preempted"] += 1
+
+    # Move to next filler
+    filler_index = (filler_index + 1) % len(filler_data)
+
+
+def _answer_waiting() -> bool:
+    """Oynatılmayı bekleyen gerçek bir cevap var mı?"""
+    return playback_stage.queue.qsize() > 0
+
+
+# Anlamca aynı soruları kayan pencere içinde kümeler (mevcut sentence encoder ile)
+question_dedup = SemanticDeduplicator(
+    encode_fn=lambda text: rag_engine.embed(text).cpu().numpy(),
+    threshold=settings.DEDUP_SIMILARITY_THRESHOLD,
+    window=settings.DEDUP_WINDOW_SECONDS
+)
+
+# Giriş kuyruğu: FIFO yerine tazelik, ilk kez soranlar ve tekrar talebine göre önceliklendirilir.
+# Aynı kümedeki sorular tek işte birleşir ve pencere içinde bir kez cevaplanır.
+question_scheduler = QuestionScheduler(
+    key_fn=lambda ctx: ctx.cluster_key,
+    author_fn=lambda ctx: ctx.author,
+    low_value_fn=lambda ctx: ctx.low_value,
+    maxsize=settings.QUESTION_QUEUE_MAX_DEPTH,
+    max_age=settings.QUESTION_MAX_AGE_SECONDS,
+    freshness_weight=settings.QUESTION_FRESHNESS_WEIGHT,
+    first_time_bonus=settings.QUESTION_FIRST_TIME_BONUS,
+    demand_bonus=settings.QUESTION_DEMAND_BONUS,
+    served_window=settings.DEDUP_WINDOW_SECONDS if settings.DEDUP_ENABLED else 0.0
+)
+
+# Kuyruk derinleştikçe cevaplar kısalır, böylece birikim kendi kendini büyütmez
+answer_length_policy = AnswerLengthPolicy(
+    idle_seconds=settings.ANSWER_IDLE_SECONDS,
+    min_seconds=settings.ANSWER_MIN_SECONDS,
+    backlog_depth=settings.ANSWER_BACKLOG_DEPTH,
+    backlog_age=settings.ANSWER_BACKLOG_AGE_SECONDS,
+    words_per_second=settings.TTS_WORDS_PER_SECOND,
+    max_speed=settings.TTS_MAX_SPEED
+)
+
+# Avatar tek olduğu için oynatma tek worker ile sıralı yapılır; boşta kalınca (kesilebilir) filler oynatılır
+playback_stage = Stage("playback", _pipeline_stage("playback", stage_playback), workers=1, maxsize=settings.PIPELINE_QUEUE_SIZE, idle_timeout=5, on_idle=play_filler)
+
+question_pipeline = QuestionPipeline(
+    [
+        Stage("intake", pipeline_intake, workers=1, input_queue=question_scheduler),
+        Stage("classification", _pipeline_stage("classification", stage_classify), workers=settings.PIPELINE_CLASSIFICATION_WORKERS, maxsize=settings.PIPELINE_QUEUE_SIZE),
+        Stage("retrieval", _pipeline_stage("retrieval", stage_retrieve), workers=1, maxsize=settings.PIPELINE_QUEUE_SIZE),
+        Stage("generation", _pipeline_stage("generation", stage_generate), workers=settings.PIPELINE_GENERATION_WORKERS, maxsize=settings.PIPELINE_QUEUE_SIZE),
+        Stage("synthesis", _pipeline_stage("synthesis", stage_synthesize), workers=settings.PIPELINE_SYNTHESIS_WORKERS, maxsize=settings.PIPELINE_QUEUE_SIZE),
+        playback_stage
+    ],
+    on_finish=_on_pipeline_finish
+)
+question_scheduler.on_discard = question_pipeline.discard
+
+# Kuyruk derinlikleri her /metrics okumasında anlık hesaplanır
+QUEUE_DEPTH.set_function(question_pipeline.in_flight, queue="pipeline_in_flight")
+for _stage in question_pipeline.stages:
+    QUEUE_DEPTH.set_function(_stage.queue.qsize, queue=_stage.name)
+
+
+def enqueue_question(author: str, message: str):
+    """YouTube sorusunu kümeler ve pipeline'ın giriş kuyruğuna ekler."""
+    ctx = _new_context(f"{author}: {message}")
+    ctx.live = True
+    # YouTubeClient mesaj için iz başlattıysa (aktif context) o kullanılır
+    ctx.trace = current_trace() or tracer.start_trace("youtube", author=author)
+    if not _admit(ctx):
+        _finish_trace(ctx, "rate_limited")
+        return # Chat seli: embedding dahil hiçbir model çağrısı yapılmadan reddedilir
+
+    # Kuyruk dolduğunda ilk feda edilecekler: selamlama ve kural tabanlı chitchat (model çağrısı yok)
+    ctx.low_value = ctx.is_greeting or query_router.get_chitchat_response(ctx.cleaned_question, normalized=ctx.normalized) is not None
+
+    if ctx.is_greeting:
+        # Selamlamalar kişiye özel; farklı izleyicilerinkiler birleştirilmez
+        ctx.cluster_key = f"{ctx.author}::{ctx.normalized}"
+    elif settings.DEDUP_ENABLED:
+        try:
+            # Embedding bir kez hesaplanır; retrieval aynı vektörü tekrar kullanır
+            with activate(ctx.trace):
+                ctx.embedding = rag_engine.embed(ctx.cleaned_question)
+            ctx.cluster_key, _ = question_dedup.assign(
+                ctx.normalized, ctx.cleaned_question, embedding=ctx.embedding.cpu().numpy()
+            )
+        except Exception as e:
+            logger.error(f"Semantic dedup hatası: {e}")
+            ctx.cluster_key = ctx.normalized
+    else:
+        ctx.cluster_key = ctx.normalized
+
+    if not question_pipeline.submit(ctx):
+        _finish_trace(ctx, "rejected")
+
+
 @app.route("/api/start_youtube", methods=["POST"])
 def start_youtube():
     try:
@@ -290,8 +928,8 @@ def start_youtube():
             
         def on_question(author, message):
             logger.info(f"YouTube sorusu alındı ({author}): {message}")
-            # Put in queue instead of direct processing
-            question_queue.put(f"{author}: {message}")
+            # Put in pipeline instead of direct processing
+            enqueue_question(author, message)
             
         youtube_client.start_listening(video_id, on_question)
         
@@ -303,9 +941,106 @@ def start_youtube():
 
 @app.route("/api/stop_youtube", methods=["POST"])
 def stop_youtube():
+    if not youtube_client.loaded:
+        # Hiç dinlemeye başlanmadı: durdurmak için istemciyi (pytchat) kurmaya gerek yok
+        return jsonify({"status": "Not listening"})
     youtube_client.stop_listening()
     return jsonify({"status": "Stopped listening"})
 
+@app.route("/api/stats", methods=["GET"])
+def stats():
+    return jsonify({
+        "caches": cache_registry.get_stats(), # retrieval, retrieval_semantic, classification, answer, audio
+        "cascade": rag_engine.get_cascade_stats(),
+        "hedging": rag_engine.get_hedge_stats(),
+        "single_flight": question_flight.get_stats(),
+        "llm_scheduler": llm_scheduler.get_stats(),
+        "ollama": ollama_manager.get_stats(),
+        "pipeline": question_pipeline.get_stats(),
+        "question_queue": question_scheduler.get_stats(),
+        "dedup": question_dedup.get_stats(),
+        "chat_rate_limiter": chat_rate_limiter.get_stats(),
+        "web_rate_limiter": web_rate_limiter.get_stats(),
+        "load_shedding": dict(load_shedding_stats),
+        "answer_length": answer_length_policy.get_stats(),
+        "deadline": {"slo_seconds": settings.QUESTION_DEADLINE_SECONDS, "degradations": dict(deadline_stats)},
+        "speculation": dict(speculation_stats),
+        "tracing": tracer.get_stats(),
+        "slow_questions": slow_question_log.get_stats(),
+        "profiler": profiler.get_stats(),
+        "ledger": question_ledger.get_stats(),
+        "startup": startup.get_stats(),
+        "filler": dict(filler_stats)
+    })
+
+# ==================== ADMIN (profil) ====================
+def _require_admin(view):
+    """X-Admin-Token başlığı ADMIN_TOKEN ile eşleşmeli; token tanımlı değilse endpoint yokmuş gibi davranır."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not settings.ADMIN_TOKEN:
+            return jsonify({"error": "Not found"}), 404
+        token = request.headers.get("X-Admin-Token", "")
+        if not hmac.compare_digest(token, settings.ADMIN_TOKEN):
+            return jsonify({"error": "Forbidden"}), 403
+        return view(*args, **kwargs)
+    return wrapper
+
+
+@app.route("/admin/profile", methods=["GET", "POST", "DELETE"])
+@_require_admin
+def admin_profile():
+    """
+    POST {"calls": N}: sıradaki N soruyu cProfile ile ölçer (.pstats + .txt özet).
+    POST {"seconds": S, "interval_ms": 10}: S saniye boyunca tüm thread'leri örnekler (.folded).
+    GET: aktif/son oturumların durumu ve çıktı dosyaları.
+    DELETE: çalışan oturumu durdurur; o ana kadar ölçülenler yazılır.
+    """
+    if request.method == "GET":
+        return jsonify(profiler.get_stats())
+    if request.method == "DELETE":
+        session = profiler.cancel()
+        if session is None:
+            return jsonify({"error": "Çalışan bir profil oturumu yok."}), 404
+        return jsonify(session.get_stats())
+
+    data = request.get_json(silent=True) or {}
+    try:
+        if "seconds" in data:
+            seconds = min(float(data["seconds"]), 300.0)
+            interval = max(float(data.get("interval_ms", 10)), 1.0) / 1000.0
+            session = profiler.sample(seconds, interval)
+        else:
+            calls = max(1, min(int(data.get("calls", 5)), 100))
+            session = profiler.profile_questions(calls)
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": f"Geçersiz parametre: {e}"}), 400
+    except RuntimeError as e:
+        return jsonify({"error": str(e)}), 409
+    return jsonify(session.get_stats()), 202
+
+
+@app.route("/admin/stacks", methods=["GET"])
+@_require_admin
+def admin_stacks():
+    """Tüm thread yığınlarını döndürür ve diske yazar."""
+    path, text = profiler.dump_stacks()
+    response = Response(text, mimetype='text/plain')
+    response.headers["X-Stack-Dump-Path"] = path
+    return response
+
+
+@app.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    """Prometheus scrape endpoint'i (aşama gecikme histogramları, cache/fallback/hata sayaçları, kuyruk derinlikleri)."""
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+def _too_many_requests(message: str):
+    response = Response(message, status=429, mimetype='text/plain')
+    response.headers["Retry-After"] = str(settings.WEB_RETRY_AFTER_SECONDS)
+    return response
+
+
 @app.route("/predict", methods=["POST"])
 def predict():
     try:
@@ -315,8 +1050,29 @@ def predict():
         if not question:
             return Response("Lütfen bir soru sorun.", mimetype='text/plain'), 400
 
+        # KABUL KONTROLÜ: Eş zamanlılık tavanı ve rate limit, hiçbir model çağrısından önce.
+        # Önce slot alınır: dolu olduğu için reddedilen istek rate limit token'ı harcamaz
+        ctx = _new_context(question)
+        ctx.trace = tracer.start_trace("web")
+        if not web_slots.acquire(blocking=False):
+            load_shedding_stats["web_rejected_busy"] += 1
+            logger.warning("Load shedding: /predict eş zamanlılık tavanı dolu, istek reddedildi.")
+            _finish_trace(ctx, "rejected")
+            return _too_many_requests("Şu anda çok fazla soru var, lütfen biraz sonra tekrar deneyin.")
+
+        if not _admit(ctx, web_rate_limiter):
+            web_slots.release()
+            _finish_trace(ctx, "rate_limited")
+            load_shedding_stats["web_rejected_rate_limit"] += 1
+            return _too_many_requests("Çok hızlı soru soruyorsunuz, lütfen biraz bekleyin.")
+
         # Mevcut mantığı process_question fonksiyonuna taşıdık
-        answer = process_question(question)
+        try:
+            with llm_scheduler.lane(LANE_WEB):
+                answer = process_question(ctx)
+        finally:
+            web_slots.release()
+            _finish_trace(ctx)
         
         if answer is None:
             # Chitchat durumunda sessiz kal (204 No Content)
@@ -330,88 +1086,18 @@ def predict():
         return Response("Cevap üretilirken bir sorun oluştu. Lütfen tekrar deneyin.", mimetype='text/plain'), 500
     
 if __name__ == "__main__":
-    # --- Processing Queue & Worker ---
-    question_queue = queue.Queue()
-
-    def process_queue_worker():
-        global filler_index # Use global index to cycle through fillers
-        logger.info("Question processing worker started.")
-        while True:
-            try:
-                # Try to get a real question with a timeout
-                # If timeout happens (queue empty), we inject a filler.
-                try:
-                    question_text = question_queue.get(timeout=5) # 5 seconds idle wait
-                    
-                    logger.info(f"Worker processing: {question_text}")
-                    with app.app_context():
-                        process_question(question_text)
-                    
-                    question_queue.task_done()
-                    
-                except queue.Empty:
-                    # Queue is empty! Inject Filler if available.
-                    if filler_data:
-                        logger.info("Queue empty. Injecting Filler Q&A...")
-                        
-                        item = filler_data[filler_index]
-                        
-                        # Use pre-generated asset (NO LLM, NO NEW TTS)
-                        # Construct full audio URL/Path as expected by Avatar Controller
-                        # Note: avatar_controller.speak expects just the filename if it's in the assets folder
-                        # OR a URL. The script saved them to talkingmodel/ folder which is usually served.
-                        # Let's assume settings.TALKING_HEAD_URL matches where these files are served.
-                        # Actually, save_fillers.py saved to TALKING_HEAD_PATH.
-                        # The JS code plays relative to its root or absolute URL.
-                        # We passed filename "filler_X.mp3" to speak().
-                        
-                        logger.info(f"Playing filler: {item['question']}")
-                        
-                        # Directly call speak (Bypass process_question)
-                        # But wait! We need to ensure we don't overlap if user asked something just now? 
-                        # No, queue.get(timeout=5) ensures we waited 5s and nothing came.
-                        
-                        # We also need to check if avatar is currently speaking (maybe previous filler is still going?)
-                        # avatar_controller.speak handles blocking now? Yes, we added wait_for_audio_finish!
-                        
-                        avatar_controller.speak(item['question'], item['answer'], item['audio_file'])
-                        
-                        # Move to next filler
-                        filler_index = (filler_index + 1) % len(filler_data)
-                    else:
-                        pass # No fillers available, just loop back to wait
-
-            except Exception as e:
-                logger.error(f"Worker error: {e}")
-
-    # Start Worker Thread
-    worker_thread = threading.Thread(target=process_queue_worker, daemon=True)
-    worker_thread.start()
-
-    # --- Auto-Start YouTube Listener if Configured ---
-    if settings.YOUTUBE_VIDEO_ID:
-        logger.info(f"Auto-starting YouTube listener for Video ID: {settings.YOUTUBE_VIDEO_ID}")
-        
-        def on_question_auto(author, message):
-            logger.info(f"YouTube sorusu alındı ({author}): {message}")
-            question_queue.put(f"{author}: {message}")
-
-        # Start listening
-        youtube_client.start_listening(settings.YOUTUBE_VIDEO_ID, on_question_auto)
+    create_app(start_workers=True)
 
     # --- Graceful Shutdown Handler ---
     def graceful_shutdown(signum, frame):
         logger.info("\nShutdown signal received (Ctrl+C). Cleaning up...")
-        if youtube_client:
-            logger.info("Stopping YouTube client...")
-            youtube_client.stop_listening()
-        if avatar_controller:
-            logger.info("Closing Avatar controller...")
-            avatar_controller.close()
-        logger.info("Cleanup complete. Exiting.")
+        shutdown()
+        logger.info("Exiting.")
         sys.exit(0)
 
     signal.signal(signal.SIGINT, graceful_shutdown)
+    profiler.install_signal_handler(settings.PROFILE_SIGNAL, settings.PROFILE_SIGNAL_SECONDS)
 
+    # Üretim için: gunicorn -c gunicorn.conf.py "qa_app.main:create_app()"
     logger.info("Flask geliştirme sunucusu başlatılıyor...")
-    app.run(host='0.0.0.0', port=5001, debug=True, use_reloader=False)
\ No newline at end of file
+    app.run(host='0.0.0.0', port=5001, debug=True, use_reloader=False, threaded=True)
@@ -0,0 +1,121 @@
+"""
+Sunucu throughput/gecikme ölçümü.
+
+Çalışan bir sunucuya (Flask geliştirme sunucusu ya da gunicorn) eş zamanlı istekler gönderir
+ve istek/saniye, gecikme yüzdelikleri ile durum kodu dağılımını raporlar.
+
+Örnek:
+    python qa_app/scripts/benchmark_serving.py --url http://localhost:5001 --endpoint predict -c 8 -n 200
+    python qa_app/scripts/benchmark_serving.py --endpoint tts -c 4 -n 40
+
+Not: /predict ve /api/tts gerçek LLM/TTS çağrıları yapar (maliyet!). Rate limit ve
+eş zamanlılık tavanı 429 döndürebilir; bunlar ayrı sayılır.
+"""
+import argparse
+import json
+import statistics
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+
+DEFAULT_QUESTIONS = [
+    "Çift anadal başvuru koşulları nelerdir?",
+    "Yatay geçiş için not ortalaması kaç olmalı?",
+    "Bütünleme sınavına kimler girebilir?",
+    "Kayıt dondurma nasıl yapılır?",
+    "Mezuniyet için AKTS şartı nedir?",
+]
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _send(session: requests.Session, url: str, endpoint: str, text: str, timeout: float) -> tuple[int, float, int]:
+    start = time.perf_counter()
+    if endpoint == "predict":
+        response = session.post(f"{url}/predict", json={"question": text}, timeout=timeout)
+    else:
+        response = session.post(f"{url}/api/tts", json={"text": text}, timeout=timeout, stream=True)
+    size = len(response.content)  # Akışın tamamı okunana kadar bekle
+    return response.status_code, time.perf_counter() - start, size
+
+
+def run_benchmark(url: str, endpoint: str, concurrency: int, total: int, questions: list[str], timeout: float) -> dict:
+    latencies = []
+    statuses = Counter()
+    errors = 0
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [
+            executor.submit(_send, session, url, endpoint, questions[i % len(questions)], timeout)
+            for i in range(total)
+        ]
+        for future in as_completed(futures):
+            try:
+                status, latency, _ = future.result()
+                statuses[status] += 1
+                if 200 <= status < 300:
+                    latencies.append(latency)
+            except Exception as e:
+                errors += 1
+                print(f"İstek hatası: {e}")
+    elapsed = time.perf_counter() - start
+
+    return {
+        "url": url,
+        "endpoint": endpoint,
+        "concurrency": concurrency,
+        "requests": total,
+        "elapsed_seconds": round(elapsed, 2),
+        "throughput_rps": round(len(latencies) / elapsed, 3) if elapsed > 0 else 0.0,
+        "status_codes": dict(statuses),
+        "errors": errors,
+        "latency_seconds": {
+            "mean": round(statistics.mean(latencies), 3) if latencies else 0.0,
+            "p50": round(_percentile(latencies, 50), 3),
+            "p95": round(_percentile(latencies, 95), 3),
+            "p99": round(_percentile(latencies, 99), 3),
+            "max": round(max(latencies), 3) if latencies else 0.0,
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="QA sunucusu throughput/gecikme ölçümü")
+    parser.add_argument("--url", default="http://localhost:5001")
+    parser.add_argument("--endpoint", choices=["predict", "tts"], default="predict")
+    parser.add_argument("-c", "--concurrency", type=int, default=8)
+    parser.add_argument("-n", "--requests", type=int, default=100)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--questions", help="Her satırda bir soru içeren dosya (varsayılan: yerleşik örnekler)")
+    parser.add_argument("--output", help="Sonucu JSON olarak kaydet")
+    args = parser.parse_args()
+
+    questions = DEFAULT_QUESTIONS
+    if args.questions:
+        with open(args.questions, "r", encoding="utf-8") as f:
+            questions = [line.strip() for line in f if line.strip()]
+
+    result = run_benchmark(args.url, args.endpoint, args.concurrency, args.requests, questions, args.timeout)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"Sonuç kaydedildi: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
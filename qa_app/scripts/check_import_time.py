@@ -0,0 +1,155 @@
+"""
+Import süresi bütçe kontrolü.
+
+Her hedef ayrı bir Python sürecinde `-X importtime` ile import edilir. Rapor iki şey içerir:
+kümülatif import süresi ve import sırasında yüklenen ağır kütüphaneler (torch, pandas, ...).
+Bütçeyi aşan ya da yasaklı ağır kütüphane yükleyen hedef varsa çıkış kodu 1 olur.
+Aşanlar için en pahalı alt importlar listelenir.
+
+Örnek:
+    python qa_app/scripts/check_import_time.py
+    python qa_app/scripts/check_import_time.py --repeat 5 --output import_times.json
+    python qa_app/scripts/check_import_time.py --target qa_app.core.router=50
+
+Not: İlk çalıştırma .pyc dosyalarını üretir; ölçüm için her hedef varsayılan olarak
+3 kez çalıştırılır ve en düşük süre alınır (disk önbelleği etkisini azaltmak için).
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+# Model/veri yüklenmeden önce import edilmemesi gereken kütüphaneler
+HEAVY_MODULES = ("torch", "pandas", "numpy", "sentence_transformers", "openai", "requests", "selenium", "pytchat")
+
+# hedef -> (bütçe ms, import sonrası yüklenmesine izin verilen ağır kütüphaneler)
+# .py ile biten hedefler script olarak (__main__ çalıştırılmadan) yüklenir.
+DEFAULT_TARGETS = {
+    "qa_app.config": (150, ()),
+    "qa_app.core.router": (50, ()),
+    "qa_app.core.rag_engine": (250, ()),
+    "qa_app.core.chitchat_classifier": (250, ()),
+    "qa_app.core.ollama_manager": (200, ()),
+    "qa_app.main": (800, ()),
+    "qa_app/scripts/data_quality_check.py": (100, ()),
+    "qa_app/scripts/ledger_report.py": (100, ()),
+}
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+PROBE = """
+import importlib, importlib.util, json, sys
+target = sys.argv[1]
+sys.stderr.write("--probe-start--\\n")  # Bu satırdan önceki importlar (probe'un kendisi) sayılmaz
+sys.stderr.flush()
+if target.endswith(".py"):
+    spec = importlib.util.spec_from_file_location("_import_probe", target)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+else:
+    importlib.import_module(target)
+heavy = json.loads(sys.argv[2])
+print(json.dumps(sorted(name for name in heavy if name in sys.modules)))
+"""
+
+
+def measure(target: str) -> dict:
+    """Hedefi yeni bir süreçte import eder; toplam süre, en pahalı alt importlar ve ağır kütüphaneleri döndürür."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE, target, json.dumps(HEAVY_MODULES)],
+        cwd=PROJECT_ROOT,
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [PROJECT_ROOT, os.environ.get("PYTHONPATH")]))},
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()
+        return {"error": error[-1] if error else f"exit {result.returncode}"}
+
+    entries = []
+    lines = result.stderr.splitlines()
+    if "--probe-start--" in lines:
+        lines = lines[lines.index("--probe-start--") + 1:]
+    for line in lines:
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append({"name": name, "depth": len(indent) // 2, "self_us": int(self_us), "cumulative_us": int(cumulative_us)})
+
+    # Sadece en üst seviye importlar toplanır (alt importlar ebeveynin kümülatifinde zaten var)
+    total_us = sum(entry["cumulative_us"] for entry in entries if entry["depth"] == 0)
+    heaviest = sorted((entry for entry in entries if entry["depth"] <= 1), key=lambda entry: -entry["cumulative_us"])[:8]
+    return {
+        "total_ms": round(total_us / 1000, 1),
+        "heavy_loaded": json.loads(result.stdout.strip().splitlines()[-1]),
+        "heaviest": [{"name": entry["name"], "cumulative_ms": round(entry["cumulative_us"] / 1000, 1)} for entry in heaviest]
+    }
+
+
+def check(targets: dict, repeat: int) -> list[dict]:
+    results = []
+    for target, (budget_ms, allowed_heavy) in targets.items():
+        runs = [measure(target) for _ in range(max(1, repeat))]
+        failed = [run for run in runs if "error" in run]
+        if failed:
+            results.append({"target": target, "budget_ms": budget_ms, "ok": False, "error": failed[0]["error"]})
+            continue
+        best = min(runs, key=lambda run: run["total_ms"])
+        forbidden = [name for name in best["heavy_loaded"] if name not in allowed_heavy]
+        results.append({
+            "target": target,
+            "budget_ms": budget_ms,
+            "total_ms": best["total_ms"],
+            "forbidden_imports": forbidden,
+            "ok": best["total_ms"] <= budget_ms and not forbidden,
+            "heaviest": best["heaviest"]
+        })
+    return results
+
+
+def print_results(results: list[dict]):
+    print(f"{'Hedef':<42} {'Süre(ms)':>9} {'Bütçe':>7}  Durum")
+    for result in results:
+        if "error" in result:
+            print(f"{result['target']:<42} {'-':>9} {result['budget_ms']:>7}  HATA: {result['error']}")
+            continue
+        status = "OK" if result["ok"] else "AŞILDI"
+        if result["forbidden_imports"]:
+            status += f" (ağır importlar: {', '.join(result['forbidden_imports'])})"
+        print(f"{result['target']:<42} {result['total_ms']:>9.1f} {result['budget_ms']:>7}  {status}")
+        if not result["ok"]:
+            for entry in result["heaviest"]:
+                print(f"    {entry['cumulative_ms']:>8.1f} ms  {entry['name']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="qa_app modüllerinin import süresi bütçe kontrolü")
+    parser.add_argument("--target", action="append", default=[],
+                        help="Ek/üzerine yazılan hedef: modul.adi=BÜTÇE_MS ya da yol/script.py=BÜTÇE_MS")
+    parser.add_argument("--only", action="store_true", help="Sadece --target ile verilen hedefleri ölç")
+    parser.add_argument("--repeat", type=int, default=3, help="Hedef başına ölçüm sayısı (en düşüğü alınır)")
+    parser.add_argument("--output", help="Sonucu JSON olarak kaydet")
+    args = parser.parse_args()
+
+    targets = {} if args.only else dict(DEFAULT_TARGETS)
+    for spec in args.target:
+        name, _, budget = spec.partition("=")
+        targets[name] = (float(budget) if budget else DEFAULT_TARGETS.get(name, (500, ()))[0], ())
+
+    results = check(targets, args.repeat)
+    print_results(results)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"Sonuç kaydedildi: {args.output}")
+
+    sys.exit(0 if all(result["ok"] for result in results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,13 +3,14 @@ Veri kalitesini kontrol eden script.
 İşlenmiş veride sorun var mı diye bakar.
 """
 
-import pandas as pd
-import numpy as np
 from collections import Counter
 import re
 
 def check_data_quality(parquet_path: str):
     """İşlenmiş veriyi detaylı kontrol eder"""
+    # pandas/numpy sadece kontrol çalışırken yüklenir (script hızlı başlar)
+    import numpy as np
+    import pandas as pd
     
     print("="*70)
     print("VERİ KALİTE KONTROLÜ BAŞLATILIYOR")
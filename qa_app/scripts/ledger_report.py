@@ -0,0 +1,185 @@
+"""
+Soru ledger'ı (SQLite) üzerinden maliyet ve gecikme raporu.
+
+Rota başına (injection / chitchat / rag / web / cache) soru sayısı, gecikme yüzdelikleri,
+token ve TTS karakter toplamları, tahmini maliyet ve en sık sorulan (normalize) soruları yazdırır.
+Eş zamanlı aynı sorudan cevap paylaşan kopyalar (status=shared) soru başı maliyet ve gecikmeye
+katılmaz, rota başına ayrıca sayılır.
+
+Örnek:
+    python qa_app/scripts/ledger_report.py
+    python qa_app/scripts/ledger_report.py --since-hours 24 --top 20 --output report.json
+    python qa_app/scripts/ledger_report.py --prices prices.json
+
+Fiyatlar: model adına göre 1M token (girdi/çıktı) ya da 1M karakter (TTS) başına USD.
+Aşağıdaki tablo sadece varsayılandır; güncel fiyatlar için --prices ile JSON verin:
+    {"gpt-4o-mini": {"input": 0.15, "output": 0.6}, "tts-1": {"characters": 15.0}}
+Ollama (yerel) çağrılarının maliyeti 0 sayılır.
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+from collections import defaultdict
+
+DEFAULT_DB = "qa_app/data/logs/ledger.sqlite3"
+
+DEFAULT_PRICES = {
+    "gpt-4o": {"input": 2.5, "output": 10.0},
+    "gpt-4o-mini": {"input": 0.15, "output": 0.6},
+    "tts-1": {"characters": 15.0},
+    "tts-1-hd": {"characters": 30.0},
+}
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def call_cost(call: dict, prices: dict) -> float:
+    """Tek provider çağrısının tahmini USD maliyeti (fiyatı bilinmeyen model 0)."""
+    if call["provider"] == "ollama":
+        return 0.0
+    price = prices.get(call["model"]) or {}
+    return (
+        call["prompt_tokens"] * price.get("input", 0.0)
+        + call["completion_tokens"] * price.get("output", 0.0)
+        + call["characters"] * price.get("characters", 0.0)
+    ) / 1_000_000
+
+
+def build_report(connection: sqlite3.Connection, since: float, prices: dict, top: int) -> dict:
+    connection.row_factory = sqlite3.Row
+    questions = connection.execute(
+        "SELECT id, route, status, latency_seconds, audio_seconds, normalized, question FROM questions WHERE ts >= ?",
+        (since,)
+    ).fetchall()
+    calls = connection.execute(
+        "SELECT c.* FROM provider_calls c JOIN questions q ON q.id = c.question_id WHERE q.ts >= ?",
+        (since,)
+    ).fetchall()
+
+    calls_by_question = defaultdict(list)
+    unknown_models = set()
+    for call in calls:
+        call = dict(call)
+        if call["provider"] != "ollama" and call["model"] not in prices:
+            unknown_models.add(call["model"])
+        calls_by_question[call["question_id"]].append(call)
+
+    routes = defaultdict(lambda: {"latencies": [], "shared": 0, "audio_seconds": 0.0, "cost": 0.0, "prompt_tokens": 0,
+                                  "completion_tokens": 0, "tts_characters": 0, "calls": defaultdict(int)})
+    frequent = defaultdict(lambda: {"count": 0, "example": None, "cost": 0.0})
+    for row in questions:
+        route = routes[row["route"]]
+        entry = frequent[row["normalized"]]
+        entry["count"] += 1
+        entry["example"] = entry["example"] or row["question"]
+        if row["status"] == "shared":
+            route["shared"] += 1
+            continue
+        route["latencies"].append(row["latency_seconds"] or 0.0)
+        route["audio_seconds"] += row["audio_seconds"] or 0.0
+        question_cost = 0.0
+        for call in calls_by_question.get(row["id"], []):
+            question_cost += call_cost(call, prices)
+            route["prompt_tokens"] += call["prompt_tokens"]
+            route["completion_tokens"] += call["completion_tokens"]
+            route["tts_characters"] += call["characters"]
+            route["calls"][call["kind"]] += 1
+        route["cost"] += question_cost
+        entry["cost"] += question_cost
+
+    by_route = {}
+    for name, route in sorted(routes.items(), key=lambda item: -len(item[1]["latencies"])):
+        latencies = route["latencies"] or [0.0]
+        by_route[name] = {
+            "questions": len(route["latencies"]),
+            "shared": route["shared"],
+            "latency_seconds": {
+                "avg": round(sum(latencies) / len(latencies), 3),
+                "p50": round(_percentile(latencies, 50), 3),
+                "p95": round(_percentile(latencies, 95), 3)
+            },
+            "cost_usd": round(route["cost"], 4),
+            "cost_per_question_usd": round(route["cost"] / len(latencies), 5),
+            "audio_seconds": round(route["audio_seconds"], 1),
+            "prompt_tokens": route["prompt_tokens"],
+            "completion_tokens": route["completion_tokens"],
+            "tts_characters": route["tts_characters"],
+            "calls": dict(route["calls"])
+        }
+
+    most_frequent = sorted(frequent.items(), key=lambda item: -item[1]["count"])[:top]
+    return {
+        "since": since,
+        "questions": len(questions),
+        "total_cost_usd": round(sum(route["cost_usd"] for route in by_route.values()), 4),
+        "by_route": by_route,
+        "most_frequent": [
+            {"normalized": normalized, "count": entry["count"], "example": entry["example"], "cost_usd": round(entry["cost"], 4)}
+            for normalized, entry in most_frequent
+        ],
+        "unpriced_models": sorted(unknown_models)
+    }
+
+
+def print_report(report: dict):
+    print(f"Toplam soru: {report['questions']}  |  Tahmini maliyet: ${report['total_cost_usd']:.4f}")
+    print()
+    print(f"{'Rota':<10} {'Soru':>6} {'Paylaşım':>9} {'Ort(s)':>8} {'p95(s)':>8} {'Maliyet($)':>11} {'$/soru':>9} {'Ses(s)':>8}")
+    for name, route in report["by_route"].items():
+        latency = route["latency_seconds"]
+        print(
+            f"{str(name):<10} {route['questions']:>6} {route['shared']:>9} {latency['avg']:>8.2f} {latency['p95']:>8.2f} "
+            f"{route['cost_usd']:>11.4f} {route['cost_per_question_usd']:>9.5f} {route['audio_seconds']:>8.0f}"
+        )
+    print()
+    print("En sık sorulan sorular:")
+    for entry in report["most_frequent"]:
+        print(f"  {entry['count']:>4}x  ${entry['cost_usd']:.4f}  {entry['example']}")
+    if report["unpriced_models"]:
+        print()
+        print(f"Uyarı: fiyatı bilinmeyen modeller 0 sayıldı: {', '.join(report['unpriced_models'])} (--prices ile ekleyin)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Soru ledger'ından rota başına maliyet/gecikme raporu")
+    parser.add_argument("--db", default=DEFAULT_DB, help="Ledger SQLite dosyası (LEDGER_PATH)")
+    parser.add_argument("--since-hours", type=float, default=None, help="Sadece son N saatteki sorular")
+    parser.add_argument("--top", type=int, default=10, help="Listelenecek en sık soru sayısı")
+    parser.add_argument("--prices", help="Model fiyatlarını içeren JSON dosyası (varsayılanların üzerine yazar)")
+    parser.add_argument("--output", help="Raporu JSON olarak kaydet")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"Ledger bulunamadı: {args.db}")
+        sys.exit(1)
+
+    prices = dict(DEFAULT_PRICES)
+    if args.prices:
+        with open(args.prices, "r", encoding="utf-8") as f:
+            prices.update(json.load(f))
+
+    since = time.time() - args.since_hours * 3600 if args.since_hours else 0.0
+    connection = sqlite3.connect(f"file:{args.db}?mode=ro", uri=True)
+    try:
+        report = build_report(connection, since, prices, args.top)
+    finally:
+        connection.close()
+
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Rapor kaydedildi: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
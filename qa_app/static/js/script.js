@@ -89,6 +89,13 @@ document.addEventListener("DOMContentLoaded", () => {
                 body: JSON.stringify({ question })
             });
 
+            if (response.status === 429) {
+                // Sunucu yoğun ya da rate limit: sunucunun mesajını göster
+                const retryAfter = response.headers.get("Retry-After");
+                botBubble.innerHTML = await response.text() + (retryAfter ? ` (${retryAfter} sn)` : "");
+                return;
+            }
+
             if (!response.ok) {
                 throw new Error(`Sunucu hatası: ${response.statusText}`);
             }
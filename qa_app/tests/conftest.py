@@ -0,0 +1,25 @@
+import pytest
+
+
+class FakeClock:
+    """time modülünün yerine geçen elle ilerletilen saat (time / monotonic / perf_counter)."""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def perf_counter(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
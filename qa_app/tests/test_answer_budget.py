@@ -0,0 +1,58 @@
+import pytest
+
+from qa_app.core.answer_budget import AnswerBudget, AnswerLengthPolicy, complete_sentences
+
+
+def test_budget_scales_with_pressure():
+    policy = AnswerLengthPolicy(idle_seconds=30, min_seconds=8, backlog_depth=6, backlog_age=90, max_speed=1.2)
+
+    idle = policy.budget(queue_depth=0, oldest_age=0)
+    assert (idle.seconds, idle.pressure, idle.speed) == (30, 0, 1.0)
+
+    half = policy.budget(queue_depth=3, oldest_age=10)
+    assert half.pressure == pytest.approx(0.5)
+    assert half.seconds == pytest.approx(19)
+
+    # Yaş baskısı derinlikten büyükse o kullanılır; baskı 1'de sınırlanır
+    overloaded = policy.budget(queue_depth=1, oldest_age=500)
+    assert overloaded.pressure == 1.0
+    assert overloaded.seconds == 8
+    assert overloaded.speed == pytest.approx(1.2)
+    assert policy.get_stats()["budgets"] == 3
+
+
+def test_budget_word_and_token_limits():
+    budget = AnswerBudget(seconds=10, pressure=0.0, words_per_second=2.5)
+    assert budget.max_words == 25
+    assert budget.max_tokens == 75
+    assert AnswerBudget(seconds=1, pressure=1.0, words_per_second=2.5).max_words == 10
+
+
+def test_fit_for_speech_keeps_whole_sentences():
+    budget = AnswerBudget(seconds=4, pressure=1.0, words_per_second=2.5)  # 10 kelime, tolerans 13
+    first = "Bu ilk cümle tam olarak on iki kelimeden oluşan uzun bir örnektir."
+    text = f"{first} İkinci cümle atılmalıdır. Üçüncü de."
+    assert budget.fit_for_speech(text) == first
+    assert budget.fit_for_speech("Kısa cevap. İki cümle.") == "Kısa cevap. İki cümle."
+
+
+def test_spoken_history_is_reported():
+    policy = AnswerLengthPolicy(idle_seconds=30, min_seconds=8)
+    policy.record_spoken(policy.budget(0, 0), 40)
+    policy.record_spoken(policy.budget(6, 0), 7)
+    stats = policy.get_stats()
+    assert stats["answers_spoken"] == 2
+    assert stats["over_budget"] == 1
+    assert stats["avg_spoken_seconds_idle"] == 40
+    assert stats["avg_spoken_seconds_under_backlog"] == 7
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Kayıtlar eylülde başlar. Ücret bilgisi için", "Kayıtlar eylülde başlar."),
+    ("Burs var mı? Evet! Başvuru", "Burs var mı? Evet!"),
+    ("Versiyon 2.5 ile geldi", ""),
+    ("Tam cümle.", "Tam cümle."),
+    ("", ""),
+])
+def test_complete_sentences(text, expected):
+    assert complete_sentences(text) == expected
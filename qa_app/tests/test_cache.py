@@ -0,0 +1,82 @@
+import pytest
+
+from qa_app.core import cache as cache_module
+from qa_app.core.cache import CacheRegistry, InstrumentedCache, SemanticCache
+
+
+@pytest.fixture(autouse=True)
+def fake_time(clock, monkeypatch):
+    monkeypatch.setattr(cache_module, "time", clock)
+
+
+def test_lru_eviction_counts():
+    cache = InstrumentedCache("test_lru", max_size=2, register=False)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # a en son kullanılan olur
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    stats = cache.get_stats()
+    assert (stats["evictions"], stats["stores"], stats["size"]) == (1, 3, 2)
+    assert (stats["hits"], stats["misses"]) == (3, 1)
+    assert stats["hit_rate"] == 0.75
+
+
+def test_ttl_expiration_counts(clock):
+    cache = InstrumentedCache("test_ttl", max_size=10, ttl=60, register=False)
+    cache.put("a", 1)
+    clock.advance(30)
+    assert cache.get("a") == 1
+    clock.advance(31)
+    assert cache.get("a", "yok") == "yok"
+
+    stats = cache.get_stats()
+    assert (stats["expirations"], stats["evictions"], stats["size"]) == (1, 0, 0)
+
+
+def test_overwrite_does_not_evict():
+    cache = InstrumentedCache("test_overwrite", max_size=1, register=False)
+    cache.put("a", 1)
+    cache.put("a", 2)
+    assert cache.get("a") == 2
+    assert cache.get_stats()["evictions"] == 0
+
+
+def test_estimated_time_saved():
+    cache = InstrumentedCache("test_saved", register=False)
+    cache.put("a", 1, cost=2.0)
+    cache.get("a")
+    cache.get("a")
+    stats = cache.get_stats()
+    assert stats["avg_miss_cost_ms"] == 2000
+    assert stats["estimated_time_saved_seconds"] == 4.0
+
+
+def test_semantic_cache_threshold_scope_and_eviction(clock):
+    def score(query, keys):
+        return [1.0 - abs(query - key) for key in keys]
+
+    cache = SemanticCache("test_semantic", score_fn=score, threshold=0.9, max_size=2, ttl=60)
+    cache.put(0.5, "orta", scope=3)
+    assert cache.get(0.55, scope=3) == "orta"
+    assert cache.get(0.55, scope=5) is None  # farklı top_k
+    assert cache.get(0.8, scope=3) is None   # eşiğin altında
+
+    cache.put(0.1, "düşük", scope=3)
+    cache.put(0.9, "yüksek", scope=3)
+    assert cache.get(0.5, scope=3) is None   # en eski kayıt atıldı
+    clock.advance(61)
+    assert cache.get(0.9, scope=3) is None
+
+    stats = cache.get_stats()
+    assert (stats["evictions"], stats["expirations"]) == (1, 2)
+
+
+def test_registry_reports_registered_caches():
+    registry = CacheRegistry()
+    cache = InstrumentedCache("test_registry", register=False)
+    registry.register(cache)
+    assert registry.get("test_registry") is cache
+    assert set(registry.get_stats()) == {"test_registry"}
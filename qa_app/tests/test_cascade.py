@@ -0,0 +1,41 @@
+import threading
+
+import pytest
+
+from qa_app.core.deadline import DeadlineExceeded
+from qa_app.core.rag_engine import RAGEngine
+
+
+def _engine(large_stream) -> RAGEngine:
+    """Model/vektör DB yüklemeden sadece cascade durumunu kuran RAGEngine."""
+    engine = RAGEngine.__new__(RAGEngine)
+    engine._cascade_lock = threading.Lock()
+    engine._cascade_stats = {
+        "requests": 0, "accepted_fast": 0, "escalated": 0, "escalation_reasons": {},
+        "tiers": {tier: {"calls": 0, "total_seconds": 0.0, "max_seconds": 0.0} for tier in ("fast", "large")}
+    }
+    engine._generate_large = lambda prompt, max_tokens, report: large_stream()
+    return engine
+
+
+def _large_calls(engine: RAGEngine) -> int:
+    return engine.get_cascade_stats()["tiers"]["large"]["calls"]
+
+
+def test_large_tier_latency_recorded_when_stream_fails():
+    def failing():
+        yield "yarım"
+        raise DeadlineExceeded("süre doldu")
+
+    engine = _engine(failing)
+    with pytest.raises(DeadlineExceeded):
+        list(engine._generate_cascade("soru", context=[]))  # Düşük retrieval skoru: doğrudan büyük model
+    assert _large_calls(engine) == 1
+
+
+def test_large_tier_latency_recorded_when_consumer_stops_early():
+    engine = _engine(lambda: iter(["bir", "iki", "üç"]))
+    chunks = engine._generate_cascade("soru", context=[])
+    assert next(chunks) == "bir"
+    chunks.close()
+    assert _large_calls(engine) == 1
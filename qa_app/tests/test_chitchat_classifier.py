@@ -0,0 +1,85 @@
+from types import SimpleNamespace
+
+import pytest
+
+from qa_app.config import settings
+from qa_app.core import chitchat_classifier as classifier_module
+from qa_app.core.chitchat_classifier import ChitchatClassifier
+from qa_app.core.deadline import Deadline
+
+
+class FakeOpenAI:
+    """chat.completions.create çağrılarını kaydeden OpenAI istemcisi."""
+
+    def __init__(self, answer: str):
+        self.calls = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+        self.answer = answer
+
+    def create(self, **kwargs):
+        self.calls.append(kwargs)
+        return SimpleNamespace(usage=None, choices=[SimpleNamespace(message=SimpleNamespace(content=self.answer))])
+
+
+@pytest.fixture(autouse=True)
+def no_scheduler(monkeypatch):
+    monkeypatch.setattr(classifier_module.llm_scheduler, "acquire", lambda *args, **kwargs: 0.0)
+
+
+@pytest.fixture
+def ollama_calls(monkeypatch):
+    calls = []
+
+    def chat_once(model, messages, options=None, timeout=None, purpose="chat"):
+        calls.append(timeout)
+        return "YES"
+
+    monkeypatch.setattr(classifier_module.ollama_manager, "chat_once", chat_once)
+    return calls
+
+
+def _classifier(monkeypatch, provider: str) -> ChitchatClassifier:
+    monkeypatch.setattr(settings, "CHITCHAT_CHECK_PROVIDER", "ollama")  # Kurulumda OpenAI istemcisi açılmasın
+    classifier = ChitchatClassifier()
+    classifier.provider = provider
+    return classifier
+
+
+def test_ollama_call_is_bounded_by_question_deadline(monkeypatch, ollama_calls):
+    classifier = _classifier(monkeypatch, "ollama")
+    with Deadline(5).activate():
+        assert classifier.is_chitchat("merhaba nasılsın")
+    assert classifier.is_chitchat("selam hocam")
+
+    assert 0 < ollama_calls[0] <= 5
+    assert ollama_calls[1] == settings.OLLAMA_TIMEOUT_SECONDS
+
+
+def test_openai_call_is_bounded_by_question_deadline(monkeypatch):
+    classifier = _classifier(monkeypatch, "openai")
+    classifier.client = FakeOpenAI("NO")
+    with Deadline(5).activate():
+        assert not classifier.is_chitchat("burs başvurusu ne zaman")
+    assert not classifier.is_chitchat("yurt ücreti ne kadar")
+
+    first, second = classifier.client.calls
+    assert 0 < first["timeout"] <= 5
+    assert "timeout" not in second
+
+
+def test_expired_deadline_skips_provider(monkeypatch, ollama_calls):
+    classifier = _classifier(monkeypatch, "ollama")
+    deadline = Deadline(5)
+    deadline.expires_at = deadline.started_at
+    with deadline.activate():
+        assert not classifier.is_chitchat("merhaba")
+    assert ollama_calls == []
+    assert len(classifier.cache) == 0  # Atlanan sınıflandırma önbelleğe girmez
+
+
+def test_cache_key_is_the_shared_normalized_text(monkeypatch, ollama_calls):
+    classifier = _classifier(monkeypatch, "ollama")
+    assert classifier.is_chitchat("Merhaba, nasılsın?")
+    assert classifier.is_chitchat("merhaba nasilsin")                # Aynı normalize metin: önbellekten
+    assert classifier.is_chitchat("MERHABA!!", normalized="merhaba nasilsin")  # Verilen normalize metin kullanılır
+    assert len(ollama_calls) == 1
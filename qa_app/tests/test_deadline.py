@@ -0,0 +1,55 @@
+import pytest
+
+from qa_app.core import deadline as deadline_module
+from qa_app.core.deadline import Deadline, DeadlineExceeded, current_deadline
+
+
+@pytest.fixture(autouse=True)
+def fake_time(clock, monkeypatch):
+    monkeypatch.setattr(deadline_module, "time", clock)
+
+
+def test_timeout_is_remaining_time_capped(clock):
+    deadline = Deadline(10)
+    clock.advance(4)
+    assert deadline.timeout() == pytest.approx(6)
+    assert deadline.timeout(cap=2) == 2
+    assert deadline.timeout(cap=30) == pytest.approx(6)
+    assert deadline.has(6) and not deadline.has(6.5)
+
+    clock.advance(20)
+    assert deadline.timeout() == 0
+    assert deadline.remaining() == 0
+
+
+def test_unlimited_deadline_returns_cap():
+    deadline = Deadline(None)
+    assert deadline.timeout() is None
+    assert deadline.timeout(cap=5) == 5
+    assert not deadline.expired()
+    deadline.check("generation")
+
+
+def test_check_raises_after_expiry(clock):
+    deadline = Deadline(5)
+    deadline.check("classification")
+    clock.advance(5)
+    assert deadline.expired()
+    with pytest.raises(DeadlineExceeded, match="generation"):
+        deadline.check("generation")
+    assert issubclass(DeadlineExceeded, TimeoutError)
+
+
+def test_activate_sets_current_deadline():
+    deadline = Deadline(5)
+    assert current_deadline() is None
+    with deadline.activate():
+        assert current_deadline() is deadline
+    assert current_deadline() is None
+
+
+def test_degradations_are_recorded():
+    deadline = Deadline(5)
+    deadline.degrade("web_fallback_skipped")
+    deadline.degrade("text_only")
+    assert deadline.degradations == ["web_fallback_skipped", "text_only"]
@@ -0,0 +1,118 @@
+import threading
+import time
+
+import pytest
+
+from qa_app.core import hedging
+from qa_app.core.deadline import Deadline, DeadlineExceeded
+from qa_app.core.hedging import CircuitBreaker, hedged_stream
+
+
+def _stream(chunks, delay: float = 0.0, error: Exception = None):
+    """delay saniye bekleyip parçaları üreten (ya da hata fırlatan) factory."""
+    def factory():
+        time.sleep(delay)
+        if error is not None:
+            raise error
+        yield from chunks
+    return factory
+
+
+def test_breaker_opens_after_threshold_and_recovers(clock, monkeypatch):
+    monkeypatch.setattr(hedging, "time", clock)
+    breaker = CircuitBreaker("openai", failure_threshold=2, reset_timeout=30)
+    breaker.record_failure()
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow_request()
+
+    clock.advance(30)
+    assert breaker.allow_request()       # half_open: tek deneme isteği
+    assert not breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.get_stats()["opened"] == 1
+
+
+def test_failed_half_open_trial_reopens(clock, monkeypatch):
+    monkeypatch.setattr(hedging, "time", clock)
+    breaker = CircuitBreaker("ollama", failure_threshold=1, reset_timeout=10)
+    breaker.record_failure()
+    clock.advance(10)
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow_request()
+
+
+def test_abandoned_trial_is_replaced_after_timeout(clock, monkeypatch):
+    monkeypatch.setattr(hedging, "time", clock)
+    breaker = CircuitBreaker("ollama", failure_threshold=1, reset_timeout=10)
+    breaker.record_failure()
+    clock.advance(10)
+    assert breaker.allow_request()  # Deneme sonuçlanmadan iptal edildi (hedge'i kaybetti)
+    clock.advance(10)
+    assert breaker.allow_request()
+
+
+def test_fast_primary_is_not_hedged():
+    stats, report = {}, {}
+    chunks = hedged_stream(
+        [("openai", _stream(["Merhaba", " dünya"]), None), ("ollama", _stream(["yedek"]), None)],
+        hedge_after=1.0, stats=stats, report=report
+    )
+    assert "".join(chunks) == "Merhaba dünya"
+    assert stats == {"won:openai": 1}
+    assert report == {"provider": "openai"}
+
+
+def test_slow_primary_is_hedged_and_loses():
+    stats, report = {}, {}
+    breaker = CircuitBreaker("ollama")
+    chunks = hedged_stream(
+        [("openai", _stream(["geç"], delay=1.0), None), ("ollama", _stream(["hızlı"]), breaker)],
+        hedge_after=0.05, stats=stats, report=report
+    )
+    assert list(chunks) == ["hızlı"]
+    assert stats == {"hedged": 1, "won:ollama": 1}
+    assert report == {"hedged": True, "provider": "ollama"}
+    assert breaker.get_stats()["successes"] == 1
+
+
+def test_primary_error_fails_over():
+    report = {}
+    breaker = CircuitBreaker("openai", failure_threshold=1)
+    chunks = hedged_stream(
+        [("openai", _stream([], error=ConnectionError("503")), breaker), ("ollama", _stream(["yedek"]), None)],
+        hedge_after=5.0, report=report
+    )
+    assert list(chunks) == ["yedek"]
+    assert report == {"failed": ["openai"], "provider": "ollama"}
+    assert breaker.state == "open"
+
+
+def test_all_attempts_failing_raises_last_error():
+    error = TimeoutError("ollama yanıt vermedi")
+    chunks = hedged_stream(
+        [("openai", _stream([], error=ConnectionError("503")), None), ("ollama", _stream([], error=error), None)],
+        hedge_after=5.0
+    )
+    with pytest.raises(TimeoutError) as raised:
+        list(chunks)
+    assert raised.value is error
+
+
+def test_deadline_cancels_waiting_attempts():
+    cancelled = threading.Event()
+
+    def hanging():
+        try:
+            time.sleep(0.5)
+            yield "geç"
+        finally:
+            cancelled.set()
+
+    with Deadline(0.1).activate(), pytest.raises(DeadlineExceeded):
+        list(hedged_stream([("openai", hanging, None)], hedge_after=5.0))
+    assert cancelled.wait(2)  # İptal edilen deneme akışını kapatır
@@ -0,0 +1,71 @@
+import time
+
+import pytest
+
+from qa_app.core.deadline import Deadline
+from qa_app.core.llm_scheduler import LANE_BACKGROUND, LANE_LIVE, LANE_WEB, LLMScheduler, SchedulerTimeoutError
+
+LANE_WEIGHTS = {LANE_LIVE: 6, LANE_WEB: 3, LANE_BACKGROUND: 1}
+
+
+def test_unlimited_provider_grants_immediately():
+    scheduler = LLMScheduler(LANE_WEIGHTS, provider_limits={}, model_limits={})
+    assert scheduler.acquire("ollama", "llama3", lane=LANE_LIVE) < 0.1
+
+    stats = scheduler.get_stats()
+    assert stats["lanes"][LANE_LIVE]["granted"] == 1
+    assert stats["queued"] == {"ollama/llama3": 0}
+
+
+def test_lane_context_and_unknown_lane():
+    scheduler = LLMScheduler(LANE_WEIGHTS, provider_limits={}, model_limits={})
+    with scheduler.lane(LANE_WEB):
+        scheduler.acquire("openai", "gpt-4o-mini")
+    scheduler.acquire("openai", "gpt-4o-mini")  # Şerit verilmezse arka plan
+    scheduler.acquire("openai", "gpt-4o-mini", lane="bilinmeyen")
+
+    lanes = scheduler.get_stats()["lanes"]
+    assert (lanes[LANE_WEB]["granted"], lanes[LANE_BACKGROUND]["granted"]) == (1, 2)
+
+
+def test_rate_limited_request_times_out():
+    # 6 RPM: kapasite 1 istek, sonraki slot 10s sonra
+    scheduler = LLMScheduler(LANE_WEIGHTS, provider_limits={"openai": (6, 0)}, model_limits={}, max_queue_seconds=0.1)
+    scheduler.acquire("openai", "gpt-4o", lane=LANE_LIVE)
+
+    with pytest.raises(SchedulerTimeoutError):
+        scheduler.acquire("openai", "gpt-4o", lane=LANE_LIVE)
+    stats = scheduler.get_stats()
+    assert stats["lanes"][LANE_LIVE]["timeouts"] == 1
+    assert stats["lanes"][LANE_LIVE]["waiting"] == 0
+    assert stats["queued"] == {"openai/gpt-4o": 0}
+
+
+def test_model_limit_overrides_provider_limit():
+    scheduler = LLMScheduler(
+        LANE_WEIGHTS, provider_limits={"openai": (6, 0)}, model_limits={("openai", "tts-1"): (0, 0)},
+        max_queue_seconds=0.1
+    )
+    for _ in range(3):
+        scheduler.acquire("openai", "tts-1")  # Modelin kendi limiti (sınırsız) kullanılır
+    scheduler.acquire("openai", "gpt-4o")
+    with pytest.raises(SchedulerTimeoutError):
+        scheduler.acquire("openai", "gpt-4o")
+
+
+def test_token_limit_is_enforced():
+    # 600 TPM: kapasite 100 token
+    scheduler = LLMScheduler(LANE_WEIGHTS, provider_limits={"openai": (0, 600)}, model_limits={}, max_queue_seconds=0.1)
+    scheduler.acquire("openai", "gpt-4o", tokens=80)
+    with pytest.raises(SchedulerTimeoutError):
+        scheduler.acquire("openai", "gpt-4o", tokens=80)
+
+
+def test_question_deadline_bounds_queue_wait():
+    scheduler = LLMScheduler(LANE_WEIGHTS, provider_limits={"openai": (6, 0)}, model_limits={}, max_queue_seconds=60)
+    scheduler.acquire("openai", "gpt-4o")
+
+    start = time.monotonic()
+    with Deadline(0.1).activate(), pytest.raises(SchedulerTimeoutError):
+        scheduler.acquire("openai", "gpt-4o")
+    assert time.monotonic() - start < 1.0
@@ -0,0 +1,107 @@
+import queue
+import threading
+
+import pytest
+
+from qa_app.core.pipeline import QuestionPipeline, Stage
+
+
+@pytest.fixture
+def finished():
+    """on_finish'e düşen item'lar; wait(n) n item bitene kadar bekler."""
+    items = []
+    condition = threading.Condition()
+
+    def on_finish(item):
+        with condition:
+            items.append(item)
+            condition.notify_all()
+
+    def wait(count: int):
+        with condition:
+            assert condition.wait_for(lambda: len(items) >= count, timeout=5)
+        return items
+
+    on_finish.wait = wait
+    return on_finish
+
+
+def _run(pipeline: QuestionPipeline, items: list, finished):
+    pipeline.start()
+    try:
+        for item in items:
+            assert pipeline.submit(item)
+        return finished.wait(len(items))
+    finally:
+        pipeline.stop()
+
+
+def test_items_flow_through_all_stages(finished):
+    pipeline = QuestionPipeline(
+        [
+            Stage("classification", lambda item: item + ["classified"], workers=2),
+            Stage("generation", lambda item: item + ["generated"], workers=2),
+            Stage("playback", lambda item: item + ["played"])
+        ],
+        on_finish=finished
+    )
+    results = _run(pipeline, [["soru-1"], ["soru-2"], ["soru-3"]], finished)
+
+    assert sorted(results) == [[f"soru-{n}", "classified", "generated", "played"] for n in (1, 2, 3)]
+    assert pipeline.in_flight() == 0
+    stats = pipeline.get_stats()["stages"]
+    assert (stats["classification"]["processed"], stats["playback"]["processed"]) == (3, 3)
+
+
+def test_dropped_and_failed_items_are_finished(finished):
+    def classify(item):
+        if item == "selam":
+            return None
+        if item == "bozuk":
+            raise ValueError("sınıflandırıcı hatası")
+        return item
+
+    played = []
+    pipeline = QuestionPipeline(
+        [Stage("classification", classify), Stage("playback", lambda item: played.append(item) or item)],
+        on_finish=finished
+    )
+    results = _run(pipeline, ["selam", "bozuk", "burs"], finished)
+
+    assert sorted(results) == ["bozuk", "burs", "selam"]
+    assert played == ["burs"]
+    stats = pipeline.get_stats()["stages"]["classification"]
+    assert (stats["dropped"], stats["errors"], stats["processed"]) == (2, 1, 1)
+    assert pipeline.in_flight() == 0
+
+
+def test_full_input_queue_rejects_submit():
+    pipeline = QuestionPipeline([Stage("intake", lambda item: item, maxsize=1)])
+    assert pipeline.submit("ilk")
+    assert not pipeline.submit("ikinci")  # Worker başlamadı, kuyruk dolu
+    assert pipeline.in_flight() == 1
+
+
+def test_discard_counts_item_as_finished(finished):
+    pipeline = QuestionPipeline([Stage("intake", lambda item: item)], on_finish=finished)
+    pipeline.submit("kopya")
+    pipeline.discard("kopya")
+    assert finished.wait(1) == ["kopya"]
+    assert pipeline.in_flight() == 0
+
+
+def test_custom_input_queue_is_used(finished):
+    intake = queue.Queue()
+    pipeline = QuestionPipeline([Stage("intake", lambda item: item.upper(), input_queue=intake)], on_finish=finished)
+    assert pipeline.stages[0].queue is intake
+    assert _run(pipeline, ["burs"], finished) == ["BURS"]
+
+
+def test_idle_callback_runs_when_queue_is_empty():
+    idle = threading.Event()
+    pipeline = QuestionPipeline([Stage("playback", lambda item: item, idle_timeout=0.05, on_idle=idle.set)])
+    pipeline.start()
+    try:
+        assert idle.wait(2)
+    finally:
+        pipeline.stop()
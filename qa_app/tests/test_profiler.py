@@ -0,0 +1,93 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from qa_app.core.profiler import CallProfileSession, Profiler
+
+
+def _answer_question(profiler: Profiler):
+    """Soru akışındaki kancaları (claim / profile / complete) sırayla çağırır."""
+    ctx = SimpleNamespace(profiled=profiler.claim())
+    with profiler.profile(ctx):
+        sum(range(1000))
+    profiler.complete(ctx)
+    return ctx
+
+
+def test_idle_profiler_does_not_claim_questions(tmp_path):
+    profiler = Profiler(str(tmp_path))
+    ctx = _answer_question(profiler)
+    assert ctx.profiled is False
+    assert profiler.get_stats()["active"] is None
+
+
+def test_session_profiles_next_questions_and_writes_stats(tmp_path):
+    profiler = Profiler(str(tmp_path))
+    session = profiler.profile_questions(2)
+
+    _answer_question(profiler)
+    assert not session.done
+    _answer_question(profiler)
+    assert session.done
+    assert os.path.exists(session.result_path)
+    assert os.path.exists(session.result_path.replace(".pstats", ".txt"))
+
+    # Oturum dolduktan sonra gelen sorular profillenmez
+    assert _answer_question(profiler).profiled is False
+    stats = profiler.get_stats()["active"]
+    assert (stats["claimed"], stats["completed"]) == (2, 2)
+
+
+def test_only_one_session_runs_at_a_time(tmp_path):
+    profiler = Profiler(str(tmp_path))
+    profiler.profile_questions(1)
+    with pytest.raises(RuntimeError):
+        profiler.profile_questions(1)
+
+    _answer_question(profiler)
+    profiler.profile_questions(3)  # Biten oturum geçmişe taşınır
+    history = profiler.get_stats()["history"]
+    assert [entry["calls"] for entry in history] == [1]
+
+
+def test_claim_is_bounded_by_calls(tmp_path):
+    session = CallProfileSession(2, str(tmp_path))
+    assert [session.claim() for _ in range(3)] == [True, True, False]
+
+
+def test_quiet_session_expires_with_partial_results(tmp_path):
+    profiler = Profiler(str(tmp_path), call_max_seconds=60)
+    session = profiler.profile_questions(5)
+    _answer_question(profiler)
+
+    session.started_at -= 60  # Oturum 60s önce başlamış gibi
+    assert _answer_question(profiler).profiled is False  # Süresi dolan oturum yeni soru almaz
+    replacement = profiler.profile_questions(5)          # 409 yerine eski oturum kapanır
+
+    assert session.finished == "expired"
+    assert os.path.exists(session.result_path)
+    assert profiler.session is replacement
+    assert profiler.get_stats()["history"][-1]["completed"] == 1
+
+
+def test_cancel_stops_call_session(tmp_path):
+    profiler = Profiler(str(tmp_path))
+    assert profiler.cancel() is None
+
+    session = profiler.profile_questions(5)
+    assert profiler.cancel() is session
+    assert session.finished == "cancelled"
+    assert session.result_path is None  # Hiç soru gelmedi, yazılacak ölçüm yok
+    assert profiler.cancel() is None
+    profiler.profile_questions(1)
+
+
+def test_cancel_stops_sampling_early(tmp_path):
+    profiler = Profiler(str(tmp_path))
+    session = profiler.sample(seconds=60, interval=0.01)
+    profiler.cancel()
+
+    assert session.finished == "cancelled"
+    assert os.path.exists(session.result_path)
+    profiler.sample(seconds=0.01)
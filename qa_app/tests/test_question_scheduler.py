@@ -0,0 +1,186 @@
+import queue
+from types import SimpleNamespace
+
+import pytest
+
+from qa_app.core import question_scheduler as scheduler_module
+from qa_app.core.question_scheduler import QuestionScheduler
+
+
+@pytest.fixture(autouse=True)
+def fake_time(clock, monkeypatch):
+    monkeypatch.setattr(scheduler_module, "time", clock)
+
+
+def _question(key: str, author: str = None, low_value: bool = False):
+    return SimpleNamespace(key=key, author=author, low_value=low_value, askers=[], demand=1, queue_wait=0.0)
+
+
+def test_fresher_question_is_served_first(clock):
+    scheduler = QuestionScheduler(key_fn=lambda item: item.key, author_fn=lambda item: item.author)
+    scheduler.put_nowait(_question("eski"))
+    clock.advance(60)
+    scheduler.put_nowait(_question("yeni"))
+
+    assert scheduler.get(block=False).key == "yeni"
+    assert scheduler.get(block=False).key == "eski"
+
+
+def test_demand_and_first_time_raise_priority(clock):
+    scheduler = QuestionScheduler(
+        key_fn=lambda item: item.key, author_fn=lambda item: item.author,
+        max_age=180, demand_bonus=0.3, first_time_bonus=0.5
+    )
+    scheduler.put_nowait(_question("bilinen", author="ali"))
+    scheduler.get(block=False)  # ali artık ilk kez soran değil
+
+    scheduler.put_nowait(_question("tekrar", author="ali"))
+    clock.advance(10)
+    scheduler.put_nowait(_question("ilk", author="ayse"))
+    clock.advance(10)
+    scheduler.put_nowait(_question("talep", author="ali"))
+    scheduler.put_nowait(_question("talep", author="veli"))
+    scheduler.put_nowait(_question("talep", author="can"))
+
+    # ilk: 0.94 + 0.5, talep: 1.0 + 0.3 * 2 (veli ve can ilk kez sorsa da kopya olarak birleşti)
+    first = scheduler.get(block=False)
+    assert first.key == "talep"
+    assert first.askers == ["ali", "veli", "can"]
+    assert first.demand == 3
+    assert scheduler.get(block=False).key == "ilk"
+    assert scheduler.get(block=False).key == "tekrar"
+    assert scheduler.get_stats()["merged_duplicates"] == 2
+
+
+def test_get_drops_stale_and_reports_wait(clock):
+    discarded = []
+    scheduler = QuestionScheduler(key_fn=lambda item: item.key, author_fn=lambda item: item.author, max_age=60)
+    scheduler.on_discard = discarded.append
+    scheduler.put_nowait(_question("eski"))
+    clock.advance(20)
+    scheduler.put_nowait(_question("yeni"))
+    clock.advance(45)
+
+    item = scheduler.get(block=False)
+    assert item.key == "yeni"
+    assert item.queue_wait == 45
+    assert [question.key for question in discarded] == ["eski"]
+    assert scheduler.get_stats()["dropped_stale"] == 1
+    with pytest.raises(queue.Empty):
+        scheduler.get(block=False)
+
+
+def test_late_askers_attach_to_in_flight_leader(clock):
+    discarded = []
+    scheduler = QuestionScheduler(key_fn=lambda item: item.key, author_fn=lambda item: item.author, served_window=60)
+    scheduler.on_discard = discarded.append
+    scheduler.put_nowait(_question("burs", author="ali"))
+    leader = scheduler.get(block=False)
+
+    late = _question("burs", author="veli")
+    scheduler.put_nowait(late)
+    assert leader.askers == ["ali", "veli"]  # Cevap okunurken veli de anılır
+    assert discarded == []  # Leader bitene kadar kopya tutulur
+    assert scheduler.get_stats()["attached_in_flight"] == 1
+
+    scheduler.finish(leader, answered=True)
+    assert discarded == [late]
+
+    clock.advance(30)
+    scheduler.put_nowait(_question("burs", author="can"))
+    assert scheduler.get_stats()["suppressed_recent"] == 1
+    clock.advance(31)
+    scheduler.put_nowait(_question("burs", author="can"))
+    assert scheduler.get(block=False).key == "burs"
+
+
+def test_failed_leader_requeues_attached_askers():
+    discarded = []
+    scheduler = QuestionScheduler(key_fn=lambda item: item.key, author_fn=lambda item: item.author, served_window=60)
+    scheduler.on_discard = discarded.append
+    scheduler.put_nowait(_question("burs", author="ali"))
+    leader = scheduler.get(block=False)
+    first = _question("burs", author="veli")
+    second = _question("burs", author="can")
+    scheduler.put_nowait(first)
+    scheduler.put_nowait(second)
+
+    scheduler.finish(leader, answered=False)
+
+    # Cevapsız biten soru bastırılmaz; bağlanan kopyalar tek soru olarak yeniden işlenir
+    retry = scheduler.get(block=False)
+    assert retry is first
+    assert retry.askers == ["veli", "can"]
+    assert retry.demand == 2
+    assert discarded == [second]
+    stats = scheduler.get_stats()
+    assert (stats["requeued_after_failure"], stats["suppressed_recent"], stats["in_flight"]) == (1, 0, 1)
+
+
+def test_failed_leader_without_copies_is_not_suppressed():
+    scheduler = QuestionScheduler(key_fn=lambda item: item.key, author_fn=lambda item: item.author, served_window=60)
+    scheduler.put_nowait(_question("burs"))
+    scheduler.finish(scheduler.get(block=False), answered=False)
+
+    scheduler.put_nowait(_question("burs"))
+    assert scheduler.get(block=False).key == "burs"
+    assert scheduler.get_stats()["suppressed_recent"] == 0
+
+
+def test_finish_ignores_items_that_are_not_the_leader():
+    scheduler = QuestionScheduler(key_fn=lambda item: item.key, author_fn=lambda item: item.author, served_window=60)
+    scheduler.put_nowait(_question("burs"))
+    leader = scheduler.get(block=False)
+    copy = _question("burs")
+    scheduler.put_nowait(copy)
+
+    scheduler.finish(copy, answered=True)  # Kuyrukta elenen kopyanın pipeline bildirimi
+    assert scheduler.get_stats()["in_flight"] == 1
+    scheduler.finish(leader, answered=True)
+    assert scheduler.get_stats()["in_flight"] == 0
+
+
+def test_shedding_prefers_low_value_then_oldest(clock):
+    discarded = []
+    scheduler = QuestionScheduler(
+        key_fn=lambda item: item.key, author_fn=lambda item: item.author,
+        low_value_fn=lambda item: item.low_value, maxsize=2
+    )
+    scheduler.on_discard = discarded.append
+    scheduler.put_nowait(_question("bilgi-1"))
+    clock.advance(1)
+    scheduler.put_nowait(_question("selam", low_value=True))
+    clock.advance(1)
+
+    scheduler.put_nowait(_question("bilgi-2"))  # önce selamlama feda edilir
+    assert [item.key for item in discarded] == ["selam"]
+
+    clock.advance(1)
+    scheduler.put_nowait(_question("bilgi-3"))  # sonra en eski bilgi sorusu
+    assert [item.key for item in discarded] == ["selam", "bilgi-1"]
+
+    scheduler.put_nowait(_question("selam-2", low_value=True))  # dolu kuyrukta yeni selamlama reddedilir
+    assert discarded[-1].key == "selam-2"
+
+    stats = scheduler.get_stats()
+    assert (stats["shed_chitchat"], stats["shed_knowledge"], stats["depth"]) == (2, 1, 2)
+
+
+def test_stale_questions_are_dropped_before_shedding(clock):
+    discarded = []
+    scheduler = QuestionScheduler(
+        key_fn=lambda item: item.key, author_fn=lambda item: item.author,
+        low_value_fn=lambda item: item.low_value, maxsize=2, max_age=60
+    )
+    scheduler.on_discard = discarded.append
+    scheduler.put_nowait(_question("eski"))
+    clock.advance(30)
+    scheduler.put_nowait(_question("orta", low_value=True))
+    clock.advance(31)
+
+    scheduler.put_nowait(_question("yeni"))
+
+    # Kuyruk doluyken eskiyen soru atılır, selamlama yerinde kalır
+    assert [item.key for item in discarded] == ["eski"]
+    stats = scheduler.get_stats()
+    assert (stats["dropped_stale"], stats["shed_chitchat"], stats["shed_knowledge"]) == (1, 0, 0)
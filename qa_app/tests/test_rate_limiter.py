@@ -0,0 +1,72 @@
+import pytest
+
+from qa_app.core import rate_limiter
+from qa_app.core.rate_limiter import ChatRateLimiter, TokenBucket
+
+
+@pytest.fixture(autouse=True)
+def fake_time(clock, monkeypatch):
+    monkeypatch.setattr(rate_limiter, "time", clock)
+
+
+def test_token_bucket_refills_up_to_capacity(clock):
+    bucket = TokenBucket(rate=0.5, capacity=2)
+    assert bucket.try_consume()
+    assert bucket.try_consume()
+    assert not bucket.try_consume()
+    assert bucket.time_until(1) == pytest.approx(2.0)
+
+    clock.advance(1)
+    assert bucket.tokens == pytest.approx(0.5)
+    clock.advance(100)
+    assert bucket.tokens == 2
+
+
+def test_token_bucket_caps_oversized_requests():
+    bucket = TokenBucket(rate=1, capacity=3)
+    assert bucket.try_consume(10)
+    assert bucket.tokens == 0
+
+
+def test_per_user_limit_and_exemption(clock):
+    limiter = ChatRateLimiter(per_user_rate=1 / 30, per_user_burst=1, global_rate=0, global_burst=0)
+    assert limiter.allow("ali")
+    assert not limiter.allow("ali")
+    assert limiter.allow("ali", exempt_user=True)
+    assert limiter.allow("veli")
+
+    clock.advance(30)
+    assert limiter.allow("ali")
+    assert limiter.get_stats()["suppressed_user"] == 1
+
+
+def test_global_limit_does_not_spend_user_tokens(clock):
+    limiter = ChatRateLimiter(per_user_rate=1, per_user_burst=1, global_rate=1, global_burst=1)
+    assert limiter.allow("ali")
+    assert not limiter.allow("veli")  # global bucket boş
+
+    clock.advance(1)
+    assert limiter.allow("veli")  # veli'nin kendi token'ı reddedilen mesajda harcanmadı
+    assert limiter.get_stats()["suppressed_global"] == 1
+
+
+def test_idle_authors_are_evicted(clock):
+    limiter = ChatRateLimiter(per_user_rate=1, per_user_burst=1, global_rate=0, global_burst=0, idle_ttl=60)
+    limiter.allow("ali")
+    clock.advance(30)
+    limiter.allow("veli")
+    clock.advance(31)
+
+    limiter.allow("can")  # ali 61s sessiz, veli 31s
+    stats = limiter.get_stats()
+    assert stats["evicted"] == 1
+    assert stats["tracked_authors"] == 2
+
+
+def test_max_authors_bounds_memory():
+    limiter = ChatRateLimiter(per_user_rate=1, per_user_burst=1, global_rate=0, global_burst=0, max_authors=2)
+    for author in ("a", "b", "c", "d"):
+        limiter.allow(author)
+    # Sınır yeni izleyici eklenmeden önce uygulanır: en eski (a) atılır
+    stats = limiter.get_stats()
+    assert (stats["tracked_authors"], stats["evicted"]) == (3, 1)
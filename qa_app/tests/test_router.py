@@ -0,0 +1,40 @@
+import pytest
+
+from qa_app.core.router import QueryRouter, normalize_text, text_hash
+
+
+@pytest.fixture(scope="module")
+def router():
+    return QueryRouter()
+
+
+@pytest.mark.parametrize("text", [
+    "Merhaba hocam",
+    "selam, burslar ne zaman açıklanacak?",
+    "Günaydın!",
+    "hi",
+    "İyi akşamlar herkese",
+])
+def test_greetings_match_whole_words(router, text):
+    assert router.is_greeting(text)
+
+
+@pytest.mark.parametrize("text", [
+    "final sınav tarihi ne zaman?",
+    "şehir dışından gelenlere yurt var mı",
+    "hukuk fakültesi taban puanı",
+    "iyi akşamlardan sonra kütüphane açık mı",
+])
+def test_words_containing_greetings_are_not_greetings(router, text):
+    assert not router.is_greeting(text)
+
+
+def test_precomputed_normalized_text_is_used(router):
+    assert router.is_greeting("tarihi", normalized="selam tarihi")
+    assert router.normalize("Şehir Tarihi?") == "sehir tarihi"
+
+
+def test_normalized_text_and_hash_are_shared(router):
+    assert normalize_text("Çift Anadal (ÇAP) koşulları?") == "cift anadal cap kosullari"
+    assert router.normalize("İyi   akşamlar!") == normalize_text("iyi aksamlar")
+    assert text_hash(normalize_text("Burs?")) == text_hash(normalize_text("burs"))
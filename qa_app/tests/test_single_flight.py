@@ -0,0 +1,108 @@
+import threading
+import time
+
+import pytest
+
+from qa_app.core.single_flight import SingleFlight
+
+
+def _start_leader(flight: SingleFlight, key: str, release: threading.Event, result=None, error=None):
+    """Leader'ı ayrı thread'de başlatır; release set edilene kadar uçuşta kalır."""
+    started = threading.Event()
+    outcome = {}
+
+    def work():
+        started.set()
+        release.wait(5)
+        if error is not None:
+            raise error
+        return result
+
+    def run():
+        try:
+            outcome["value"] = flight.do(key, work)
+        except Exception as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    assert started.wait(5)
+    return thread, outcome
+
+
+def test_concurrent_calls_are_coalesced():
+    flight = SingleFlight()
+    release = threading.Event()
+    leader, leader_outcome = _start_leader(flight, "soru", release, result="cevap")
+
+    waiter_outcome = {}
+    waiter = threading.Thread(target=lambda: waiter_outcome.update(value=flight.do("soru", lambda: "tekrar")))
+    waiter.start()
+    while flight.get_stats()["coalesced"] == 0:
+        time.sleep(0.001)
+    release.set()
+    leader.join(5)
+    waiter.join(5)
+
+    assert leader_outcome["value"] == ("cevap", False)
+    assert waiter_outcome["value"] == ("cevap", True)
+    assert flight.get_stats() == {"leaders": 1, "coalesced": 1, "wait_timeouts": 0, "in_flight": 0}
+
+
+def test_leader_error_is_propagated_to_waiters():
+    flight = SingleFlight()
+    release = threading.Event()
+    error = ValueError("upstream hatası")
+    leader, leader_outcome = _start_leader(flight, "soru", release, error=error)
+
+    waiter_outcome = {}
+
+    def wait():
+        try:
+            flight.do("soru", lambda: "tekrar")
+        except Exception as e:
+            waiter_outcome["error"] = e
+
+    waiter = threading.Thread(target=wait)
+    waiter.start()
+    while flight.get_stats()["coalesced"] == 0:
+        time.sleep(0.001)
+    release.set()
+    leader.join(5)
+    waiter.join(5)
+
+    assert leader_outcome["error"] is error
+    assert waiter_outcome["error"] is error
+    assert flight.in_flight() == 0
+
+
+def test_waiter_times_out_without_affecting_leader():
+    flight = SingleFlight()
+    release = threading.Event()
+    leader, leader_outcome = _start_leader(flight, "soru", release, result="cevap")
+
+    with pytest.raises(TimeoutError):
+        flight.do("soru", lambda: "tekrar", timeout=0.01)
+    release.set()
+    leader.join(5)
+
+    assert leader_outcome["value"] == ("cevap", False)
+    assert flight.get_stats()["wait_timeouts"] == 1
+
+
+def test_sequential_calls_are_not_shared():
+    flight = SingleFlight()
+    assert flight.do("soru", lambda: 1) == (1, False)
+    assert flight.do("soru", lambda: 2) == (2, False)
+
+
+def test_begin_without_join_only_leads():
+    flight = SingleFlight()
+    call, is_leader = flight.begin("soru", join=False)
+    assert is_leader
+
+    assert flight.begin("soru", join=False) == (None, False)  # Uçuştaki çağrıya bağlanmaz
+    assert flight.get_stats()["coalesced"] == 0
+
+    flight.finish("soru", call, result="cevap")
+    assert flight.begin("soru", join=False)[1]
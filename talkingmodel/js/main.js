@@ -4,6 +4,7 @@ let head;
 let audioContext;
 let audioSource;
 let analyser;
+let gainNode;
 let isPlaying = false;
 let audioBuffer = null;
 
@@ -235,24 +236,31 @@ window.isAvatarPlaying = function () {
 function playAudioBuffer(buffer) {
     if (!audioContext) return;
 
-    audioSource = audioContext.createBufferSource();
-    audioSource.buffer = buffer;
+    const source = audioContext.createBufferSource();
+    source.buffer = buffer;
+    audioSource = source;
 
     analyser = audioContext.createAnalyser();
     analyser.fftSize = 256;
     analyser.smoothingTimeConstant = 0.06; // 0.1 = Very jerky/fast. 0.8 = Smooth/slow.
 
-    audioSource.connect(analyser);
-    analyser.connect(audioContext.destination);
+    // Gain node sits after the analyser so a fade-out does not close the mouth before the sound stops
+    gainNode = audioContext.createGain();
 
-    audioSource.start(0);
+    source.connect(analyser);
+    analyser.connect(gainNode);
+    gainNode.connect(audioContext.destination);
+
+    source.start(0);
     isPlaying = true;
 
     // Update UI if needed
     const playBtn = document.getElementById('playBtn');
     if (playBtn) playBtn.textContent = "Stop";
 
-    audioSource.onended = () => {
+    source.onended = () => {
+        // A stopped/faded source can end after the next one started; only the current source resets state
+        if (source !== audioSource) return;
         isPlaying = false;
         if (playBtn) playBtn.textContent = "Play";
         if (head) head.setFixedValue('mouthOpen', 0);
@@ -269,6 +277,20 @@ function stopAudio() {
     }
 }
 
+// Fade out and stop the current audio (used to preempt filler playback when a real answer is ready)
+window.fadeOutTalkingHeadAudio = function (durationMs = 400) {
+    if (!audioSource || !isPlaying || !gainNode) {
+        stopAudio();
+        return;
+    }
+    const end = audioContext.currentTime + durationMs / 1000;
+    gainNode.gain.setValueAtTime(gainNode.gain.value, audioContext.currentTime);
+    gainNode.gain.linearRampToValueAtTime(0, end);
+    try {
+        audioSource.stop(end);
+    } catch (e) { /* ignore if already stopped */ }
+};
+
 // Chatbox API
 // Legacy single message function (optional use)
 window.addChatMessage = function (text, sender) {